@@ -0,0 +1,229 @@
+import json
+import math
+import random
+import threading
+import time
+import logging
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+from src.core.coingecko.coingecko_tickers_utils import COINGECKO_SYMBOLS, VS_CURRENCY_MAPPING
+
+TICKERS_PAGE_SIZE = 100
+EXCHANGES_MAX_PAGE_SIZE = 250
+MARKET_CHART_POINT_INTERVAL_MS = 60 * 60 * 1000  # CoinGecko returns hourly points for ranges between 1 and 90 days
+MILLISECONDS_PER_DAY = 24 * 60 * 60 * 1000
+STATS_ROUTE = "/_stats"  # Request counters of the server, not counted themselves
+
+class StubServerConfig:
+    '''
+        Shape of the synthetic CoinGecko universe and behavior of the stand-in server.
+    '''
+    def __init__(self, exchanges_count=100,
+                 tickers_per_exchange=150,
+                 latency_median_ms=20,
+                 latency_sigma=0.5,
+                 throttle_rate=0.0,
+                 retry_after_seconds=1,
+                 seed=0):
+        """
+        :param exchanges_count: Number of exchanges served by /exchanges.
+        :param tickers_per_exchange: Number of tickers of each exchange.
+        :param latency_median_ms: Median latency added to every response.
+        :param latency_sigma: Sigma of the log-normal latency distribution, 0 makes the latency constant.
+        :param throttle_rate: Probability of answering a request with 429 Too Many Requests.
+        :param retry_after_seconds: Retry-After header sent with the 429 responses, None omits the header.
+        :param seed: Seed of the synthetic data and of the latency/throttling draws.
+        """
+        self.exchanges_count = exchanges_count
+        self.tickers_per_exchange = tickers_per_exchange
+        self.latency_median_ms = latency_median_ms
+        self.latency_sigma = latency_sigma
+        self.throttle_rate = throttle_rate
+        self.retry_after_seconds = retry_after_seconds
+        self.seed = seed
+
+class CoingeckoStubServer:
+    '''
+        Local stand-in of the CoinGecko API serving deterministic synthetic data.
+        Implements /exchanges, /exchanges/{id}/tickers, /exchanges/{id}/volume_chart,
+        /coins/{id}/market_chart and /coins/{id}/market_chart/range, plus /_stats exposing the request counters.
+        Runs on a background thread, one handler thread per connection.
+    '''
+    def __init__(self, config: StubServerConfig, host="127.0.0.1", port=0):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.random_lock = threading.Lock()
+        self.requests_by_status = Counter()
+        self.requests_by_route = Counter()
+        self.counters_lock = threading.Lock()
+        self.symbols = sorted(COINGECKO_SYMBOLS)
+        self.targets = sorted(VS_CURRENCY_MAPPING)
+        self.exchanges = [self._build_exchange(position) for position in range(config.exchanges_count)]
+        self.exchanges_by_id = {exchange["id"]: exchange for exchange in self.exchanges}
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests_count(self):
+        with self.counters_lock:
+            return sum(self.requests_by_status.values())
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name=self.__class__.__name__, daemon=True)
+        self.thread.start()
+        self.logger.info(f"Serving {len(self.exchanges)} synthetic exchanges on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def handle(self, path, query):
+        """
+        Route a GET request.
+
+        :param path: The request path.
+        :param query: The parsed query parameters.
+        :return: A (status, headers, body) tuple.
+        """
+        if path == STATS_ROUTE:
+            with self.counters_lock:
+                stats = {"requests_by_status": dict(self.requests_by_status),
+                         "requests_by_route": dict(self.requests_by_route)}
+            return 200, {}, json.dumps(stats).encode("utf-8")
+
+        self._sleep_latency()
+        parts = [part for part in path.split("/") if part]
+        route = "/" + "/".join("{id}" if position == 1 else part for position, part in enumerate(parts))
+
+        if self._draw() < self.config.throttle_rate:
+            headers = {} if self.config.retry_after_seconds is None else {"Retry-After": str(self.config.retry_after_seconds)}
+            return self._count(route, 429, headers, {"status": {"error_code": 429, "error_message": "Throttled"}})
+
+        if parts == ["exchanges"]:
+            per_page = min(int(query.get("per_page", [100])[0]), EXCHANGES_MAX_PAGE_SIZE)
+            page = int(query.get("page", [1])[0])
+            return self._count(route, 200, {}, self.exchanges[(page - 1) * per_page:page * per_page])
+        if len(parts) == 3 and parts[0] == "exchanges" and parts[1] in self.exchanges_by_id:
+            if parts[2] == "tickers":
+                coin_ids = set(query["coin_ids"][0].split(",")) if "coin_ids" in query else None
+                return self._count(route, 200, {}, self._tickers_page(parts[1], int(query.get("page", [1])[0]), coin_ids))
+            if parts[2] == "volume_chart":
+                return self._count(route, 200, {}, self._volume_chart(parts[1], int(query.get("days", [1])[0])))
+        if len(parts) >= 3 and parts[0] == "coins" and parts[2] == "market_chart":
+            now_ms = int(time.time() * 1000)
+            if parts[3:] == ["range"]:
+                from_ms, to_ms = int(query["from"][0]) * 1000, int(query["to"][0]) * 1000
+            else:
+                from_ms, to_ms = now_ms - int(query.get("days", [30])[0]) * MILLISECONDS_PER_DAY, now_ms
+            return self._count(route, 200, {}, self._market_chart(parts[1], from_ms, to_ms))
+        return self._count(route, 404, {}, {"error": f"Unknown route: {path}"})
+
+    def _build_exchange(self, position):
+        return {
+            "id": f"exchange-{position}",
+            "name": f"Exchange {position}",
+            "year_established": 2010 + position % 15,
+            "country": "Cayman Islands",
+            "trust_score": 10 - position % 10,
+            "trust_score_rank": position + 1,
+        }
+
+    def _tickers_page(self, exchange_id, page, coin_ids=None):
+        # Every exchange lists a deterministic, exchange specific slice of the symbol x target universe
+        exchange_position = int(exchange_id.rsplit("-", 1)[1])
+        universe_size = len(self.symbols) * len(self.targets)
+        if coin_ids is None:
+            ticker_positions = range((page - 1) * TICKERS_PAGE_SIZE, min(page * TICKERS_PAGE_SIZE, self.config.tickers_per_exchange))
+        else:
+            # Filtered as the real endpoint does, on the base coin id, before paginating
+            ticker_positions = [ticker_position for ticker_position in range(self.config.tickers_per_exchange)
+                                if COINGECKO_SYMBOLS[self._ticker_base(exchange_position, ticker_position)] in coin_ids]
+            ticker_positions = ticker_positions[(page - 1) * TICKERS_PAGE_SIZE:page * TICKERS_PAGE_SIZE]
+        tickers = []
+        for ticker_position in ticker_positions:
+            pair_position = (exchange_position * 7 + ticker_position) % universe_size
+            base = self._ticker_base(exchange_position, ticker_position)
+            target = self.targets[pair_position % len(self.targets)]
+            if ticker_position >= universe_size:
+                # Larger universes than the known symbols get synthetic targets, matched by no reference market
+                target = f"{target}{ticker_position // universe_size}"
+            tickers.append({
+                "base": base,
+                "target": target,
+                "coin_id": COINGECKO_SYMBOLS[base],
+                "target_coin_id": COINGECKO_SYMBOLS.get(target),
+                "market": {"name": self.exchanges_by_id[exchange_id]["name"], "identifier": exchange_id},
+                "volume": 1000.0 + ticker_position,
+            })
+        return {"name": self.exchanges_by_id[exchange_id]["name"], "tickers": tickers}
+
+    def _ticker_base(self, exchange_position, ticker_position):
+        pair_position = (exchange_position * 7 + ticker_position) % (len(self.symbols) * len(self.targets))
+        return self.symbols[pair_position // len(self.targets)]
+
+    def _volume_chart(self, exchange_id, days):
+        now_ms = int(time.time() * 1000)
+        points_count = days * 24 if days > 1 else 24 * 12
+        step_ms = days * MILLISECONDS_PER_DAY // points_count
+        return [[now_ms - (points_count - point) * step_ms, f"{1000 + point * 0.5:.8f}"] for point in range(points_count)]
+
+    def _market_chart(self, coin_id, from_ms, to_ms):
+        first_point_ms = from_ms - from_ms % MARKET_CHART_POINT_INTERVAL_MS + MARKET_CHART_POINT_INTERVAL_MS
+        timestamps = range(first_point_ms, to_ms + 1, MARKET_CHART_POINT_INTERVAL_MS)
+        seed = sum(map(ord, coin_id))
+        prices = [[timestamp, 100.0 + (seed + timestamp // MARKET_CHART_POINT_INTERVAL_MS) % 1000] for timestamp in timestamps]
+        return {"prices": prices, "market_caps": prices, "total_volumes": prices}
+
+    def _sleep_latency(self):
+        if self.config.latency_median_ms <= 0:
+            return
+        with self.random_lock:
+            latency_ms = self.random.lognormvariate(math.log(self.config.latency_median_ms), self.config.latency_sigma)
+        time.sleep(latency_ms / 1000)
+
+    def _draw(self):
+        with self.random_lock:
+            return self.random.random()
+
+    def _count(self, route, status, headers, body):
+        with self.counters_lock:
+            self.requests_by_status[status] += 1
+            self.requests_by_route[route] += 1
+        return status, headers, json.dumps(body).encode("utf-8")
+
+    def _handler_class(self):
+        stub_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, as served by the real API
+
+            def do_GET(self):
+                url = urlsplit(self.path)
+                status, headers, body = stub_server.handle(url.path, parse_qs(url.query))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,127 @@
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+import requests
+from benchmarks.coingecko_stub_server import CoingeckoStubServer, StubServerConfig, STATS_ROUTE
+from src.config.app_config import AppConfig
+from src.di.di_container import DIContainer
+
+# Size of the exchange universe the pipeline currently runs against, --scale multiplies it
+BASELINE_EXCHANGES_COUNT = 100
+BASELINE_TICKERS_PER_EXCHANGE = 150
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the similar exchanges pipeline end to end against a local CoinGecko stand-in server.")
+    parser.add_argument("--scale", type=float, default=1, help="Multiplier of the baseline exchange universe (default: 1)")
+    parser.add_argument("--tickers_per_exchange", type=int, default=BASELINE_TICKERS_PER_EXCHANGE,
+                        help=f"Tickers listed by every exchange (default: {BASELINE_TICKERS_PER_EXCHANGE})")
+    parser.add_argument("--latency_median_ms", type=float, default=20, help="Median latency of the server responses (default: 20)")
+    parser.add_argument("--latency_sigma", type=float, default=0.5,
+                        help="Sigma of the log-normal latency distribution, 0 for a constant latency (default: 0.5)")
+    parser.add_argument("--throttle_rate", type=float, default=0.0, help="Share of the requests answered with a 429 (default: 0)")
+    parser.add_argument("--retry_after_seconds", type=int, default=1,
+                        help="Retry-After header of the 429 responses, negative omits the header (default: 1)")
+    parser.add_argument("--max_concurrent_requests", type=int, default=4, help="Pipeline requests in flight (default: 4)")
+    parser.add_argument("--rate_limiter_max_retries", type=int, default=5, help="Pipeline retries per call (default: 5)")
+    parser.add_argument("--exchanges_with_similar_trades_to_analyze", type=int, default=None,
+                        help="Similar exchanges limit of the pipeline (default: every exchange)")
+    parser.add_argument("--stream_tickers", action="store_true", help="Decode the ticker pages incrementally")
+    parser.add_argument("--adaptive_concurrency", action="store_true",
+                        help="Adapt the requests in flight to 429s and latency, up to --max_concurrent_requests")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data and latency draws (default: 0)")
+    parser.add_argument("--output", type=str, default="", help="Also write the JSON report to this file")
+    parser.add_argument("--log_level", type=str, default="warning", help="Log level of the pipeline (default: warning)")
+    return parser.parse_args()
+
+def serve(stub_server_config, base_url_queue):
+    stub_server = CoingeckoStubServer(stub_server_config)
+    base_url_queue.put(stub_server.base_url)
+    stub_server.server.serve_forever()
+
+def run_benchmark(args):
+    """
+    Start the stand-in server in a child process, so the peak RSS only accounts for the pipeline, and run the
+    pipeline once against it.
+
+    :param args: The parsed command line arguments.
+    :return: The benchmark report as a dict.
+    """
+    exchanges_count = max(int(BASELINE_EXCHANGES_COUNT * args.scale), 1)
+    stub_server_config = StubServerConfig(exchanges_count=exchanges_count,
+                                          tickers_per_exchange=args.tickers_per_exchange,
+                                          latency_median_ms=args.latency_median_ms,
+                                          latency_sigma=args.latency_sigma,
+                                          throttle_rate=args.throttle_rate,
+                                          retry_after_seconds=args.retry_after_seconds if args.retry_after_seconds >= 0 else None,
+                                          seed=args.seed)
+    base_url_queue = multiprocessing.Queue()
+    server_process = multiprocessing.Process(target=serve, args=(stub_server_config, base_url_queue), daemon=True)
+    server_process.start()
+    working_dir = os.getcwd()
+    try:
+        base_url = base_url_queue.get(timeout=30)
+        app_config = AppConfig(rate_limiter_max_retries=args.rate_limiter_max_retries,
+                               historical_data_lookback_days=30,
+                               log_level=args.log_level,
+                               exchanges_with_similar_trades_to_analyze=args.exchanges_with_similar_trades_to_analyze or exchanges_count,
+                               exchanges_to_analyze_limit=exchanges_count,
+                               write_to_s3=False,
+                               max_concurrent_requests=args.max_concurrent_requests,
+                               rate_limiter_calls_per_minute=0,
+                               http_cache_dir="",
+                               exchange_market_index_path="",
+                               time_series_db_path="",
+                               rolling_analytics_state_path="",
+                               stream_tickers=args.stream_tickers,
+                               adaptive_concurrency=args.adaptive_concurrency,
+                               coingecko_base_url=base_url)
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            # The exporter writes under the working directory
+            os.chdir(output_dir)
+            di_container = DIContainer(app_config)
+            di_container.init_deps()
+            started_at = time.perf_counter()
+            stage_graph = di_container.coingecko_similar_exchanges_data_pipeline.run()
+            wall_time_seconds = time.perf_counter() - started_at
+            os.chdir(working_dir)
+
+        stats = requests.get(base_url + STATS_ROUTE, timeout=10).json()
+    finally:
+        os.chdir(working_dir)
+        server_process.terminate()
+        server_process.join()
+
+    requests_count = sum(stats["requests_by_status"].values())
+    return {
+        "scale": args.scale,
+        "exchanges": exchanges_count,
+        "tickers_per_exchange": args.tickers_per_exchange,
+        "max_concurrent_requests": args.max_concurrent_requests,
+        "wall_time_seconds": round(wall_time_seconds, 3),
+        "requests": requests_count,
+        "requests_per_second": round(requests_count / wall_time_seconds, 2),
+        "requests_by_status": stats["requests_by_status"],
+        "requests_by_route": stats["requests_by_route"],
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),  # ru_maxrss is in KB on Linux
+        "stages_seconds": {timing.name: round(timing.duration_seconds, 3) for timing in stage_graph.timings.values()},
+        "critical_path": [timing.name for timing in stage_graph.critical_path()],
+        "http_metrics": di_container.http_metrics.to_dict(),
+        "concurrency_controller": di_container.concurrency_controller.to_dict() \
+            if di_container.concurrency_controller is not None else None,
+    }
+
+if __name__ == "__main__":
+    args = parse_args()
+    logging.basicConfig(level=getattr(logging, args.log_level.upper(), logging.WARNING))
+    report = run_benchmark(args)
+    report_json = json.dumps(report, indent=2)
+    print(report_json)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report_json)
@@ -1,61 +1,36 @@
 from airflow import DAG
-from airflow.operators.python import PythonOperator
+from airflow.decorators import task
 from datetime import datetime, timedelta
-from src.core.coingecko.coingecko_data_analyzer import CoingeckoSimilarExchangesDataAnalyzer
-from src.core.coingecko.coingecko_data_fetcher_limits import CoingeckoDataFetcherLimits
-from src.external_apis.coingecko_api import CoingeckoAPI
-from src.adapters.bitso_api import BitsoAPI
-from s3.s3_handler import S3Handler
+import copy
 import os
-import pandas as pd
 
 # Constants
-EXCHANGE_VOLUME_TRADE_DAYS = 30
+# Every shard runs as a mapped task, the merge task exports the final tables once they all succeeded.
+# The shards dir must be on storage shared by the workers running the shards and the merge.
+SHARDS_COUNT = int(os.environ.get("EXCHTRACKER_SHARDS_COUNT", "4"))
+CONFIG_PATH = os.environ.get("EXCHTRACKER_CONFIG_PATH", "")
 
-def fetch_coingecko_data():
-    args = {
-        "coingecko_retries": 3,
-        "exchanges_with_similar_trades_limit": 2,
-        "exchanges_to_lookup_limit": 5,
-        "write_to_s3": False,
-    }
+def load_app_config():
+    """
+    Load the app config from the JSON config file, if set, otherwise use the command line defaults.
 
-    # Initialize dependencies
-    coingecko_api = CoingeckoAPI(rate_limiter_retries=args["coingecko_retries"])
-    coingecko_data_fetcher = CoingeckoSimilarExchangesDataAnalyzer(
-        coingecko_api,
-        CoingeckoDataFetcherLimits(
-            args["exchanges_with_similar_trades_limit"],
-            args["exchanges_to_lookup_limit"],
-        ),
-    )
-    bitso_api = BitsoAPI()
+    :return: An AppConfig.
+    """
+    from src.config.app_config import AppConfig
+    from src.utils.app_config_utils import AppConfigUtils
+    from src.constants.constants import RATE_LIMITER_MAX_RETRIES_DEFAULT, HISTORICAL_DATA_LOOKBACK_DAYS_DEFAULT, \
+        LOGGING_DEFAULT_LEVEL, EXCHANGES_WITH_SIMILAR_TRADES_TO_ANALYZE_DEFAULT, EXCHANGES_TO_ANALYZE_DEFAULT_LIMIT, \
+        WRITE_TO_S3_DEFAULT
 
-    bitso_markets = bitso_api.fetch_markets()
-    exchanges_with_similar_markets, shared_markets = coingecko_data_fetcher.generate_exchanges_with_similar_trades(
-        bitso_markets
-    )
-    markets_historical_volume = coingecko_data_fetcher.generate_markets_historical_volume_table(shared_markets)
-    exchanges_historical_trade_volume = coingecko_data_fetcher.generate_exchanges_trade_volume(
-        exchanges_with_similar_markets, EXCHANGE_VOLUME_TRADE_DAYS
-    )
-
-    os.makedirs("../data/processed", exist_ok=True)
-    pd.DataFrame(exchanges_with_similar_markets).to_csv("../data/processed/exchange_table.csv", index=False)
-    pd.DataFrame(shared_markets).to_csv("../data/processed/shared_markets_table.csv", index=False)
-    pd.DataFrame(markets_historical_volume).to_csv("../data/processed/markets_historical_volume_df.csv", index=False)
-    pd.DataFrame(exchanges_historical_trade_volume).to_csv("../data/processed/exchanges_historical_trade_volume.csv", index=False)
-
-    # Upload to S3
-    s3 = S3Handler(
-        bucket_name=os.environ.get("aws-bucket", ""),
-        aws_access_key_id=os.environ.get("aws-access-key", ""),
-        aws_secret_access_key=os.environ.get("aws-secret-access-key", ""),
-    )
-    s3.upload_dataframe(pd.DataFrame(exchanges_with_similar_markets), "processed/exchange_table.csv")
-    s3.upload_dataframe(pd.DataFrame(shared_markets), "processed/shared_markets_table.csv")
-    s3.upload_dataframe(pd.DataFrame(markets_historical_volume), "processed/markets_historical_volume_df.csv")
-    s3.upload_dataframe(pd.DataFrame(exchanges_historical_trade_volume), "processed/exchanges_historical_trade_volume.csv")
+    if CONFIG_PATH:
+        with open(CONFIG_PATH, "r") as f:
+            return AppConfigUtils.from_json(f.read())
+    return AppConfig(rate_limiter_max_retries=RATE_LIMITER_MAX_RETRIES_DEFAULT,
+                     historical_data_lookback_days=HISTORICAL_DATA_LOOKBACK_DAYS_DEFAULT,
+                     log_level=LOGGING_DEFAULT_LEVEL,
+                     exchanges_with_similar_trades_to_analyze=EXCHANGES_WITH_SIMILAR_TRADES_TO_ANALYZE_DEFAULT,
+                     exchanges_to_analyze_limit=EXCHANGES_TO_ANALYZE_DEFAULT_LIMIT,
+                     write_to_s3=WRITE_TO_S3_DEFAULT)
 
 # Define the Airflow DAG
 default_args = {
@@ -75,7 +50,30 @@ with DAG(
     start_date=datetime(2023, 1, 1),
     catchup=False,
 ) as dag:
-    fetch_data_task = PythonOperator(
-        task_id="fetch_coingecko_data",
-        python_callable=fetch_coingecko_data,
-    )
+
+    @task
+    def run_shard(shard, run_id=None):
+        """
+        Run the pipeline on one shard of the exchanges, writing its partial results to the shards dir.
+        A retry of the task resumes from the checkpoints of the failed attempt, the run id is the Airflow run's.
+        """
+        from src.core.coingecko.shard_partials import run_shard as run_pipeline_shard
+        app_config = copy.copy(load_app_config())
+        app_config.shard = shard
+        app_config.run_id = run_id
+        return run_pipeline_shard(app_config)
+
+    @task
+    def merge_shards():
+        """
+        Merge the partial results of every shard into the final tables and export them.
+        """
+        from src.di.di_container import DIContainer
+        app_config = copy.copy(load_app_config())
+        app_config.merge_shards = SHARDS_COUNT
+        di_container = DIContainer(app_config)
+        di_container.init_deps()
+        di_container.shard_partials_merger.run()
+
+    shards = [f"{index}/{SHARDS_COUNT}" for index in range(SHARDS_COUNT)]
+    run_shard.expand(shard=shards) >> merge_shards()
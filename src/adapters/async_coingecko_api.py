@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.adapters.coingecko_api import CoingeckoAPI, EXCHANGES_PAGE_SIZE, TICKERS_PAGE_SIZE
+
+class AsyncCoingeckoAPI:
+    """
+    Asyncio variant of the CoingeckoAPI.
+    Every call is dispatched to a dedicated worker thread running the blocking CoingeckoAPI call,
+    and a semaphore keeps at most `max_concurrent_requests` calls in flight at any time.
+    Calls still waiting for a slot can be cancelled without ever reaching the API.
+    """
+
+    def __init__(self, coingecko_api: CoingeckoAPI, max_concurrent_requests):
+        """
+        Initialize the AsyncCoingeckoAPI.
+
+        :param coingecko_api: The blocking CoingeckoAPI used to perform the HTTP calls.
+        :param max_concurrent_requests: Maximum number of requests in flight at the same time.
+        """
+        if max_concurrent_requests < 1:
+            raise ValueError(f"max_concurrent_requests must be at least 1, got: {max_concurrent_requests}")
+        self.coingecko_api = coingecko_api
+        self.max_concurrent_requests = max_concurrent_requests
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent_requests,
+                                           thread_name_prefix=self.__class__.__name__)
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    async def fetch_exchanges(self, page=1):
+        """
+        Fetch a page of the available exchanges from the CoinGecko API.
+
+        :param page: The page number, starting at 1.
+        :return: A JSON object containing exchange information.
+        """
+        return await self._call(self.coingecko_api.fetch_exchanges, page)
+
+    async def fetch_markets(self, exchange_id, page=1, coin_ids=None):
+        """
+        Fetch a page of markets for a specific exchange.
+
+        :param exchange_id: The ID of the exchange.
+        :param page: The page number, starting at 1.
+        :param coin_ids: Optional CoinGecko ids of the base coins to fetch the tickers of, filtered server side.
+        :return: A JSON object containing market ticker information.
+        """
+        return await self._call(self.coingecko_api.fetch_markets, exchange_id, page, coin_ids)
+
+    async def iter_exchange_pages(self):
+        """
+        Iterate over the pages of exchanges, fetching each page only when the previous one was consumed.
+
+        :return: An async generator of lists of exchange entries.
+        """
+        page = 1
+        while True:
+            exchanges = await self.fetch_exchanges(page)
+            if exchanges:
+                yield exchanges
+            if len(exchanges) < EXCHANGES_PAGE_SIZE:
+                return
+            page += 1
+
+    async def iter_ticker_pages(self, exchange_id, coin_ids=None):
+        """
+        Iterate over the pages of tickers of an exchange, fetching each page only when the previous one was consumed.
+
+        :param exchange_id: The ID of the exchange.
+        :param coin_ids: Optional CoinGecko ids of the base coins to fetch the tickers of, filtered server side.
+        :return: An async generator of lists of ticker entries.
+        """
+        page = 1
+        while True:
+            tickers = (await self.fetch_markets(exchange_id, page, coin_ids)).get("tickers", [])
+            if tickers:
+                yield tickers
+            if len(tickers) < TICKERS_PAGE_SIZE:
+                return
+            page += 1
+
+    async def fetch_historical_volume(self, base_coin_id, target_vs_currency):
+        """
+        Fetch historical volume data for a given coin pair.
+
+        :param base_coin_id: The CoinGecko ID of the base coin.
+        :param target_vs_currency: The currency against which the volume is measured.
+        :return: A JSON object containing historical volume data.
+        """
+        return await self._call(self.coingecko_api.fetch_historical_volume, base_coin_id, target_vs_currency)
+
+    async def fetch_historical_volume_range(self, base_coin_id, target_vs_currency, from_timestamp, to_timestamp):
+        """
+        Fetch historical volume data for a given coin pair between two points in time.
+
+        :param base_coin_id: The CoinGecko ID of the base coin.
+        :param target_vs_currency: The currency against which the volume is measured.
+        :param from_timestamp: Start of the range, as a unix timestamp in seconds.
+        :param to_timestamp: End of the range, as a unix timestamp in seconds.
+        :return: A JSON object containing historical volume data.
+        """
+        return await self._call(self.coingecko_api.fetch_historical_volume_range, base_coin_id, target_vs_currency,
+                                from_timestamp, to_timestamp)
+
+    async def fetch_exchange_volume_chart(self, exchange_id, days):
+        """
+        Fetch the trade volume chart for a specific exchange over a specified number of days.
+
+        :param exchange_id: The ID of the exchange.
+        :param days: Number of days for which to fetch the volume chart.
+        :return: A JSON object containing volume chart data.
+        """
+        return await self._call(self.coingecko_api.fetch_exchange_volume_chart, exchange_id, days)
+
+    async def _call(self, api_call, *args):
+        """
+        Run a blocking CoingeckoAPI call on the worker threads once a request slot is free.
+
+        :param api_call: The CoingeckoAPI bound method to call.
+        :param args: Positional arguments for the call.
+        :return: The result of the call.
+        """
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, lambda: api_call(*args))
+
+    def _get_semaphore(self):
+        """
+        Return the semaphore bounding in-flight requests for the running event loop.
+        A new semaphore is created for each event loop, as asyncio primitives cannot be shared across loops.
+
+        :return: An asyncio.Semaphore.
+        """
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_requests)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def close(self):
+        """
+        Release the worker threads.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
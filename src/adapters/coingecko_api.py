@@ -1,17 +1,40 @@
-import requests
-from datetime import datetime
-from ratelimit import limits, sleep_and_retry
+from concurrent.futures import ThreadPoolExecutor
 from src.utils.http_call_retrier import HTTPCallRetrier
+from src.utils.http_session_factory import HTTPSessionFactory
+from src.utils.json_stream_decoder import JSONStreamDecoder, loads
+from src.constants.constants import COINGECKO_BASE_URL_DEFAULT, HTTP_POOL_SIZE_DEFAULT, HTTP_CONNECT_TIMEOUT_SECONDS_DEFAULT, HTTP_READ_TIMEOUT_SECONDS_DEFAULT
 import logging
 
 # Base URL for the CoinGecko API
-BASE_ROUTE = "https://api.coingecko.com/api/v3"
+BASE_ROUTE = COINGECKO_BASE_URL_DEFAULT
 
-# API routes for different endpoints
-FETCH_EXCHANGE_ROUTE = f"{BASE_ROUTE}/exchanges"  # Fetches all exchanges
-FETCH_EXCHANGE_VOLUME_BY_ID_ROUTE = f"{BASE_ROUTE}/exchanges/{{exchange_id}}/volume_chart?days={{days}}"  # Fetch volume chart for an exchange
-FETCH_MARKETS_ROUTE_FORMAT = f"{BASE_ROUTE}/exchanges/{{exchange_id}}/tickers"  # Fetch market tickers for an exchange
-FETCH_HISTORICAL_VOLUME_ROUTE = f"{BASE_ROUTE}/coins/{{base_coin}}/market_chart?vs_currency={{target_coin}}&days={{lookback_days}}"  # Fetch historical volume for a coin pair
+# API routes for different endpoints, relative to the base URL
+FETCH_EXCHANGE_ROUTE = "/exchanges"  # Fetches all exchanges
+FETCH_EXCHANGES_PAGE_ROUTE = f"{FETCH_EXCHANGE_ROUTE}?per_page={{per_page}}&page={{page}}"  # Fetches a page of exchanges
+FETCH_EXCHANGE_VOLUME_BY_ID_ROUTE = "/exchanges/{exchange_id}/volume_chart?days={days}"  # Fetch volume chart for an exchange
+FETCH_MARKETS_ROUTE_FORMAT = "/exchanges/{exchange_id}/tickers"  # Fetch market tickers for an exchange
+FETCH_MARKETS_PAGE_ROUTE_FORMAT = f"{FETCH_MARKETS_ROUTE_FORMAT}?page={{page}}"  # Fetch a page of market tickers for an exchange
+FETCH_MARKETS_BY_COIN_IDS_PAGE_ROUTE_FORMAT = f"{FETCH_MARKETS_ROUTE_FORMAT}?coin_ids={{coin_ids}}&page={{page}}"  # Fetch a page of the market tickers of some base coins for an exchange
+
+# Page sizes of the paginated endpoints, a shorter page is the last one
+EXCHANGES_PAGE_SIZE = 250  # Maximum per_page accepted by /exchanges
+TICKERS_PAGE_SIZE = 100  # Fixed page size of /exchanges/{id}/tickers
+FETCH_HISTORICAL_VOLUME_ROUTE = "/coins/{base_coin}/market_chart?vs_currency={target_coin}&days={lookback_days}"  # Fetch historical volume for a coin pair
+FETCH_HISTORICAL_VOLUME_RANGE_ROUTE = "/coins/{base_coin}/market_chart/range?vs_currency={target_coin}&from={from_timestamp}&to={to_timestamp}"  # Fetch historical volume for a coin pair between two unix timestamps
+
+# Ticker fields read by the analyzers, the other fields are dropped when tickers are streamed
+STREAMED_TICKER_FIELDS = ("base", "target", "coin_id", "target_coin_id", "volume", "trust_score")
+STREAMED_TICKER_MARKET_FIELDS = ("name", "identifier")
+STREAMED_RESPONSE_CHUNK_SIZE = 64 * 1024
+
+# Time to live of cached responses per endpoint namespace, expired entries are revalidated with the server
+CACHE_TTL_SECONDS_BY_NAMESPACE = {
+    "coingecko_fetch_exchanges": 6 * 60 * 60,
+    "coingecko_fetch_markets": 15 * 60,
+    "coingecko_fetch_historical_volume": 60 * 60,
+    "coingecko_fetch_historical_volume_range": 60 * 60,
+    "coingecko_fetch_exchange_volume_chart": 60 * 60,
+}
 
 # Default configurations for historical volume data
 HISTORICAL_VOLUME_DEFAULT_CURRENCY = "usd"  # Default currency for historical volume data
@@ -21,53 +44,181 @@ class CoingeckoAPI:
     """
     Wrapper class for interacting with the CoinGecko API.
     This class uses a rate-limited API wrapper to handle retries and throttling.
+    All requests go through a pooled keep-alive session with compression and connect/read timeouts.
     """
 
-    def __init__(self, rate_limiter_retries):
+    def __init__(self, rate_limiter_retries,
+                 pool_size=HTTP_POOL_SIZE_DEFAULT,
+                 connect_timeout_seconds=HTTP_CONNECT_TIMEOUT_SECONDS_DEFAULT,
+                 read_timeout_seconds=HTTP_READ_TIMEOUT_SECONDS_DEFAULT,
+                 rate_limiter=None,
+                 response_cache=None,
+                 prefetch_next_page=False,
+                 base_url=BASE_ROUTE,
+                 metrics=None,
+                 stream_tickers=False,
+                 concurrency_controller=None):
         """
-        Initialize the CoinGeckoAPI with a rate limiter.
+        Initialize the CoinGeckoAPI with a rate limiter and a pooled HTTP session.
 
         :param rate_limiter_retries: Number of retries for API calls before raising an exception.
+        :param pool_size: Maximum number of keep-alive connections kept open to the API.
+        :param connect_timeout_seconds: Timeout to establish a connection, per call.
+        :param read_timeout_seconds: Timeout waiting for the server to send data, per call.
+        :param rate_limiter: Optional TokenBucketRateLimiter shared by every endpoint, pacing calls before they are sent.
+        :param response_cache: Optional HTTPResponseCache serving and revalidating responses locally.
+        :param prefetch_next_page: If the paginated iterators fetch the next page while the current one is consumed.
+        :param base_url: Base URL of the API, e.g. to target a local stand-in server.
+        :param metrics: Optional HTTPMetricsRegistry recording latency, retries, throttling and bytes per endpoint.
+        :param stream_tickers: If ticker pages are decoded incrementally while they are received, keeping only
+                               the ticker fields read by the analyzers.
+        :param concurrency_controller: Optional AIMDConcurrencyController adapting the number of calls in flight, shared by every endpoint.
         """
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.http_rate_limiter = HTTPCallRetrier(rate_limiter_retries)  # Initialize the rate limiter with specified retries
-            
-    def fetch_exchanges(self):
+        self.http_rate_limiter = HTTPCallRetrier(rate_limiter_retries, rate_limiter=rate_limiter, metrics=metrics,
+                                                 concurrency_controller=concurrency_controller)  # Initialize the rate limiter with specified retries
+        self.session = HTTPSessionFactory.create_session(pool_size)
+        self.timeout = (connect_timeout_seconds, read_timeout_seconds)
+        self.response_cache = response_cache
+        self.base_url = base_url.rstrip("/")
+        self.prefetch_next_page = prefetch_next_page
+        self.stream_tickers = stream_tickers
+        self.prefetch_executor = ThreadPoolExecutor(thread_name_prefix=f"{self.__class__.__name__}Prefetch") \
+            if prefetch_next_page else None
+
+    def fetch_exchanges(self, page=1):
         """
-        Fetch a list of all available exchanges from the CoinGecko API.
+        Fetch a page of the available exchanges from the CoinGecko API.
 
+        :param page: The page number, starting at 1.
         :return: A JSON object containing exchange information.
         """
-        return self.http_rate_limiter.call_api(lambda: self._fetch_exchanges(), namespace="coingecko_fetch_exchanges").json()
-    
-    def _fetch_exchanges(self):
+        fetch_exchanges_url = self.base_url + str.format(FETCH_EXCHANGES_PAGE_ROUTE, per_page=EXCHANGES_PAGE_SIZE, page=page)
+        return self._call_api(fetch_exchanges_url, namespace="coingecko_fetch_exchanges").json()
+
+    def fetch_markets(self, exchange_id, page=1, coin_ids=None):
         """
-        Internal method to make the raw API request for fetching exchanges.
+        Fetch a page of markets for a specific exchange.
 
-        :return: A Response object from the CoinGecko API.
+        :param exchange_id: The ID of the exchange.
+        :param page: The page number, starting at 1.
+        :param coin_ids: Optional CoinGecko ids of the base coins to fetch the tickers of, filtered server side.
+                         Every ticker is fetched if not set.
+        :return: A JSON object containing market ticker information.
         """
-        response = requests.get(FETCH_EXCHANGE_ROUTE)
-        return response
-    
-    def fetch_markets(self, exchange_id):
+        if coin_ids:
+            fetch_markets_url = self.base_url + str.format(FETCH_MARKETS_BY_COIN_IDS_PAGE_ROUTE_FORMAT, exchange_id=exchange_id,
+                                                           coin_ids=",".join(sorted(coin_ids)), page=page)
+        else:
+            fetch_markets_url = self.base_url + str.format(FETCH_MARKETS_PAGE_ROUTE_FORMAT, exchange_id=exchange_id, page=page)
+        if self.stream_tickers:
+            response = self._call_api(fetch_markets_url, namespace="coingecko_fetch_markets", stream=True)
+            return {"tickers": self._decode_tickers(fetch_markets_url, response)}
+        return self._call_api(fetch_markets_url, namespace="coingecko_fetch_markets").json()
+
+    def _decode_tickers(self, url, response):
         """
-        Fetch a list of markets for a specific exchange.
+        Decode the tickers of a tickers response, keeping only the fields read by the analyzers.
+        Bodies still being received are decoded incrementally, ticker by ticker, so the raw body and the
+        untrimmed tickers are never held in memory at once, and are written to the response cache as they
+        are decoded. Bodies already read, e.g. served from the cache, are decoded in one go with the fastest
+        decoder available.
+
+        :param url: The requested URL.
+        :param response: A successful tickers response, requested with stream=True.
+        :return: A list of trimmed ticker entries.
+        """
+        try:
+            if getattr(response, "_content_consumed", False):
+                return [self._trim_ticker(ticker) for ticker in loads(response.content).get("tickers", [])]
+            chunks = response.iter_content(STREAMED_RESPONSE_CHUNK_SIZE)
+            if self.response_cache is None:
+                return [self._trim_ticker(ticker) for ticker in JSONStreamDecoder(chunks).iter_array_items("tickers")]
+            cached_chunks = self.response_cache.put_chunks(url, response, chunks)
+            tickers = [self._trim_ticker(ticker) for ticker in JSONStreamDecoder(cached_chunks).iter_array_items("tickers")]
+            # The decoder stops at the end of the tickers, the rest of the body completes the cache entry
+            for _ in cached_chunks:
+                pass
+            return tickers
+        finally:
+            response.close()
+
+    @staticmethod
+    def _trim_ticker(ticker):
+        trimmed_ticker = {field: ticker.get(field) for field in STREAMED_TICKER_FIELDS}
+        market = ticker.get("market") or {}
+        trimmed_ticker["market"] = {field: market.get(field) for field in STREAMED_TICKER_MARKET_FIELDS}
+        trimmed_ticker["converted_volume"] = {"usd": (ticker.get("converted_volume") or {}).get("usd")}
+        return trimmed_ticker
+
+    def iter_exchanges(self):
+        """
+        Iterate over every exchange, fetching the pages lazily.
+
+        :return: A generator of exchange entries.
+        """
+        for exchanges in self.iter_exchange_pages():
+            yield from exchanges
+
+    def iter_exchange_pages(self):
+        """
+        Iterate over the pages of exchanges, fetching each page only when the previous one was consumed
+        (or one page ahead when prefetching is enabled).
+
+        :return: A generator of lists of exchange entries.
+        """
+        return self._iter_pages(lambda page: self.fetch_exchanges(page), EXCHANGES_PAGE_SIZE)
+
+    def iter_tickers(self, exchange_id, coin_ids=None):
+        """
+        Iterate over every ticker of an exchange, fetching the pages lazily.
 
         :param exchange_id: The ID of the exchange.
-        :return: A JSON object containing market ticker information.
+        :param coin_ids: Optional CoinGecko ids of the base coins to fetch the tickers of.
+        :return: A generator of ticker entries.
         """
-        return self.http_rate_limiter.call_api(lambda: self._fetch_markets(exchange_id), namespace="coingecko_fetch_markets").json()
+        for tickers in self.iter_ticker_pages(exchange_id, coin_ids=coin_ids):
+            yield from tickers
 
-    def _fetch_markets(self, exchange_id):
+    def iter_ticker_pages(self, exchange_id, coin_ids=None):
         """
-        Internal method to make the raw API request for fetching markets for an exchange.
+        Iterate over the pages of tickers of an exchange, fetching each page only when the previous one was consumed
+        (or one page ahead when prefetching is enabled).
 
         :param exchange_id: The ID of the exchange.
-        :return: A Response object from the CoinGecko API.
+        :param coin_ids: Optional CoinGecko ids of the base coins to fetch the tickers of, filtered server side.
+        :return: A generator of lists of ticker entries.
         """
-        fetch_markets_url = str.format(FETCH_MARKETS_ROUTE_FORMAT, exchange_id=exchange_id)
-        response = requests.get(fetch_markets_url)
-        return response
+        return self._iter_pages(lambda page: self.fetch_markets(exchange_id, page, coin_ids=coin_ids).get("tickers", []),
+                                TICKERS_PAGE_SIZE)
+
+    def _iter_pages(self, fetch_page, page_size):
+        """
+        Iterate over the pages of a paginated endpoint until a page shorter than the page size is returned.
+
+        :param fetch_page: A function fetching the entries of a page given its number.
+        :param page_size: Number of entries of a full page.
+        :return: A generator of lists of entries.
+        """
+        page = 1
+        next_page_future = None
+        try:
+            entries = fetch_page(page)
+            while True:
+                is_last_page = len(entries) < page_size
+                if self.prefetch_executor is not None and not is_last_page:
+                    next_page_future = self.prefetch_executor.submit(fetch_page, page + 1)
+                if entries:
+                    yield entries
+                if is_last_page:
+                    return
+                page += 1
+                entries = next_page_future.result() if next_page_future is not None else fetch_page(page)
+                next_page_future = None
+        finally:
+            # The consumer stopped early, the prefetched page is not needed anymore
+            if next_page_future is not None:
+                next_page_future.cancel()
 
     def fetch_historical_volume(self, base_coin_id, target_vs_currency):
         """
@@ -77,24 +228,29 @@ class CoingeckoAPI:
         :param target_vs_currency: The currency against which the volume is measured.
         :return: A JSON object containing historical volume data.
         """
-        return self.http_rate_limiter.call_api(lambda: self._fetch_historical_volume(base_coin_id, target_vs_currency), \
-                                               namespace="coingecko_fetch_historical_volume").json()
-    
-    def _fetch_historical_volume(self, base_coin_id, target_vs_currency):
+        fetch_historical_volume_url = self.base_url + str.format(FETCH_HISTORICAL_VOLUME_ROUTE,
+                                                 base_coin=base_coin_id,
+                                                 target_coin=target_vs_currency,
+                                                 lookback_days=HISTORICAL_VOLUME_DEFAULT_LOOKBACK_DAYS)
+        return self._call_api(fetch_historical_volume_url, namespace="coingecko_fetch_historical_volume").json()
+
+    def fetch_historical_volume_range(self, base_coin_id, target_vs_currency, from_timestamp, to_timestamp):
         """
-        Internal method to make the raw API request for fetching historical volume data.
+        Fetch historical volume data for a given coin pair between two points in time.
 
         :param base_coin_id: The CoinGecko ID of the base coin.
         :param target_vs_currency: The currency against which the volume is measured.
-        :return: A Response object from the CoinGecko API.
+        :param from_timestamp: Start of the range, as a unix timestamp in seconds.
+        :param to_timestamp: End of the range, as a unix timestamp in seconds.
+        :return: A JSON object containing historical volume data.
         """
-        fetch_historical_volume_url = str.format(FETCH_HISTORICAL_VOLUME_ROUTE, 
-                                                 base_coin=base_coin_id,
-                                                 target_coin=target_vs_currency,
-                                                 lookback_days=HISTORICAL_VOLUME_DEFAULT_LOOKBACK_DAYS)
-        response = requests.get(fetch_historical_volume_url)
-        return response
-    
+        fetch_historical_volume_range_url = self.base_url + str.format(FETCH_HISTORICAL_VOLUME_RANGE_ROUTE,
+                                                       base_coin=base_coin_id,
+                                                       target_coin=target_vs_currency,
+                                                       from_timestamp=int(from_timestamp),
+                                                       to_timestamp=int(to_timestamp))
+        return self._call_api(fetch_historical_volume_range_url, namespace="coingecko_fetch_historical_volume_range").json()
+
     def fetch_exchange_volume_chart(self, exchange_id, days):
         """
         Fetch the trade volume chart for a specific exchange over a specified number of days.
@@ -103,17 +259,54 @@ class CoingeckoAPI:
         :param days: Number of days for which to fetch the volume chart.
         :return: A JSON object containing volume chart data.
         """
-        return self.http_rate_limiter.call_api(lambda: self._fetch_exchange_volume_chart(exchange_id, days), \
-                                               namespace="coingecko_fetch_exchange_volume_chart").json()
-    
-    def _fetch_exchange_volume_chart(self, exchange_id, days=30):
+        url = self.base_url + str.format(FETCH_EXCHANGE_VOLUME_BY_ID_ROUTE, exchange_id=exchange_id, days=days)
+        self.logger.info(f"Fetching exchange volume chart from: {url}")  # Debug log for the API URL
+        return self._call_api(url, namespace="coingecko_fetch_exchange_volume_chart").json()
+
+    def _call_api(self, url, namespace, stream=False):
         """
-        Internal method to make the raw API request for fetching an exchange's volume chart.
+        Serve a GET request from the response cache while it is fresh, otherwise call the API with retries.
 
-        :param exchange_id: The ID of the exchange.
-        :param days: Number of days for which to fetch the volume chart (default: 30).
+        :param url: The URL to request.
+        :param namespace: The endpoint namespace, used for logging and to pick the cache TTL.
+        :param stream: If the response body is left unread, to be consumed incrementally by the caller.
+        :return: A Response object from the CoinGecko API or the response cache.
+        """
+        if self.response_cache is not None:
+            cached_entry = self.response_cache.get_fresh(url, CACHE_TTL_SECONDS_BY_NAMESPACE[namespace])
+            if cached_entry is not None:
+                self.logger.info(f"[{namespace}] Serving response from cache")
+                return cached_entry.to_response()
+        return self.http_rate_limiter.call_api(lambda: self._get(url, stream), namespace=namespace)
+
+    def _get(self, url, stream=False):
+        """
+        Perform a GET request through the pooled session.
+        When a stale cached entry exists the request is conditional, and a 304 Not Modified is served from the cache.
+
+        :param url: The URL to request.
+        :param stream: If the response body is left unread. Streamed responses are not stored here, the caller
+                       stores them in the cache while reading their body.
         :return: A Response object from the CoinGecko API.
         """
-        url = str.format(FETCH_EXCHANGE_VOLUME_BY_ID_ROUTE, exchange_id=exchange_id, days=days)
-        self.logger.info(f"Fetching exchange volume chart from: {url}")  # Debug log for the API URL
-        return requests.get(url)
+        cached_entry = self.response_cache.get(url) if self.response_cache is not None else None
+        request_headers = cached_entry.conditional_headers() if cached_entry is not None else None
+        request_options = {"stream": True} if stream else {}
+        response = self.session.get(url, headers=request_headers or None, timeout=self.timeout, **request_options)
+
+        if self.response_cache is None:
+            return response
+        if response.status_code == 304 and cached_entry is not None:
+            self.logger.info(f"Cached response revalidated for: {url}")
+            return self.response_cache.refresh(cached_entry).to_response()
+        if response.status_code == 200 and not stream:
+            self.response_cache.put(url, response)
+        return response
+
+    def close(self):
+        """
+        Close the pooled connections and the prefetch threads.
+        """
+        if self.prefetch_executor is not None:
+            self.prefetch_executor.shutdown(wait=False, cancel_futures=True)
+        self.session.close()
@@ -0,0 +1,265 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import logging
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+
+CACHE_METADATA_SUFFIX = ".json"
+CACHE_BODY_SUFFIX = ".body"
+
+class HTTPResponseCacheEntry:
+    '''
+        A cached response body with the validators needed to revalidate it.
+    '''
+    def __init__(self, url, body, stored_at, etag=None, last_modified=None, content_type=None):
+        self.url = url
+        self.body = body
+        self.stored_at = stored_at
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_type = content_type
+
+    def conditional_headers(self):
+        """
+        Build the headers for a conditional request revalidating this entry.
+
+        :return: A dict with If-None-Match / If-Modified-Since, empty if the server sent no validators.
+        """
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+    def to_response(self):
+        """
+        Build a successful requests Response serving this entry.
+
+        :return: A requests.Response with status 200 and the cached body.
+        """
+        response = requests.Response()
+        response.status_code = 200
+        response.url = self.url
+        response._content = self.body
+        response._content_consumed = True  # Served from memory, like a response whose body was read
+        response.headers = CaseInsensitiveDict({"Content-Type": self.content_type or "application/json"})
+        if self.etag:
+            response.headers["ETag"] = self.etag
+        if self.last_modified:
+            response.headers["Last-Modified"] = self.last_modified
+        return response
+
+class HTTPResponseCache:
+    '''
+        Persistent on-disk cache of HTTP responses, keyed by route and query parameters.
+        Each entry is stored as a metadata file plus a body file named after the key hash.
+        The total size of the cache is bounded, least recently used entries are evicted first.
+    '''
+    def __init__(self, cache_dir, max_size_bytes, clock=time.time):
+        """
+        Initialize the cache, indexing the entries already stored in the cache directory.
+
+        :param cache_dir: Directory where the entries are stored.
+        :param max_size_bytes: Maximum total size of the stored entries.
+        :param clock: Wall clock returning seconds, injectable for tests.
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        os.makedirs(cache_dir, exist_ok=True)
+        self.entries_size = {}
+        self.entries_last_access = {}
+        self._index_entries()
+
+    @staticmethod
+    def cache_key(url):
+        """
+        Build the cache key of a URL. Query parameters are sorted so their order does not matter.
+
+        :param url: The requested URL.
+        :return: A hex digest identifying the route and parameters.
+        """
+        parts = urlsplit(url)
+        query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+        normalized_url = urlunsplit((parts.scheme, parts.netloc, parts.path, query, ""))
+        return hashlib.sha256(normalized_url.encode("utf-8")).hexdigest()
+
+    def get(self, url):
+        """
+        Read the entry cached for a URL, fresh or not.
+
+        :param url: The requested URL.
+        :return: An HTTPResponseCacheEntry, or None if the URL is not cached.
+        """
+        key = self.cache_key(url)
+        with self.lock:
+            if key not in self.entries_size:
+                return None
+            try:
+                with open(self._metadata_path(key), "r") as f:
+                    metadata = json.load(f)
+                with open(self._body_path(key), "rb") as f:
+                    body = f.read()
+            except (OSError, ValueError) as e:
+                self.logger.error(f"Dropping unreadable cache entry for {url}: {e}")
+                self._remove_entry(key)
+                return None
+            self._touch(key)
+        return HTTPResponseCacheEntry(url, body, metadata["stored_at"], metadata.get("etag"),
+                                      metadata.get("last_modified"), metadata.get("content_type"))
+
+    def get_fresh(self, url, ttl_seconds):
+        """
+        Read the entry cached for a URL if it is younger than the TTL.
+
+        :param url: The requested URL.
+        :param ttl_seconds: Maximum age of the entry.
+        :return: An HTTPResponseCacheEntry, or None if the URL is not cached or the entry expired.
+        """
+        entry = self.get(url)
+        if entry is None or self.clock() - entry.stored_at > ttl_seconds:
+            return None
+        return entry
+
+    def put(self, url, response):
+        """
+        Store a successful response.
+
+        :param url: The requested URL.
+        :param response: The requests Response to store.
+        :return: The stored HTTPResponseCacheEntry.
+        """
+        entry = HTTPResponseCacheEntry(url, response.content, self.clock(),
+                                       etag=response.headers.get("ETag"),
+                                       last_modified=response.headers.get("Last-Modified"),
+                                       content_type=response.headers.get("Content-Type"))
+        self._write(entry)
+        return entry
+
+    def put_chunks(self, url, response, chunks):
+        """
+        Store a successful response while its body is read in chunks by the caller.
+        The chunks are written to disk as they pass through instead of being held in memory, and the entry is
+        only stored once every chunk was read, so a body read partially is never cached.
+
+        :param url: The requested URL.
+        :param response: The requests Response whose body is read, for its headers.
+        :param chunks: Iterable of the bytes chunks of the response body.
+        :return: A generator of the same chunks.
+        """
+        key = self.cache_key(url)
+        temp_body_path = f"{self._body_path(key)}.{threading.get_ident()}.tmp"
+        body_size = 0
+        try:
+            with open(temp_body_path, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    body_size += len(chunk)
+                    yield chunk
+            metadata_bytes = json.dumps({
+                "url": url,
+                "stored_at": self.clock(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "content_type": response.headers.get("Content-Type"),
+            }).encode("utf-8")
+            with self.lock:
+                os.replace(temp_body_path, self._body_path(key))
+                self._atomic_write(self._metadata_path(key), metadata_bytes)
+                self.entries_size[key] = body_size + len(metadata_bytes)
+                self._touch(key)
+                self._evict()
+        finally:
+            if os.path.exists(temp_body_path):
+                os.remove(temp_body_path)
+
+    def refresh(self, entry):
+        """
+        Mark an entry as fresh again, after the server confirmed it did not change (304 Not Modified).
+
+        :param entry: The revalidated HTTPResponseCacheEntry.
+        :return: The refreshed entry.
+        """
+        entry.stored_at = self.clock()
+        self._write(entry)
+        return entry
+
+    def _write(self, entry):
+        key = self.cache_key(entry.url)
+        metadata = {
+            "url": entry.url,
+            "stored_at": entry.stored_at,
+            "etag": entry.etag,
+            "last_modified": entry.last_modified,
+            "content_type": entry.content_type,
+        }
+        metadata_bytes = json.dumps(metadata).encode("utf-8")
+        with self.lock:
+            # Write to temporary files first so a crash never leaves a truncated entry behind
+            self._atomic_write(self._body_path(key), entry.body)
+            self._atomic_write(self._metadata_path(key), metadata_bytes)
+            self.entries_size[key] = len(entry.body) + len(metadata_bytes)
+            self._touch(key)
+            self._evict()
+
+    def _evict(self):
+        total_size = sum(self.entries_size.values())
+        if total_size <= self.max_size_bytes:
+            return
+        for key in sorted(self.entries_last_access, key=self.entries_last_access.get):
+            if total_size <= self.max_size_bytes:
+                break
+            total_size -= self.entries_size[key]
+            self._remove_entry(key)
+            self.logger.debug(f"Evicted cache entry {key}")
+
+    def _index_entries(self):
+        for file_name in os.listdir(self.cache_dir):
+            if not file_name.endswith(CACHE_METADATA_SUFFIX):
+                continue
+            key = file_name[:-len(CACHE_METADATA_SUFFIX)]
+            try:
+                metadata_stat = os.stat(self._metadata_path(key))
+                body_stat = os.stat(self._body_path(key))
+            except OSError:
+                continue
+            self.entries_size[key] = metadata_stat.st_size + body_stat.st_size
+            self.entries_last_access[key] = metadata_stat.st_mtime
+        with self.lock:
+            self._evict()
+
+    def _touch(self, key):
+        now = self.clock()
+        self.entries_last_access[key] = now
+        try:
+            os.utime(self._metadata_path(key), (now, now))
+        except OSError:
+            pass
+
+    def _remove_entry(self, key):
+        self.entries_size.pop(key, None)
+        self.entries_last_access.pop(key, None)
+        for path in (self._metadata_path(key), self._body_path(key)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _atomic_write(self, path, data):
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def _metadata_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_METADATA_SUFFIX)
+
+    def _body_path(self, key):
+        return os.path.join(self.cache_dir, key + CACHE_BODY_SUFFIX)
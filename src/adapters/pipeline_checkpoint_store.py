@@ -0,0 +1,102 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+
+# Stages of the analyzer checkpointing their completed units of work
+EXCHANGE_SHARED_MARKETS_CHECKPOINT_STAGE = "exchange_shared_markets"  # Unit: exchange id
+PAIR_HISTORICAL_VOLUME_CHECKPOINT_STAGE = "pair_historical_volume"  # Unit: coin id/vs currency
+EXCHANGE_VOLUME_CHART_CHECKPOINT_STAGE = "exchange_volume_chart"  # Unit: exchange id
+
+class PipelineCheckpointStore:
+    '''
+        Durable store of the units of work completed by a pipeline run, keyed by (run id, stage, unit).
+        A rerun with the same run id loads the completed units instead of fetching them again,
+        so a run that died halfway resumes where it stopped.
+        Backed by a SQLite database, every unit is committed as soon as it is saved.
+    '''
+    def __init__(self, db_path, run_id, clock=time.time):
+        """
+        Initialize the store, creating the database if needed.
+
+        :param db_path: Path of the SQLite database file.
+        :param run_id: Id of the current run, units saved by other runs are never loaded.
+        :param clock: Wall clock returning seconds, injectable for tests.
+        """
+        self.db_path = db_path
+        self.run_id = run_id
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Stages run on several threads, the lock serializes the access to the shared connection
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoints ("
+                "run_id TEXT NOT NULL, stage TEXT NOT NULL, unit TEXT NOT NULL, "
+                "payload TEXT NOT NULL, saved_at REAL NOT NULL, "
+                "PRIMARY KEY (run_id, stage, unit))")
+            self.connection.commit()
+
+    def load(self, stage, unit):
+        """
+        Load a completed unit of the current run.
+
+        :param stage: The stage of the unit.
+        :param unit: The unit key within the stage, e.g. an exchange id.
+        :return: The saved payload, or None if the unit was not completed.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT payload FROM checkpoints WHERE run_id = ? AND stage = ? AND unit = ?",
+                (self.run_id, stage, unit)).fetchone()
+        if row is None:
+            return None
+        self.logger.debug(f"[{self.run_id}] Resuming {stage}/{unit} from checkpoint")
+        return json.loads(row[0])
+
+    def save(self, stage, unit, payload):
+        """
+        Save a completed unit of the current run.
+
+        :param stage: The stage of the unit.
+        :param unit: The unit key within the stage, e.g. an exchange id.
+        :param payload: JSON serializable result of the unit.
+        """
+        payload_json = json.dumps(payload)
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoints (run_id, stage, unit, payload, saved_at) VALUES (?, ?, ?, ?, ?)",
+                (self.run_id, stage, unit, payload_json, self.clock()))
+            self.connection.commit()
+
+    def completed_units_count(self, stage=None):
+        """
+        :param stage: Optional stage to count the units of, every stage if not set.
+        :return: Number of units completed by the current run.
+        """
+        query = "SELECT COUNT(*) FROM checkpoints WHERE run_id = ?"
+        params = (self.run_id,)
+        if stage is not None:
+            query += " AND stage = ?"
+            params += (stage,)
+        with self.lock:
+            return self.connection.execute(query, params).fetchone()[0]
+
+    def clear_run(self):
+        """
+        Delete the checkpoints of the current run, once its outputs are exported.
+        """
+        with self.lock:
+            deleted_count = self.connection.execute("DELETE FROM checkpoints WHERE run_id = ?", (self.run_id,)).rowcount
+            self.connection.commit()
+        self.logger.info(f"[{self.run_id}] Cleared {deleted_count} checkpoints")
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
@@ -1,11 +1,29 @@
 import pandas as pd
-import os
-import logging 
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from src.constants.constants import S3_MAX_CONCURRENT_UPLOADS_DEFAULT
 
 class S3Handler:
-    def __init__(self, s3_client, bucket_name):
+    def __init__(self, s3_client, bucket_name, transfer_config=None,
+                 max_concurrent_uploads=S3_MAX_CONCURRENT_UPLOADS_DEFAULT):
+        """
+        Initialize the S3Handler.
+
+        :param s3_client: The boto3 S3 client.
+        :param bucket_name: The bucket the objects are read from and written to.
+        :param transfer_config: boto3 TransferConfig with the multipart settings used for in-memory uploads,
+                                boto3 defaults when not set.
+        :param max_concurrent_uploads: Maximum number of objects uploaded at the same time by upload_many.
+        """
         self.s3_client = s3_client
         self.bucket_name = bucket_name
+        if transfer_config is None:
+            # boto3 is only imported by the runs uploading to S3
+            from boto3.s3.transfer import TransferConfig
+            transfer_config = TransferConfig()
+        self.transfer_config = transfer_config
+        self.max_concurrent_uploads = max_concurrent_uploads
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def upload_file(self, file_path, s3_key):
@@ -18,15 +36,42 @@ class S3Handler:
         self.s3_client.download_file(self.bucket_name, s3_key, file_path)
         self.logger.info(f"Downloaded s3://{self.bucket_name}/{s3_key} to {file_path}")
 
+    def upload_bytes(self, data, s3_key):
+        """
+        Upload an in-memory object, split in multipart chunks when above the transfer config threshold.
+
+        :param data: The object content.
+        :param s3_key: The destination key.
+        """
+        self.logger.info(f"Uploading... {len(data)} bytes to s3://{self.bucket_name}/{s3_key}")
+        self.s3_client.upload_fileobj(io.BytesIO(data), self.bucket_name, s3_key, Config=self.transfer_config)
+        self.logger.info(f"Uploaded {len(data)} bytes to s3://{self.bucket_name}/{s3_key}")
+
+    def upload_many(self, objects):
+        """
+        Upload in-memory objects concurrently, so the total time is bound by the slowest upload.
+        Every upload is attempted even if some of them fail.
+
+        :param objects: A dict of destination key -> object content.
+        :raises Exception: The first upload error, once all the uploads completed.
+        """
+        if not objects:
+            return
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrent_uploads, len(objects)),
+                                thread_name_prefix=self.__class__.__name__) as executor:
+            futures = {s3_key: executor.submit(self.upload_bytes, data, s3_key) for s3_key, data in objects.items()}
+        errors = {s3_key: future.exception() for s3_key, future in futures.items() if future.exception()}
+        for s3_key, error in errors.items():
+            self.logger.error(f"Failed to upload s3://{self.bucket_name}/{s3_key}: {error}")
+        if errors:
+            raise next(iter(errors.values()))
+
     def upload_dataframe(self, df, s3_key):
-        temp_file = "temp.csv"
-        df.to_csv(temp_file, index=False)
-        self.upload_file(temp_file, s3_key)
-        os.remove(temp_file)
+        self.upload_bytes(df.to_csv(index=False).encode("utf-8"), s3_key)
 
     def download_dataframe(self, s3_key):
-        temp_file = "temp.csv"
-        self.download_file(s3_key, temp_file)
-        df = pd.read_csv(temp_file)
-        os.remove(temp_file)
-        return df
\ No newline at end of file
+        self.logger.info(f"Downloading... s3://{self.bucket_name}/{s3_key}")
+        buffer = io.BytesIO()
+        self.s3_client.download_fileobj(self.bucket_name, s3_key, buffer)
+        buffer.seek(0)
+        return pd.read_csv(buffer)
@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+import time
+import logging
+from datetime import datetime, timezone
+import pandas as pd
+from src.constants.constants import HISTORICAL_VOLUME_DATE_FORMAT
+
+MARKETS_HISTORICAL_VOLUME_POINTS_TABLE = "markets_historical_volume_points"
+EXCHANGES_HISTORICAL_TRADE_VOLUME_TABLE = "exchanges_historical_trade_volume"
+MILLISECONDS_PER_DAY = 24 * 60 * 60 * 1000
+
+class VolumeTimeSeriesStore:
+    '''
+        Embedded store of the volume series of the markets and the exchanges, kept across runs.
+        The markets history is stored as the (timestamp_ms, volume) points fetched from CoinGecko, keyed by
+        (market_id, timestamp_ms): the analyzer only fetches the points after the high water mark of a market,
+        and the daily volume of the markets is read from the points, a day taking the value of its last point as
+        CoinGecko volumes are rolling 24h volumes. The exchanges trade volume is keyed by (exchange_id, date).
+        Tables are clustered on their key and indexed on the time, so reading a range of a series or of every
+        series only touches the rows in the range, whatever the size of the history.
+        The state lives in the database only, several processes can share it.
+        Backed by a SQLite database, every write is committed at once.
+    '''
+    def __init__(self, db_path, clock=time.time):
+        """
+        Initialize the store, creating the database if needed.
+
+        :param db_path: Path of the SQLite database file.
+        :param clock: Wall clock returning seconds, injectable for tests.
+        """
+        self.db_path = db_path
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # The analyzer and the export run on stage threads, the lock serializes the access to the shared connection
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {MARKETS_HISTORICAL_VOLUME_POINTS_TABLE} ("
+                "market_id TEXT NOT NULL, timestamp_ms INTEGER NOT NULL, volume_usd REAL, "
+                "PRIMARY KEY (market_id, timestamp_ms)) WITHOUT ROWID")
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {MARKETS_HISTORICAL_VOLUME_POINTS_TABLE}_timestamp_ms "
+                f"ON {MARKETS_HISTORICAL_VOLUME_POINTS_TABLE} (timestamp_ms)")
+            self.connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {EXCHANGES_HISTORICAL_TRADE_VOLUME_TABLE} ("
+                "exchange_id TEXT NOT NULL, date TEXT NOT NULL, volume_btc REAL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (exchange_id, date)) WITHOUT ROWID")
+            self.connection.execute(
+                f"CREATE INDEX IF NOT EXISTS {EXCHANGES_HISTORICAL_TRADE_VOLUME_TABLE}_date "
+                f"ON {EXCHANGES_HISTORICAL_TRADE_VOLUME_TABLE} (date)")
+            self.connection.commit()
+
+    def high_water_mark(self, market_id):
+        """
+        Get the latest stored timestamp of a market.
+
+        :param market_id: The market id, e.g. BTC_USDT.
+        :return: The latest timestamp in epoch milliseconds, or None if nothing is stored for the market.
+        """
+        with self.lock:
+            return self.connection.execute(
+                f"SELECT MAX(timestamp_ms) FROM {MARKETS_HISTORICAL_VOLUME_POINTS_TABLE} WHERE market_id = ?",
+                (market_id,)).fetchone()[0]
+
+    def append(self, market_id, points):
+        """
+        Append the points newer than the high water mark of a market.
+
+        :param market_id: The market id, e.g. BTC_USDT.
+        :param points: [timestamp_ms, volume] points as returned by CoinGecko, in any order.
+        :return: Number of points appended.
+        """
+        with self.lock:
+            high_water_mark = self.connection.execute(
+                f"SELECT MAX(timestamp_ms) FROM {MARKETS_HISTORICAL_VOLUME_POINTS_TABLE} WHERE market_id = ?",
+                (market_id,)).fetchone()[0]
+            new_points = sorted((market_id, int(timestamp), float(volume)) for timestamp, volume in points
+                                if high_water_mark is None or timestamp > high_water_mark)
+            if not new_points:
+                return 0
+            # A point written meanwhile by another process sharing the database is kept
+            appended_points_count = self.connection.executemany(
+                f"INSERT OR IGNORE INTO {MARKETS_HISTORICAL_VOLUME_POINTS_TABLE} VALUES (?, ?, ?)", new_points).rowcount
+            self.connection.commit()
+        self.logger.debug(f"Appended {appended_points_count} points to {market_id}")
+        return appended_points_count
+
+    def load(self, market_id, since_timestamp_ms=None):
+        """
+        Read the stored points of a market.
+
+        :param market_id: The market id, e.g. BTC_USDT.
+        :param since_timestamp_ms: Optional lower bound (inclusive) of the points to read.
+        :return: A list of [timestamp_ms, volume] points in ascending timestamp order.
+        """
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT timestamp_ms, volume_usd FROM {MARKETS_HISTORICAL_VOLUME_POINTS_TABLE} "
+                "WHERE market_id = ? AND timestamp_ms >= ? ORDER BY timestamp_ms",
+                (market_id, since_timestamp_ms or 0)).fetchall()
+        return [list(row) for row in rows]
+
+    def load_markets_historical_volume(self, market_ids=None, since_date=None, until_date=None):
+        """
+        Read a date range of the daily volume of the markets, a day taking the value of its last point.
+
+        :param market_ids: Optional market ids to read, every market if not set.
+        :param since_date: Optional first date (inclusive) to read, as YYYY-MM-DD.
+        :param until_date: Optional last date (inclusive) to read, as YYYY-MM-DD.
+        :return: A DataFrame with market_id, date and volume_usd columns, ordered by market and date.
+        """
+        conditions, parameters = self._series_conditions("market_id", market_ids)
+        if since_date is not None:
+            conditions.append("timestamp_ms >= ?")
+            parameters.append(self._epoch_ms(since_date))
+        if until_date is not None:
+            conditions.append("timestamp_ms < ?")
+            parameters.append(self._epoch_ms(until_date) + MILLISECONDS_PER_DAY)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        # With MAX, SQLite reads the other columns from the row holding the maximum, i.e. the last point of the day
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT market_id, date(timestamp_ms / 1000, 'unixepoch') AS date, volume_usd, MAX(timestamp_ms) "
+                f"FROM {MARKETS_HISTORICAL_VOLUME_POINTS_TABLE} {where}"
+                "GROUP BY market_id, date ORDER BY market_id, date",
+                parameters).fetchall()
+        return pd.DataFrame([row[:3] for row in rows], columns=["market_id", "date", "volume_usd"])
+
+    def upsert_exchanges_historical_trade_volume(self, exchanges_historical_trade_volume_df: pd.DataFrame):
+        """
+        Write the trade volume of the exchanges. A day written again, by a rerun or a later daemon cycle,
+        is replaced by the latest value.
+
+        :param exchanges_historical_trade_volume_df: A DataFrame with exchange_id, date and volume_btc columns.
+        :return: Number of rows written.
+        """
+        # Empty tables may not even have their columns
+        if exchanges_historical_trade_volume_df.empty:
+            return 0
+        updated_at = self.clock()
+        # One row per key, the last row of a day wins
+        df = exchanges_historical_trade_volume_df.drop_duplicates(subset=["exchange_id", "date"], keep="last")
+        rows = [(exchange_id, date, None if pd.isna(volume) else float(volume), updated_at)
+                for exchange_id, date, volume in df[["exchange_id", "date", "volume_btc"]].itertuples(index=False, name=None)]
+        with self.lock:
+            self.connection.executemany(
+                f"INSERT INTO {EXCHANGES_HISTORICAL_TRADE_VOLUME_TABLE} (exchange_id, date, volume_btc, updated_at) "
+                "VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (exchange_id, date) DO UPDATE SET "
+                "volume_btc = excluded.volume_btc, updated_at = excluded.updated_at",
+                rows)
+            self.connection.commit()
+        self.logger.info(f"Upserted {len(rows)} rows into {EXCHANGES_HISTORICAL_TRADE_VOLUME_TABLE} at {self.db_path}")
+        return len(rows)
+
+    def load_exchanges_historical_trade_volume(self, exchange_ids=None, since_date=None, until_date=None):
+        """
+        Read a date range of the trade volume of the exchanges.
+
+        :param exchange_ids: Optional exchange ids to read, every exchange if not set.
+        :param since_date: Optional first date (inclusive) to read, as YYYY-MM-DD.
+        :param until_date: Optional last date (inclusive) to read, as YYYY-MM-DD.
+        :return: A DataFrame with exchange_id, date and volume_btc columns, ordered by exchange and date.
+        """
+        conditions, parameters = self._series_conditions("exchange_id", exchange_ids)
+        if since_date is not None:
+            conditions.append("date >= ?")
+            parameters.append(since_date)
+        if until_date is not None:
+            conditions.append("date <= ?")
+            parameters.append(until_date)
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        with self.lock:
+            rows = self.connection.execute(
+                f"SELECT exchange_id, date, volume_btc FROM {EXCHANGES_HISTORICAL_TRADE_VOLUME_TABLE} {where}"
+                "ORDER BY exchange_id, date",
+                parameters).fetchall()
+        return pd.DataFrame(rows, columns=["exchange_id", "date", "volume_btc"])
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    @staticmethod
+    def _series_conditions(id_column, series_ids):
+        if series_ids is None:
+            return [], []
+        series_ids = list(series_ids)
+        return [f"{id_column} IN ({', '.join('?' * len(series_ids))})"], series_ids
+
+    @staticmethod
+    def _epoch_ms(date):
+        return int(datetime.strptime(date, HISTORICAL_VOLUME_DATE_FORMAT).replace(tzinfo=timezone.utc).timestamp() * 1000)
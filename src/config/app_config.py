@@ -1,4 +1,13 @@
 import json
+from src.constants.constants import MAX_CONCURRENT_REQUESTS_DEFAULT, HTTP_POOL_SIZE_DEFAULT, \
+    HTTP_CONNECT_TIMEOUT_SECONDS_DEFAULT, HTTP_READ_TIMEOUT_SECONDS_DEFAULT, RATE_LIMITER_CALLS_PER_MINUTE_DEFAULT, \
+    RATE_LIMITER_BURST_DEFAULT, HTTP_CACHE_DIR_DEFAULT, HTTP_CACHE_MAX_SIZE_MB_DEFAULT, \
+    PARQUET_COMPRESSION_DEFAULT, S3_MAX_CONCURRENT_UPLOADS_DEFAULT, S3_MULTIPART_CHUNKSIZE_MB_DEFAULT, \
+    COINGECKO_BASE_URL_DEFAULT, METRICS_DIR_DEFAULT, RUN_ID_DEFAULT, CHECKPOINT_DB_PATH_DEFAULT, \
+    EXCHANGE_MARKET_INDEX_PATH_DEFAULT, EXCHANGE_MARKET_INDEX_TTL_HOURS_DEFAULT, \
+    DAEMON_INTERVAL_MINUTES_DEFAULT, DAEMON_CONTROL_HOST_DEFAULT, DAEMON_CONTROL_PORT_DEFAULT, \
+    SHARD_DEFAULT, SHARDS_DIR_DEFAULT, MERGE_SHARDS_DEFAULT, LOCAL_SHARDS_DEFAULT, TIME_SERIES_DB_PATH_DEFAULT, \
+    ROLLING_ANALYTICS_STATE_PATH_DEFAULT
 
 class AppConfig:
     """
@@ -9,10 +18,68 @@ class AppConfig:
                  log_level: str,
                  exchanges_with_similar_trades_to_analyze: int,
                  exchanges_to_analyze_limit: int,
-                 write_to_s3: bool):
+                 write_to_s3: bool,
+                 max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS_DEFAULT,
+                 http_pool_size: int = HTTP_POOL_SIZE_DEFAULT,
+                 http_connect_timeout_seconds: float = HTTP_CONNECT_TIMEOUT_SECONDS_DEFAULT,
+                 http_read_timeout_seconds: float = HTTP_READ_TIMEOUT_SECONDS_DEFAULT,
+                 rate_limiter_calls_per_minute: float = RATE_LIMITER_CALLS_PER_MINUTE_DEFAULT,
+                 rate_limiter_burst: int = RATE_LIMITER_BURST_DEFAULT,
+                 http_cache_dir: str = HTTP_CACHE_DIR_DEFAULT,
+                 http_cache_max_size_mb: int = HTTP_CACHE_MAX_SIZE_MB_DEFAULT,
+                 prefetch_next_page: bool = False,
+                 parquet_compression: str = PARQUET_COMPRESSION_DEFAULT,
+                 s3_max_concurrent_uploads: int = S3_MAX_CONCURRENT_UPLOADS_DEFAULT,
+                 s3_multipart_chunksize_mb: int = S3_MULTIPART_CHUNKSIZE_MB_DEFAULT,
+                 coingecko_base_url: str = COINGECKO_BASE_URL_DEFAULT,
+                 metrics_dir: str = METRICS_DIR_DEFAULT,
+                 run_id: str = RUN_ID_DEFAULT,
+                 checkpoint_db_path: str = CHECKPOINT_DB_PATH_DEFAULT,
+                 exchange_market_index_path: str = EXCHANGE_MARKET_INDEX_PATH_DEFAULT,
+                 exchange_market_index_ttl_hours: float = EXCHANGE_MARKET_INDEX_TTL_HOURS_DEFAULT,
+                 stream_tickers: bool = False,
+                 daemon_interval_minutes: float = DAEMON_INTERVAL_MINUTES_DEFAULT,
+                 daemon_control_host: str = DAEMON_CONTROL_HOST_DEFAULT,
+                 daemon_control_port: int = DAEMON_CONTROL_PORT_DEFAULT,
+                 shard: str = SHARD_DEFAULT,
+                 shards_dir: str = SHARDS_DIR_DEFAULT,
+                 merge_shards: int = MERGE_SHARDS_DEFAULT,
+                 local_shards: int = LOCAL_SHARDS_DEFAULT,
+                 adaptive_concurrency: bool = False,
+                 time_series_db_path: str = TIME_SERIES_DB_PATH_DEFAULT,
+                 rolling_analytics_state_path: str = ROLLING_ANALYTICS_STATE_PATH_DEFAULT):
         self.rate_limiter_max_retries = rate_limiter_max_retries
         self.historical_data_lookback_days = historical_data_lookback_days
         self.log_level = log_level
         self.exchanges_with_similar_trades_to_analyze = exchanges_with_similar_trades_to_analyze
         self.exchanges_to_analyze_limit = exchanges_to_analyze_limit
         self.write_to_s3 = write_to_s3
+        self.max_concurrent_requests = max_concurrent_requests
+        self.http_pool_size = http_pool_size
+        self.http_connect_timeout_seconds = http_connect_timeout_seconds
+        self.http_read_timeout_seconds = http_read_timeout_seconds
+        self.rate_limiter_calls_per_minute = rate_limiter_calls_per_minute
+        self.rate_limiter_burst = rate_limiter_burst
+        self.http_cache_dir = http_cache_dir
+        self.http_cache_max_size_mb = http_cache_max_size_mb
+        self.prefetch_next_page = prefetch_next_page
+        self.parquet_compression = parquet_compression
+        self.s3_max_concurrent_uploads = s3_max_concurrent_uploads
+        self.s3_multipart_chunksize_mb = s3_multipart_chunksize_mb
+        self.coingecko_base_url = coingecko_base_url
+        self.metrics_dir = metrics_dir
+        self.run_id = run_id
+        self.checkpoint_db_path = checkpoint_db_path
+        self.exchange_market_index_path = exchange_market_index_path
+        self.exchange_market_index_ttl_hours = exchange_market_index_ttl_hours
+        self.stream_tickers = stream_tickers
+        self.daemon_interval_minutes = daemon_interval_minutes
+        self.daemon_control_host = daemon_control_host
+        self.daemon_control_port = daemon_control_port
+        self.shard = shard
+        self.shards_dir = shards_dir
+        self.merge_shards = merge_shards
+        self.local_shards = local_shards
+        self.adaptive_concurrency = adaptive_concurrency
+        self.time_series_db_path = time_series_db_path
+        self.rolling_analytics_state_path = rolling_analytics_state_path
@@ -6,10 +6,39 @@ RATE_LIMITER_MAX_RETRIES_DEFAULT = 5
 EXCHANGES_WITH_SIMILAR_TRADES_TO_ANALYZE_DEFAULT= 3
 EXCHANGES_TO_ANALYZE_DEFAULT_LIMIT = 3
 WRITE_TO_S3_DEFAULT = True
+MAX_CONCURRENT_REQUESTS_DEFAULT = 1  # Sequential, the concurrent analyzer is opt-in
 
 # Analyzer constants
 HISTORICAL_DATA_LOOKBACK_DAYS_DEFAULT = 30
 HISTORICAL_VOLUME_DATE_FORMAT = '%Y-%m-%d'
+HISTORICAL_VOLUME_MIN_RANGE_SECONDS = 2 * 24 * 60 * 60  # CoinGecko returns 5-minutely points for ranges within a day of now, hourly above
+ROLLING_ANALYTICS_STATE_PATH_DEFAULT = ""  # Empty skips the rolling analytics table
+
+# Exchange market index constants
+EXCHANGE_MARKET_INDEX_PATH_DEFAULT = ""  # Empty matches every exchange against live tickers
+EXCHANGE_MARKET_INDEX_TTL_HOURS_DEFAULT = 24
+
+# Checkpoint constants
+RUN_ID_DEFAULT = ""
+CHECKPOINT_DB_PATH_DEFAULT = "./output/state/checkpoints.sqlite"
+
+# Daemon constants
+DAEMON_INTERVAL_MINUTES_DEFAULT = 0  # 0 runs the pipeline once and exits
+DAEMON_CONTROL_HOST_DEFAULT = "127.0.0.1"
+DAEMON_CONTROL_PORT_DEFAULT = 8765
+
+# Sharding constants
+SHARD_DEFAULT = ""  # Empty runs every exchange in a single process
+SHARDS_DIR_DEFAULT = "./output/shards"
+MERGE_SHARDS_DEFAULT = 0
+LOCAL_SHARDS_DEFAULT = 0
+
+# Export constants
+PARQUET_COMPRESSION_DEFAULT = "zstd"
+TIME_SERIES_DB_PATH_DEFAULT = ""  # Empty fetches the whole lookback window of every market
+
+# Metrics constants
+METRICS_DIR_DEFAULT = "./output/metrics"
 
 # Logging constants
 LOGGING_DEFAULT_LEVEL = "info"
@@ -17,5 +46,27 @@ LOGGING_DEFAULT_LEVEL = "info"
 # AWS Required Env vars
 AWS_REQUIRED_CONFIGS = ["S3_ENDPOINT", "AWS_BUCKET", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_REGION"]
 
+# S3 upload constants
+S3_MAX_CONCURRENT_UPLOADS_DEFAULT = 8
+S3_MULTIPART_CHUNKSIZE_MB_DEFAULT = 16
+S3_TRANSFER_MAX_CONCURRENCY = 4  # Parts of a single multipart upload sent in parallel
+
+# HTTP session constants
+COINGECKO_BASE_URL_DEFAULT = "https://api.coingecko.com/api/v3"
+HTTP_POOL_SIZE_DEFAULT = 10
+HTTP_CONNECT_TIMEOUT_SECONDS_DEFAULT = 5
+HTTP_READ_TIMEOUT_SECONDS_DEFAULT = 30
+
+# HTTP response cache constants
+HTTP_CACHE_DIR_DEFAULT = ""  # Empty fetches every response from CoinGecko
+HTTP_CACHE_MAX_SIZE_MB_DEFAULT = 512
+
 # Rate Limiter Constants
-RATE_LIMITER_DEFAULT_WAIT_TIME_SECONDS = 1
\ No newline at end of file
+RATE_LIMITER_DEFAULT_WAIT_TIME_SECONDS = 1
+RATE_LIMITER_CALLS_PER_MINUTE_DEFAULT = 30  # CoinGecko public API sustained limit
+RATE_LIMITER_BURST_DEFAULT = 1
+
+# Adaptive concurrency constants
+ADAPTIVE_CONCURRENCY_INITIAL_LIMIT = 2
+ADAPTIVE_CONCURRENCY_DECREASE_FACTOR = 0.5
+ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE = 2.0  # Smoothed latency over baseline latency ratio cutting the concurrency
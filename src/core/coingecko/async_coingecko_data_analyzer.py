@@ -0,0 +1,118 @@
+from src.core.coingecko.coingecko_data_analyzer import CoingeckoSimilarExchangesDataAnalyzer, ExchangeMarketsScan, \
+    SHARED_MARKETS_COLUMNS
+from src.core.coingecko.coingecko_data_fetcher_limits import CoingeckoDataFetcherLimits
+from src.core.coingecko.reference_market_index import ReferenceMarketIndex
+from src.core.coingecko.exchange_market_index import ExchangeMarketIndex
+from src.core.coingecko.exchange_shard import ExchangeShard
+from src.adapters.async_coingecko_api import AsyncCoingeckoAPI
+from src.adapters.pipeline_checkpoint_store import PipelineCheckpointStore
+from src.utils.record_table import RecordTable
+from typing import TYPE_CHECKING
+import asyncio
+
+if TYPE_CHECKING:  # Optional component, imported by the runs enabling it
+    from src.adapters.volume_time_series_store import VolumeTimeSeriesStore
+
+class AsyncCoingeckoSimilarExchangesDataAnalyzer(CoingeckoSimilarExchangesDataAnalyzer):
+    '''
+        Variant of the CoingeckoSimilarExchangesDataAnalyzer that fetches the markets of
+        several exchanges concurrently through the AsyncCoingeckoAPI.
+        Results are consumed in exchange order, so the output is the same as the serial analyzer's.
+    '''
+    def __init__(self, coingecko_api, async_coingecko_api: AsyncCoingeckoAPI, limits: CoingeckoDataFetcherLimits,
+                 historical_volume_store: "VolumeTimeSeriesStore" = None,
+                 checkpoint_store: PipelineCheckpointStore = None,
+                 exchange_market_index: ExchangeMarketIndex = None,
+                 shard: ExchangeShard = None):
+        super().__init__(coingecko_api, limits, historical_volume_store, checkpoint_store, exchange_market_index, shard)
+        self.async_coingecko_api = async_coingecko_api
+
+    def generate_exchanges_with_similar_trades(self, bitso_markets, on_exchange_matched=None):
+        return asyncio.run(self.generate_exchanges_with_similar_trades_async(bitso_markets, on_exchange_matched))
+
+    async def generate_exchanges_with_similar_trades_async(self, bitso_markets, on_exchange_matched=None):
+        """
+        Find the exchanges sharing markets with the reference markets, fetching their markets concurrently.
+
+        Ticker scans are scheduled for every exchange to lookup and their requests run with bounded concurrency.
+        As soon as the limit of exchanges with similar trades is reached, the outstanding requests are cancelled.
+
+        :param bitso_markets: Reference markets as (base, target) tuples.
+        :param on_exchange_matched: Optional callback called with (similar_exchange, exchange_shared_markets)
+                                    as soon as each similar exchange is found, so later stages can start on it.
+        :return: A tuple (similar_exchanges, shared_markets), the shared markets as a RecordTable.
+        """
+        reference_market_index = ReferenceMarketIndex(bitso_markets)
+        self._log_ticker_filter(reference_market_index)
+        exchanges_to_lookup = [(position, exchange) for position, exchange in enumerate(await self._fetch_exchanges_to_lookup())
+                               if self._is_in_shard(position)]
+        markets_tasks = [asyncio.create_task(self._scan_exchange_markets_async(exchange, reference_market_index))
+                         for _, exchange in exchanges_to_lookup]
+        shared_markets = RecordTable(SHARED_MARKETS_COLUMNS)
+        similar_exchanges = []
+        consumed_tasks_count = 0
+
+        try:
+            # Consume in exchange order so the limit is applied exactly as in the serial path
+            for (position, exchange), markets_task in zip(exchanges_to_lookup, markets_tasks):
+                consumed_tasks_count += 1
+                exchange_shared_markets = await markets_task
+
+                if exchange_shared_markets:
+                    shared_markets.extend(exchange_shared_markets)
+                    similar_exchanges.append(self._to_similar_exchange(exchange, position))
+                    if on_exchange_matched is not None:
+                        on_exchange_matched(similar_exchanges[-1], exchange_shared_markets)
+                    if len(similar_exchanges) >= self.limits.exchanges_with_similar_trades_limit:
+                        self.logger.info("Reached the limit of exchanges with similar trades necessary")
+                        break
+        finally:
+            outstanding_tasks = markets_tasks[consumed_tasks_count:]
+            for task in outstanding_tasks:
+                task.cancel()
+            if outstanding_tasks:
+                self.logger.info(f"Cancelled {len(outstanding_tasks)} outstanding markets requests")
+                await asyncio.gather(*outstanding_tasks, return_exceptions=True)
+
+        return (similar_exchanges, \
+            shared_markets)
+
+    async def _fetch_exchanges_to_lookup(self):
+        """
+        Fetch exchange pages until the limit of exchanges to lookup is reached.
+
+        :return: A list with the exchange entries to lookup, in API order.
+        """
+        exchanges_to_lookup = []
+        exchange_pages = self.async_coingecko_api.iter_exchange_pages()
+        try:
+            async for exchanges in exchange_pages:
+                exchanges_to_lookup.extend(exchanges[:self.limits.exchanges_to_lookup_limit - len(exchanges_to_lookup)])
+                if len(exchanges_to_lookup) >= self.limits.exchanges_to_lookup_limit:
+                    self.logger.info("Reached the limit of exchanges to lookup")
+                    break
+        finally:
+            await exchange_pages.aclose()
+        return exchanges_to_lookup
+
+    async def _scan_exchange_markets_async(self, exchange, reference_market_index: ReferenceMarketIndex):
+        """
+        Async variant of _scan_exchange_markets, only the ticker pages are fetched differently.
+
+        :param exchange: Exchange entry as returned by the CoinGecko exchanges endpoint.
+        :param reference_market_index: Index of the reference markets.
+        :return: A RecordTable of the shared market rows, in ticker order.
+        """
+        exchange_shared_markets = self._load_known_shared_markets(exchange, reference_market_index)
+        if exchange_shared_markets is not None:
+            return exchange_shared_markets
+
+        scan = ExchangeMarketsScan(self, exchange, reference_market_index)
+        ticker_pages = self.async_coingecko_api.iter_ticker_pages(exchange["id"], coin_ids=reference_market_index.base_coin_ids)
+        try:
+            async for tickers in ticker_pages:
+                if scan.add_page(tickers):
+                    break
+        finally:
+            await ticker_pages.aclose()
+        return scan.finish()
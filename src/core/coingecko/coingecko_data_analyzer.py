@@ -1,9 +1,78 @@
 from src.core.coingecko.coingecko_tickers_utils import get_coingecko_id, get_vs_currency
 from src.core.coingecko.coingecko_data_fetcher_limits import CoingeckoDataFetcherLimits
-from src.constants.constants import HISTORICAL_VOLUME_DATE_FORMAT
+from src.core.coingecko.reference_market_index import ReferenceMarketIndex
+from src.core.coingecko.markets_historical_volume_table_builder import MarketsHistoricalVolumeTableBuilder
+from src.core.coingecko.exchange_market_index import ExchangeMarketIndex
+from src.core.coingecko.exchange_shard import ExchangeShard, EXCHANGE_POSITION_KEY
+from src.adapters.coingecko_api import HISTORICAL_VOLUME_DEFAULT_LOOKBACK_DAYS
+from src.adapters.pipeline_checkpoint_store import PipelineCheckpointStore, EXCHANGE_SHARED_MARKETS_CHECKPOINT_STAGE, \
+    PAIR_HISTORICAL_VOLUME_CHECKPOINT_STAGE, EXCHANGE_VOLUME_CHART_CHECKPOINT_STAGE
+from src.constants.constants import HISTORICAL_VOLUME_DATE_FORMAT, HISTORICAL_VOLUME_MIN_RANGE_SECONDS
+from src.utils.record_table import RecordTable
 from datetime import datetime
+from typing import TYPE_CHECKING
+import time
 import logging
 
+if TYPE_CHECKING:  # Optional component, imported by the runs enabling it
+    from src.adapters.volume_time_series_store import VolumeTimeSeriesStore
+
+SHARED_MARKETS_COLUMNS = ["exchange_id", "market_id", "base", "target", "name"]
+EXCHANGES_TRADE_VOLUME_COLUMNS = ["exchange_id", "date", "volume_btc"]
+EXCHANGES_TRADE_VOLUME_FLOAT_COLUMNS = ["volume_btc"]
+
+class ExchangeMarketsScan:
+    '''
+        Scan of the markets of an exchange shared with the reference markets. The analyzers feed it with the
+        ticker pages of the exchange from their own page-fetch loop, sync or async, and the scan matches them,
+        tells when paging can stop, then indexes and checkpoints the result.
+        Paging stops as soon as every reference market was found, also when the exchange is indexed: the index
+        then records a partial scan, which only serves later lookups of markets it lists.
+    '''
+    def __init__(self, analyzer, exchange, reference_market_index: ReferenceMarketIndex):
+        """
+        Start the scan.
+
+        :param analyzer: The CoingeckoSimilarExchangesDataAnalyzer scanning the exchange.
+        :param exchange: Exchange entry as returned by the CoinGecko exchanges endpoint.
+        :param reference_market_index: Index of the reference markets.
+        """
+        self.analyzer = analyzer
+        self.exchange = exchange
+        self.reference_market_index = reference_market_index
+        self.shared_markets = RecordTable(SHARED_MARKETS_COLUMNS)
+        self.scanned_tickers = [] if analyzer.exchange_market_index is not None else None
+        self.is_partial = False
+
+    def add_page(self, tickers):
+        """
+        Match a page of tickers of the exchange.
+
+        :param tickers: A page of ticker entries of the exchange.
+        :return: True if the remaining pages can be skipped.
+        """
+        self.shared_markets.extend(self.analyzer._match_shared_markets(self.exchange, tickers, self.reference_market_index))
+        if self.scanned_tickers is not None:
+            self.scanned_tickers.extend(tickers)
+        self.is_partial = self.analyzer._has_every_reference_market(self.exchange, self.shared_markets,
+                                                                    self.reference_market_index)
+        return self.is_partial
+
+    def finish(self):
+        """
+        Index and checkpoint the scanned exchange.
+        Only complete scans get here: scans cancelled by the async analyzer are neither indexed nor checkpointed.
+
+        :return: A RecordTable of the shared market rows, in ticker order.
+        """
+        if self.scanned_tickers is not None:
+            self.analyzer.exchange_market_index.index_exchange(self.exchange, self.scanned_tickers,
+                                                               coin_ids=self.reference_market_index.base_coin_ids,
+                                                               complete=not self.is_partial)
+        self.analyzer._save_checkpoint(EXCHANGE_SHARED_MARKETS_CHECKPOINT_STAGE, self.exchange["id"],
+                                       self.shared_markets.to_records())
+        return self.shared_markets
+
 class CoingeckoSimilarExchangesDataAnalyzer:
     '''
         Fetches data from Coingecko API as dataframes.
@@ -12,50 +81,51 @@ class CoingeckoSimilarExchangesDataAnalyzer:
         
         }
     '''
-    def __init__(self, coingecko_api, limits: CoingeckoDataFetcherLimits):
+    def __init__(self, coingecko_api, limits: CoingeckoDataFetcherLimits,
+                 historical_volume_store: "VolumeTimeSeriesStore" = None,
+                 checkpoint_store: PipelineCheckpointStore = None,
+                 exchange_market_index: ExchangeMarketIndex = None,
+                 shard: ExchangeShard = None):
         self.coingecko_api = coingecko_api
         self.limits = limits
+        self.historical_volume_store = historical_volume_store  # When set, market histories are fetched incrementally
+        self.checkpoint_store = checkpoint_store  # When set, completed units of work are saved and skipped on reruns
+        self.exchange_market_index = exchange_market_index  # When set, fresh exchanges are matched without fetching their tickers
+        self.shard = shard  # When set, only the exchanges of the shard are looked up
         self.logger = logging.getLogger(self.__class__.__name__)
 
 
-    def generate_exchanges_with_similar_trades(self, bitso_markets):
-        exchanges = self.coingecko_api.fetch_exchanges()
-        shared_markets = []
+    def generate_exchanges_with_similar_trades(self, bitso_markets, on_exchange_matched=None):
+        """
+        Find the exchanges sharing markets with the reference markets.
+        Sharded analyzers only look up the exchanges of their shard, and keep the position of the similar
+        exchanges in the exchanges list so the shards can be merged in the order of an unsharded run.
+
+        :param bitso_markets: Reference markets as (base, target) tuples.
+        :param on_exchange_matched: Optional callback called with (similar_exchange, exchange_shared_markets)
+                                    as soon as each similar exchange is found, so later stages can start on it.
+        :return: A tuple (similar_exchanges, shared_markets), the shared markets as a RecordTable.
+        """
+        reference_market_index = ReferenceMarketIndex(bitso_markets)
+        self._log_ticker_filter(reference_market_index)
+        shared_markets = RecordTable(SHARED_MARKETS_COLUMNS)
         similar_exchanges = []
-        exchanges_lookup_count = 0
 
-        for exchange in exchanges:
-            if exchanges_lookup_count >= self.limits.exchanges_to_lookup_limit:
+        # Exchanges and tickers are streamed page by page, only the pages needed are fetched
+        for position, exchange in enumerate(self.coingecko_api.iter_exchanges()):
+            if position >= self.limits.exchanges_to_lookup_limit:
                 self.logger.info("Reached the limit of exchanges to lookup")
                 break
+            if not self._is_in_shard(position):
+                continue
+
+            exchange_shared_markets = self._scan_exchange_markets(exchange, reference_market_index)
 
-            markets = self.coingecko_api.fetch_markets(exchange["id"]).get("tickers", [])
-            exchanges_lookup_count += 1
-
-            has_market_in_common = False
-            markets_count = 0
-
-            for market in markets:
-                if (market["base"], market["target"]) in bitso_markets:
-                    shared_markets.append({
-                        "exchange_id": exchange.get("id"),
-                        "market_id": f"{market['base']}_{market['target']}",
-                        "base": market.get("base"),
-                        "target": market.get("target"),
-                        "name": market.get("market").get("name"),
-                    })
-                    has_market_in_common = True
-                    markets_count += 1
-                     
-            if has_market_in_common:
-                similar_exchanges.append({
-                    "exchange_id": exchange.get("id"),
-                    "exchange_name": exchange.get("name"),
-                    "year_established": exchange.get("year_established"),
-                    "country": exchange.get("country"),
-                    "trust_score": exchange.get("trust_score"),
-                    "trust_score_rank": exchange.get("trust_score_rank"),
-                })       
+            if exchange_shared_markets:
+                shared_markets.extend(exchange_shared_markets)
+                similar_exchanges.append(self._to_similar_exchange(exchange, position))
+                if on_exchange_matched is not None:
+                    on_exchange_matched(similar_exchanges[-1], exchange_shared_markets)
                 if len(similar_exchanges) >= self.limits.exchanges_with_similar_trades_limit:
                     self.logger.info("Reached the limit of exchanges with similar trades necessary")
                     break
@@ -63,46 +133,296 @@ class CoingeckoSimilarExchangesDataAnalyzer:
         return (similar_exchanges, \
             shared_markets)
 
-    def generate_markets_historical_volume_table(self, shared_markets):
-        historical_volume = []
-        markets_processed = set()
+    def _scan_exchange_markets(self, exchange, reference_market_index: ReferenceMarketIndex):
+        """
+        Stream the ticker pages of an exchange and collect its markets shared with the reference markets.
+        Only the tickers of the reference base coins are fetched when they all resolve to CoinGecko ids.
+        Exchanges already scanned by the run are loaded from their checkpoint, and exchanges freshly
+        indexed by a previous run are matched against the index.
+
+        :param exchange: Exchange entry as returned by the CoinGecko exchanges endpoint.
+        :param reference_market_index: Index of the reference markets.
+        :return: A RecordTable of the shared market rows, in ticker order.
+        """
+        exchange_shared_markets = self._load_known_shared_markets(exchange, reference_market_index)
+        if exchange_shared_markets is not None:
+            return exchange_shared_markets
+
+        scan = ExchangeMarketsScan(self, exchange, reference_market_index)
+        for tickers in self.coingecko_api.iter_ticker_pages(exchange["id"], coin_ids=reference_market_index.base_coin_ids):
+            if scan.add_page(tickers):
+                break
+        return scan.finish()
+
+    def _load_known_shared_markets(self, exchange, reference_market_index: ReferenceMarketIndex):
+        """
+        Get the shared markets of an exchange without scanning it: from its checkpoint when the run already
+        scanned it, else from the index when a previous run freshly indexed it.
+
+        :param exchange: Exchange entry as returned by the CoinGecko exchanges endpoint.
+        :param reference_market_index: Index of the reference markets.
+        :return: A RecordTable of the shared market rows, or None if the exchange must be scanned.
+        """
+        exchange_shared_markets = self._load_shared_markets_checkpoint(exchange["id"])
+        if exchange_shared_markets is not None:
+            return exchange_shared_markets
+        return self._match_indexed_shared_markets(exchange, reference_market_index)
+
+    def _match_indexed_shared_markets(self, exchange, reference_market_index: ReferenceMarketIndex):
+        """
+        Match the reference markets against the indexed tickers of an exchange.
+
+        :param exchange: Exchange entry as returned by the CoinGecko exchanges endpoint.
+        :param reference_market_index: Index of the reference markets.
+        :return: A RecordTable of the shared market rows, or None if there is no index or the exchange is not freshly indexed.
+        """
+        if self.exchange_market_index is None:
+            return None
+        indexed_tickers = self.exchange_market_index.fresh_tickers(exchange["id"], coin_ids=reference_market_index.base_coin_ids,
+                                                                   markets=reference_market_index.markets)
+        if indexed_tickers is None:
+            return None
+        self.logger.info(f"Matching {exchange['id']} against its {len(indexed_tickers)} indexed tickers")
+        return self._match_shared_markets(exchange, indexed_tickers, reference_market_index)
+
+    def _log_ticker_filter(self, reference_market_index: ReferenceMarketIndex):
+        if reference_market_index.base_coin_ids is None:
+            self.logger.info("Some reference base coins have no CoinGecko id, scanning every ticker of the exchanges")
+        else:
+            self.logger.info(f"Fetching the tickers of {', '.join(reference_market_index.base_coin_ids)} only")
+
+    def _is_in_shard(self, position):
+        return self.shard is None or self.shard.owns(position)
+
+    def _load_checkpoint(self, stage, unit):
+        """
+        Load a unit of work completed by the current run.
+
+        :param stage: The checkpoint stage of the unit.
+        :param unit: The unit key, e.g. an exchange id.
+        :return: The saved result, or None if the unit was not completed or checkpointing is disabled.
+        """
+        if self.checkpoint_store is None:
+            return None
+        return self.checkpoint_store.load(stage, unit)
+
+    def _load_shared_markets_checkpoint(self, exchange_id):
+        """
+        Load the shared markets of an exchange scanned by the current run.
 
+        :param exchange_id: The exchange id.
+        :return: A RecordTable of the shared market rows, or None if the exchange was not scanned.
+        """
+        exchange_shared_markets = self._load_checkpoint(EXCHANGE_SHARED_MARKETS_CHECKPOINT_STAGE, exchange_id)
+        if exchange_shared_markets is None:
+            return None
+        return RecordTable.from_records(SHARED_MARKETS_COLUMNS, exchange_shared_markets)
+
+    def _save_checkpoint(self, stage, unit, payload):
+        if self.checkpoint_store is not None:
+            self.checkpoint_store.save(stage, unit, payload)
+
+    def _has_every_reference_market(self, exchange, exchange_shared_markets, reference_market_index: ReferenceMarketIndex):
+        """
+        Check if every reference market was already found on an exchange, so its remaining tickers can be skipped.
+
+        :param exchange: Exchange entry as returned by the CoinGecko exchanges endpoint.
+        :param exchange_shared_markets: Shared market rows found so far on the exchange.
+        :param reference_market_index: Index of the reference markets.
+        :return: True if the exchange lists every reference market.
+        """
+        found_markets = {market["market_id"] for market in exchange_shared_markets}
+        if len(found_markets) >= len(reference_market_index):
+            self.logger.info(f"Found every reference market on {exchange.get('id')}, skipping its remaining tickers")
+            return True
+        return False
+
+    def _match_shared_markets(self, exchange, tickers, reference_market_index: ReferenceMarketIndex):
+        """
+        Select the tickers of an exchange matching a reference market.
+        Shared markets are identified by the normalized reference symbols, whatever the ticker spelling.
+
+        :param exchange: Exchange entry as returned by the CoinGecko exchanges endpoint.
+        :param tickers: A page of ticker entries of the exchange.
+        :param reference_market_index: Index of the reference markets.
+        :return: A RecordTable of the shared market rows, in ticker order.
+        """
+        exchange_shared_markets = RecordTable(SHARED_MARKETS_COLUMNS)
+        for ticker_position, market_position in reference_market_index.match_page(tickers):
+            ticker = tickers[ticker_position]
+            base, target = reference_market_index.markets[market_position]
+            exchange_shared_markets.append({
+                "exchange_id": exchange.get("id"),
+                "market_id": f"{base}_{target}",
+                "base": base,
+                "target": target,
+                "name": ticker.get("market").get("name"),
+            })
+        return exchange_shared_markets
+
+    def _to_similar_exchange(self, exchange, position):
+        """
+        Build the similar exchange row for an exchange entry.
+
+        :param exchange: Exchange entry as returned by the CoinGecko exchanges endpoint.
+        :param position: Position of the exchange in the exchanges list, starting at 0.
+        :return: A dict with the exchange columns exported by the pipeline, and the exchange position
+                 when the analyzer is sharded.
+        """
+        similar_exchange = {
+            "exchange_id": exchange.get("id"),
+            "exchange_name": exchange.get("name"),
+            "year_established": exchange.get("year_established"),
+            "country": exchange.get("country"),
+            "trust_score": exchange.get("trust_score"),
+            "trust_score_rank": exchange.get("trust_score_rank"),
+        }
+        if self.shard is not None:
+            similar_exchange[EXCHANGE_POSITION_KEY] = position
+        return similar_exchange
+
+    def generate_markets_historical_volume_table(self, shared_markets, fetched_pairs=None):
+        """
+        Generate the daily historical volume of the shared markets.
+
+        :param shared_markets: The shared markets rows.
+        :param fetched_pairs: Optional dict of the coin/currency pairs already fetched, shared across calls when the
+                              shared markets are processed in batches so a pair is not downloaded again.
+        :return: A DataFrame with market_id, date and volume_usd columns.
+        """
+        fetched_pairs = {} if fetched_pairs is None else fetched_pairs
+        market_ids, market_ids_by_pair = self._plan_historical_volume_requests(shared_markets)
+
+        # One call per resolved coin/currency pair, e.g. BTC_USDT, BTC_USDC and BTC_USD all map to bitcoin/usd
+        points_by_market_id = {}
+        for (base_coin_id, vs_currency), pair_market_ids in market_ids_by_pair.items():
+            self.logger.info(f"Markets: {', '.join(pair_market_ids)} -> {base_coin_id}/{vs_currency}")
+            points_by_market_id.update(self._fetch_markets_historical_volume_points(pair_market_ids, \
+                base_coin_id,
+                vs_currency,
+                fetched_pairs
+            ))
+
+        table_builder = MarketsHistoricalVolumeTableBuilder()
+        for market_id in market_ids:
+            table_builder.add(market_id, points_by_market_id[market_id])
+        return table_builder.build()
+
+    def _plan_historical_volume_requests(self, shared_markets):
+        """
+        Group the distinct shared markets by the CoinGecko coin/currency pair their history is fetched with.
+
+        :param shared_markets: The shared markets rows.
+        :return: The distinct market ids in first seen order, and a dict of
+                 (coin id, vs currency) -> market ids mapping to that pair.
+        """
+        market_ids = []
+        markets_processed = set()
+        market_ids_by_pair = {}
         for shared_market in shared_markets:
             market_id = shared_market["market_id"]
             if market_id in markets_processed:
                 continue
             markets_processed.add(market_id)
+            market_ids.append(market_id)
+            market_ids_by_pair.setdefault(self._historical_volume_pair(market_id), []).append(market_id)
+        self.logger.info(f"Planned {len(market_ids_by_pair)} historical volume requests for {len(market_ids)} markets")
+        return market_ids, market_ids_by_pair
 
-            # Map market into Coingecko accepted vs currency id 
-            self.logger.info("Market: " + str(market_id))
-            base, target = market_id.split('_')
-
-            data = self.coingecko_api.fetch_historical_volume( \
-                get_coingecko_id(base),
-                get_vs_currency(target)
-            )
-
-            for point in data.get("prices", []):
-                date = datetime.utcfromtimestamp(point[0] / 1000).strftime(HISTORICAL_VOLUME_DATE_FORMAT)
-                volume = point[1]
-                historical_volume.append({
-                    "market_id": market_id,
-                    "date": date,
-                    "volume_usd": volume,
-                })
-                
-        return historical_volume
+    @staticmethod
+    def _historical_volume_pair(market_id):
+        # Map market into Coingecko accepted coin id and vs currency id
+        base, target = market_id.split('_')
+        return get_coingecko_id(base), get_vs_currency(target)
     
+    def _fetch_markets_historical_volume_points(self, market_ids, base_coin_id, vs_currency, fetched_pairs):
+        """
+        Fetch the historical volume points over the lookback window of the markets sharing a coin/currency pair.
+
+        Without a historical volume store the whole window is downloaded. With a store, only the interval
+        after the oldest high water mark of the markets is fetched through the range endpoint and appended to
+        each stored series, the window is then read back from the store.
+        A response already fetched for the pair is reused when it covers the interval the markets need,
+        including a response checkpointed by a previous attempt of the run.
+
+        :param market_ids: The market ids resolving to the pair, e.g. [BTC_USDT, BTC_USDC].
+        :param base_coin_id: The CoinGecko ID of the base coin.
+        :param vs_currency: The currency against which the volume is measured.
+        :param fetched_pairs: Dict of (coin id, vs currency) -> (response, covered since timestamp ms), updated in place.
+        :return: A dict of market id -> list of [timestamp_ms, volume] points.
+        """
+        pair = (base_coin_id, vs_currency)
+        now_timestamp = time.time()
+        lookback_start_timestamp_ms = int((now_timestamp - int(HISTORICAL_VOLUME_DEFAULT_LOOKBACK_DAYS) * 24 * 60 * 60) * 1000)
+
+        checkpoint_unit = f"{base_coin_id}/{vs_currency}"
+        if pair not in fetched_pairs:
+            checkpoint = self._load_checkpoint(PAIR_HISTORICAL_VOLUME_CHECKPOINT_STAGE, checkpoint_unit)
+            if checkpoint is not None:
+                fetched_pairs[pair] = (checkpoint["data"], checkpoint["covered_since_timestamp_ms"])
+
+        if self.historical_volume_store is None:
+            if pair not in fetched_pairs:
+                fetched_pairs[pair] = (self.coingecko_api.fetch_historical_volume(base_coin_id, vs_currency),
+                                       lookback_start_timestamp_ms)
+                self._save_pair_checkpoint(checkpoint_unit, fetched_pairs[pair])
+            points = fetched_pairs[pair][0].get("prices", [])
+            return {market_id: points for market_id in market_ids}
+
+        high_water_marks = [self.historical_volume_store.high_water_mark(market_id) for market_id in market_ids]
+        is_window_missing = any(high_water_mark is None or high_water_mark < lookback_start_timestamp_ms
+                                for high_water_mark in high_water_marks)
+        required_since_timestamp_ms = lookback_start_timestamp_ms if is_window_missing else min(high_water_marks)
+
+        if pair in fetched_pairs and fetched_pairs[pair][1] <= required_since_timestamp_ms:
+            self.logger.info(f"Reusing the {base_coin_id}/{vs_currency} history fetched for a previous market")
+            data = fetched_pairs[pair][0]
+        elif is_window_missing:
+            self.logger.info(f"No recent history stored for {base_coin_id}/{vs_currency}, fetching the whole lookback window")
+            data = self.coingecko_api.fetch_historical_volume(base_coin_id, vs_currency)
+            fetched_pairs[pair] = (data, lookback_start_timestamp_ms)
+            self._save_pair_checkpoint(checkpoint_unit, fetched_pairs[pair])
+        else:
+            # Short ranges come back at a finer granularity, so never ask for less than the minimum range
+            from_timestamp = min(required_since_timestamp_ms / 1000, now_timestamp - HISTORICAL_VOLUME_MIN_RANGE_SECONDS)
+            self.logger.info(f"Fetching {base_coin_id}/{vs_currency} history since {datetime.utcfromtimestamp(from_timestamp)}")
+            data = self.coingecko_api.fetch_historical_volume_range(base_coin_id, vs_currency, from_timestamp, now_timestamp)
+            fetched_pairs[pair] = (data, int(from_timestamp * 1000))
+            self._save_pair_checkpoint(checkpoint_unit, fetched_pairs[pair])
+
+        points_by_market_id = {}
+        for market_id in market_ids:
+            appended_points_count = self.historical_volume_store.append(market_id, data.get("prices", []))
+            self.logger.info(f"Stored {appended_points_count} new points for {market_id}")
+            points_by_market_id[market_id] = self.historical_volume_store.load(market_id, \
+                since_timestamp_ms=lookback_start_timestamp_ms)
+        return points_by_market_id
+
+    def _save_pair_checkpoint(self, checkpoint_unit, fetched_pair):
+        data, covered_since_timestamp_ms = fetched_pair
+        self._save_checkpoint(PAIR_HISTORICAL_VOLUME_CHECKPOINT_STAGE, checkpoint_unit,
+                              {"data": data, "covered_since_timestamp_ms": covered_since_timestamp_ms})
+
     def generate_exchanges_trade_volume(self, exchanges, days):
+        """
+        Generate the trade volume of the exchanges over the last days, exchanges failing to fetch are skipped.
+
+        :param exchanges: The similar exchanges rows.
+        :param days: Number of days of the volume chart.
+        :return: A RecordTable with exchange_id, date and volume_btc columns.
+        """
         today_date = datetime.utcnow().strftime(HISTORICAL_VOLUME_DATE_FORMAT)
-        volume_table = []
+        volume_table = RecordTable(EXCHANGES_TRADE_VOLUME_COLUMNS, float_columns=EXCHANGES_TRADE_VOLUME_FLOAT_COLUMNS)
 
         for exchange in exchanges:
             exchange_id = exchange.get("exchange_id")
             try:
-                # Fetch rolling 30-day volume
-                rolling_30_day_volume_entries = self.coingecko_api.fetch_exchange_volume_chart(exchange_id, \
-                                                                                       days=days)
+                # Fetch rolling 30-day volume, unless a previous attempt of the run already did
+                rolling_30_day_volume_entries = self._load_checkpoint(EXCHANGE_VOLUME_CHART_CHECKPOINT_STAGE, exchange_id)
+                if rolling_30_day_volume_entries is None:
+                    rolling_30_day_volume_entries = self.coingecko_api.fetch_exchange_volume_chart(exchange_id, \
+                                                                                           days=days)
+                    self._save_checkpoint(EXCHANGE_VOLUME_CHART_CHECKPOINT_STAGE, exchange_id, rolling_30_day_volume_entries)
 
                 total_volume_btc = sum(float(point[1]) for point in rolling_30_day_volume_entries)                
 
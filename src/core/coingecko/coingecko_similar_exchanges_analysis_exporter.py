@@ -2,60 +2,200 @@
 from src.constants.constants import TMP_DATA_BASE_OUTPUT_PATH
 from src.config.app_config import AppConfig
 from src.adapters.s3_handler import S3Handler
+from src.utils.record_table import RecordTable
+from typing import TYPE_CHECKING
 import os
 import pandas as pd
 import logging 
 
+if TYPE_CHECKING:  # Optional components, imported by the runs enabling them
+    from src.adapters.volume_time_series_store import VolumeTimeSeriesStore
+    from src.utils.parquet_dataset_writer import ParquetDatasetWriter
+
 ANALYZED_DATA_OUTPUT_PATH= f"{TMP_DATA_BASE_OUTPUT_PATH}/analyzed"
 
 EXCHANGES_TABLE_RELATIVE_LOCAL_OUTPUT_PATH = f"{ANALYZED_DATA_OUTPUT_PATH}/exchange_table.csv"
 SHARED_MARKETS_TABLE_LOCAL_OUTPUT_PATH = f"{ANALYZED_DATA_OUTPUT_PATH}/shared_markets_table.csv"
 MARKETS_HISTORICAL_VOLUME_LOCAL_OUTPUT_PATH = f"{ANALYZED_DATA_OUTPUT_PATH}/markets_historical_volume_df.csv"
 EXCHANGES_HISTORICAL_TRADE_VOLUME_LOCAL_OUTPUT_PATH = f"{ANALYZED_DATA_OUTPUT_PATH}/exchanges_historical_trade_volume.csv"
+MARKETS_ROLLING_ANALYTICS_LOCAL_OUTPUT_PATH = f"{ANALYZED_DATA_OUTPUT_PATH}/markets_rolling_volume_analytics.csv"
 
 PIPELINE_S3_OUTPUT_PATH = f"coingecko/analyzed"
 EXCHANGES_TABLE_RELATIVE_S3_PATH = f"{PIPELINE_S3_OUTPUT_PATH}/exchange_table.csv"
 SHARED_MARKETS_TABLE_RELATIVE_S3_OUTPUT_PATH = f"{PIPELINE_S3_OUTPUT_PATH}/shared_markets_table.csv"
 MARKETS_HISTORICAL_VOLUME_S3_OUTPUT_PATH = f"{PIPELINE_S3_OUTPUT_PATH}/markets_historical_volume_df.csv"
 EXCHANGES_HISTORICAL_TRADE_VOLUME_S3_OUTPUT_PATH = f"{PIPELINE_S3_OUTPUT_PATH}/exchanges_historical_trade_volume.csv"
+MARKETS_ROLLING_ANALYTICS_S3_OUTPUT_PATH = f"{PIPELINE_S3_OUTPUT_PATH}/markets_rolling_volume_analytics.csv"
+
+PARQUET_LOCAL_OUTPUT_PATH = f"{ANALYZED_DATA_OUTPUT_PATH}/parquet"
+EXCHANGES_TABLE_PARQUET_RELATIVE_PATH = "exchange_table.parquet"
+SHARED_MARKETS_TABLE_PARQUET_RELATIVE_PATH = "shared_markets_table.parquet"
+MARKETS_HISTORICAL_VOLUME_PARQUET_RELATIVE_PATH = "markets_historical_volume"
+EXCHANGES_HISTORICAL_TRADE_VOLUME_PARQUET_RELATIVE_PATH = "exchanges_historical_trade_volume"
+MARKETS_ROLLING_ANALYTICS_PARQUET_RELATIVE_PATH = "markets_rolling_volume_analytics.parquet"
+PARQUET_S3_OUTPUT_PATH = f"{PIPELINE_S3_OUTPUT_PATH}/parquet"
+
+MARKETS_HISTORICAL_VOLUME_PARTITION_COLS = ["date", "market_id"]
+EXCHANGES_HISTORICAL_TRADE_VOLUME_PARTITION_COLS = ["date"]
+
+def build_parquet_schemas():
+    """
+    Build the Arrow schemas of the exported tables. Only the runs exporting Parquet build them, the other runs
+    do not need pyarrow (pandas still imports it on its own when it is installed).
+
+    :return: A dict of table name -> pyarrow.Schema.
+    """
+    import pyarrow as pa
+    return {
+        "exchanges_table": pa.schema([
+            ("exchange_id", pa.string()),
+            ("exchange_name", pa.string()),
+            ("year_established", pa.int32()),
+            ("country", pa.string()),
+            ("trust_score", pa.float64()),
+            ("trust_score_rank", pa.int32()),
+        ]),
+        "shared_markets_table": pa.schema([
+            ("exchange_id", pa.dictionary(pa.int32(), pa.string())),
+            ("market_id", pa.dictionary(pa.int32(), pa.string())),
+            ("base", pa.dictionary(pa.int32(), pa.string())),
+            ("target", pa.dictionary(pa.int32(), pa.string())),
+            ("name", pa.string()),
+        ]),
+        "markets_historical_volume": pa.schema([
+            ("date", pa.string()),
+            ("market_id", pa.string()),
+            ("volume_usd", pa.float64()),
+        ]),
+        "exchanges_historical_trade_volume": pa.schema([
+            ("date", pa.string()),
+            ("exchange_id", pa.string()),
+            ("volume_btc", pa.float64()),
+        ]),
+        "markets_rolling_analytics": pa.schema([
+            ("market_id", pa.string()),
+            ("date", pa.string()),
+            ("volume_usd", pa.float64()),
+            ("volume_usd_ma_7d", pa.float64()),
+            ("volume_usd_ma_30d", pa.float64()),
+            ("volume_usd_change_1d", pa.float64()),
+            ("volume_usd_volatility_30d", pa.float64()),
+        ]),
+    }
 
 class CoingeckoSimilarExchangesDataAnalysisExporter:
 
-    def __init__(self, app_config: AppConfig, s3_handler: S3Handler):
+    def __init__(self, app_config: AppConfig, s3_handler: S3Handler, parquet_writer: "ParquetDatasetWriter" = None,
+                 time_series_store: "VolumeTimeSeriesStore" = None):
+        """
+        Initialize the exporter.
+
+        :param app_config: The application config.
+        :param s3_handler: Handler used to upload the tables when writing to S3 is enabled.
+        :param parquet_writer: Optional writer exporting the tables as Parquet next to the CSV files.
+        :param time_series_store: Optional store the exchanges trade volume is upserted into, keeping it across runs.
+        """
         self.app_config = app_config
         self.s3_handler = s3_handler
+        self.parquet_writer = parquet_writer
+        self.time_series_store = time_series_store
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def export(self, 
                       exchanges_with_similar_markets, 
                       shared_markets,
                       markets_historical_volume,
-                      exchanges_historical_trade_volume):
+                      exchanges_historical_trade_volume,
+                      markets_rolling_analytics=None):
         self.logger.info(f"Exporting tables to base path: {ANALYZED_DATA_OUTPUT_PATH}")
         # Save the tables locally
         os.makedirs(ANALYZED_DATA_OUTPUT_PATH, exist_ok=True)
 
         # Create tables
         exchanges_with_similar_markets_df = pd.DataFrame(exchanges_with_similar_markets)
-        shared_markets_df = pd.DataFrame(shared_markets)
+        shared_markets_df = self.to_dataframe(shared_markets)
         markets_historical_volume_df = pd.DataFrame(markets_historical_volume)
-        exchanges_historical_trade_volume_df = pd.DataFrame(exchanges_historical_trade_volume)
+        exchanges_historical_trade_volume_df = self.to_dataframe(exchanges_historical_trade_volume)
 
-        # Save to csv locally
-        exchanges_with_similar_markets_df.to_csv(EXCHANGES_TABLE_RELATIVE_LOCAL_OUTPUT_PATH, index=False)
-        shared_markets_df.to_csv(SHARED_MARKETS_TABLE_LOCAL_OUTPUT_PATH, index=False)
-        markets_historical_volume_df.to_csv(MARKETS_HISTORICAL_VOLUME_LOCAL_OUTPUT_PATH, index=False)
-        exchanges_historical_trade_volume_df.to_csv(EXCHANGES_HISTORICAL_TRADE_VOLUME_LOCAL_OUTPUT_PATH, index=False)
+        tables = [
+            (exchanges_with_similar_markets_df, EXCHANGES_TABLE_RELATIVE_LOCAL_OUTPUT_PATH, EXCHANGES_TABLE_RELATIVE_S3_PATH),
+            (shared_markets_df, SHARED_MARKETS_TABLE_LOCAL_OUTPUT_PATH, SHARED_MARKETS_TABLE_RELATIVE_S3_OUTPUT_PATH),
+            (markets_historical_volume_df, MARKETS_HISTORICAL_VOLUME_LOCAL_OUTPUT_PATH, MARKETS_HISTORICAL_VOLUME_S3_OUTPUT_PATH),
+            (exchanges_historical_trade_volume_df, EXCHANGES_HISTORICAL_TRADE_VOLUME_LOCAL_OUTPUT_PATH, EXCHANGES_HISTORICAL_TRADE_VOLUME_S3_OUTPUT_PATH)]
+        if markets_rolling_analytics is not None:
+            tables.append((markets_rolling_analytics, MARKETS_ROLLING_ANALYTICS_LOCAL_OUTPUT_PATH, MARKETS_ROLLING_ANALYTICS_S3_OUTPUT_PATH))
+
+        # Serialize every table once, the same buffer is written locally and uploaded
+        s3_objects = {}
+        for df, local_path, s3_path in tables:
+            data = df.to_csv(index=False).encode("utf-8")
+            self.write_local_file(local_path, data)
+            s3_objects[s3_path] = data
+
+        # The markets history is stored point by point by the analyzer, as it is fetched
+        if self.time_series_store is not None:
+            self.time_series_store.upsert_exchanges_historical_trade_volume(exchanges_historical_trade_volume_df)
+
+        if self.parquet_writer is not None:
+            s3_objects.update(self.export_parquet(exchanges_with_similar_markets_df,
+                                                  shared_markets_df,
+                                                  markets_historical_volume_df,
+                                                  exchanges_historical_trade_volume_df,
+                                                  markets_rolling_analytics))
 
         # Save the tables to S3
         if self.app_config.write_to_s3:
-            self.logger.info(f"Writing to S3")
+            self.logger.info(f"Writing {len(s3_objects)} files to S3")
+            self.s3_handler.upload_many(s3_objects)
+
+    def export_parquet(self,
+                       exchanges_with_similar_markets_df,
+                       shared_markets_df,
+                       markets_historical_volume_df,
+                       exchanges_historical_trade_volume_df,
+                       markets_rolling_analytics_df=None):
+        """
+        Export the tables as Parquet. The history tables are partitioned by date (and market) so a rerun only
+        replaces the partitions it produced and readers can prune the partitions they do not need.
+
+        :return: A dict of S3 path -> content of the written Parquet files.
+        """
+        self.logger.info(f"Exporting Parquet tables to base path: {PARQUET_LOCAL_OUTPUT_PATH}")
+        schemas = build_parquet_schemas()
+        written_files = []
+        written_files += self.parquet_writer.write_table(
+            exchanges_with_similar_markets_df, schemas["exchanges_table"],
+            os.path.join(PARQUET_LOCAL_OUTPUT_PATH, EXCHANGES_TABLE_PARQUET_RELATIVE_PATH))
+        written_files += self.parquet_writer.write_table(
+            shared_markets_df, schemas["shared_markets_table"],
+            os.path.join(PARQUET_LOCAL_OUTPUT_PATH, SHARED_MARKETS_TABLE_PARQUET_RELATIVE_PATH))
+        written_files += self.parquet_writer.write_partitioned(
+            markets_historical_volume_df, schemas["markets_historical_volume"],
+            os.path.join(PARQUET_LOCAL_OUTPUT_PATH, MARKETS_HISTORICAL_VOLUME_PARQUET_RELATIVE_PATH),
+            MARKETS_HISTORICAL_VOLUME_PARTITION_COLS)
+        written_files += self.parquet_writer.write_partitioned(
+            exchanges_historical_trade_volume_df, schemas["exchanges_historical_trade_volume"],
+            os.path.join(PARQUET_LOCAL_OUTPUT_PATH, EXCHANGES_HISTORICAL_TRADE_VOLUME_PARQUET_RELATIVE_PATH),
+            EXCHANGES_HISTORICAL_TRADE_VOLUME_PARTITION_COLS)
+        if markets_rolling_analytics_df is not None:
+            written_files += self.parquet_writer.write_table(
+                markets_rolling_analytics_df, schemas["markets_rolling_analytics"],
+                os.path.join(PARQUET_LOCAL_OUTPUT_PATH, MARKETS_ROLLING_ANALYTICS_PARQUET_RELATIVE_PATH))
+
+        s3_objects = {}
+        for local_file, data in written_files:
+            relative_path = os.path.relpath(local_file, PARQUET_LOCAL_OUTPUT_PATH).replace(os.sep, "/")
+            s3_objects[f"{PARQUET_S3_OUTPUT_PATH}/{relative_path}"] = data
+        return s3_objects
 
-            self.write_to_s3(EXCHANGES_TABLE_RELATIVE_LOCAL_OUTPUT_PATH, EXCHANGES_TABLE_RELATIVE_S3_PATH)
-            self.write_to_s3(SHARED_MARKETS_TABLE_LOCAL_OUTPUT_PATH, SHARED_MARKETS_TABLE_RELATIVE_S3_OUTPUT_PATH)
-            self.write_to_s3(MARKETS_HISTORICAL_VOLUME_LOCAL_OUTPUT_PATH, MARKETS_HISTORICAL_VOLUME_S3_OUTPUT_PATH)
-            self.write_to_s3(EXCHANGES_HISTORICAL_TRADE_VOLUME_LOCAL_OUTPUT_PATH, EXCHANGES_HISTORICAL_TRADE_VOLUME_S3_OUTPUT_PATH)
+    @staticmethod
+    def to_dataframe(rows):
+        # Record tables are converted column by column, without building a dict per row
+        if isinstance(rows, RecordTable):
+            return rows.to_dataframe()
+        return pd.DataFrame(rows)
 
-    def write_to_s3(self, local_file, s3_path):
-        self.logger.info(f"Writing: {local_file} -> {s3_path}")
-        self.s3_handler.upload_file(local_file, s3_path)
+    def write_local_file(self, local_file, data):
+        self.logger.info(f"Writing: {len(data)} bytes -> {local_file}")
+        with open(local_file, "wb") as f:
+            f.write(data)
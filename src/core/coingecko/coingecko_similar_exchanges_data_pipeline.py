@@ -1,46 +1,155 @@
-from src.core.coingecko.coingecko_data_analyzer import CoingeckoSimilarExchangesDataAnalyzer
+from src.core.coingecko.coingecko_data_analyzer import CoingeckoSimilarExchangesDataAnalyzer, EXCHANGES_TRADE_VOLUME_COLUMNS, \
+    EXCHANGES_TRADE_VOLUME_FLOAT_COLUMNS
 from src.core.coingecko.coingecko_data_fetcher_limits import CoingeckoDataFetcherLimits
 from src.core.coingecko.coingecko_similar_exchanges_analysis_exporter import CoingeckoSimilarExchangesDataAnalysisExporter
 from src.config.app_config import AppConfig
 from src.adapters.bitso_api import BitsoAPI
 from src.constants.constants import TMP_DATA_BASE_OUTPUT_PATH
+from src.utils.stage_graph import StageGraph, StageChannel
+from src.utils.record_table import RecordTable
+from src.utils.http_metrics import HTTPMetricsRegistry
+from src.adapters.pipeline_checkpoint_store import PipelineCheckpointStore
+from typing import TYPE_CHECKING
 import os
 import pandas as pd
 import logging
 
+if TYPE_CHECKING:  # Optional component, imported by the runs enabling it
+    from src.core.coingecko.markets_rolling_volume_analytics import MarketsRollingVolumeAnalytics
+
 class CoingeckoSimilarExchangesDataPipeline:
     def __init__(self,
                   coingecko_data_analyzer: CoingeckoSimilarExchangesDataAnalyzer,
                   coingecko_data_analysis_exporter: CoingeckoSimilarExchangesDataAnalysisExporter,
-                  app_config: AppConfig):
+                  app_config: AppConfig,
+                  http_metrics: HTTPMetricsRegistry = None,
+                  checkpoint_store: PipelineCheckpointStore = None,
+                  markets_rolling_analytics: "MarketsRollingVolumeAnalytics" = None):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.http_metrics = http_metrics  # Optional, written to the metrics dir at the end of every run
+        self.checkpoint_store = checkpoint_store  # Optional, holds the units completed by the run until it is exported
+        self.markets_rolling_analytics = markets_rolling_analytics  # Optional, folds the new days of the markets history
         self.coingecko_data_analyzer = coingecko_data_analyzer
         self.coingecko_data_analysis_exporter = coingecko_data_analysis_exporter
         self.app_config = app_config
 
     def run(self):
+        """
+        Run the pipeline as a stage graph. The two history stages do not depend on each other, they run
+        concurrently and start on each similar exchange as soon as the similarity scan finds it.
+        The rolling analytics, when enabled, run on the complete markets history.
+        The export runs once every table is complete.
+
+        :return: The StageGraph of the run, holding the stage timings and critical path.
+        """
         self.logger.info(f"Running with rate_limiter_max_retries:{self.app_config.rate_limiter_max_retries}, \
                         exchanges_with_similar_trades_to_analyze:{self.app_config.exchanges_with_similar_trades_to_analyze} \
                         exchanges_to_analyze_limit:{self.app_config.exchanges_to_analyze_limit} \
                         write_to_s3: {self.app_config.write_to_s3}")     
 
-        self.logger.info("Fetching Bitso markets")
-        bitsoAPI = BitsoAPI()
-        bitso_markets = bitsoAPI.fetch_markets()
-        self.logger.info(f"Bitso Markets: {bitso_markets}")
+        stage_graph = StageGraph()
+        historical_volume_channel = stage_graph.add_channel()
+        trade_volume_channel = stage_graph.add_channel()
+
+        def fetch_bitso_markets():
+            self.logger.info("Fetching Bitso markets")
+            bitso_markets = BitsoAPI().fetch_markets()
+            self.logger.info(f"Bitso Markets: {bitso_markets}")
+            return bitso_markets
+
+        def find_similar_exchanges(bitso_markets):
+            # Every similar exchange is handed to both history stages as soon as it is found
+            try:
+                return self._find_similar_exchanges(bitso_markets, historical_volume_channel, trade_volume_channel)
+            finally:
+                historical_volume_channel.close()
+                trade_volume_channel.close()
+
+        def export(similar_exchanges, markets_historical_volume, exchanges_historical_trade_volume,
+                   markets_rolling_analytics=None):
+            exchanges_with_similar_markets, shared_markets = similar_exchanges
+            optional_tables = {} if markets_rolling_analytics is None else {"markets_rolling_analytics": markets_rolling_analytics}
+            self.logger.info("Exporting tables")
+            self.coingecko_data_analysis_exporter.export(exchanges_with_similar_markets,
+                                                         shared_markets,
+                                                         markets_historical_volume,
+                                                         exchanges_historical_trade_volume,
+                                                         **optional_tables)
+
+        stage_graph.add_stage("bitso_markets", fetch_bitso_markets)
+        stage_graph.add_stage("similar_exchanges", find_similar_exchanges, depends_on=["bitso_markets"])
+        stage_graph.add_stage("markets_historical_volume",
+                              lambda: self._generate_markets_historical_volume(historical_volume_channel),
+                              streams_from=["similar_exchanges"])
+        stage_graph.add_stage("exchanges_historical_trade_volume",
+                              lambda: self._generate_exchanges_trade_volume(trade_volume_channel),
+                              streams_from=["similar_exchanges"])
+        export_dependencies = ["similar_exchanges", "markets_historical_volume", "exchanges_historical_trade_volume"]
+        if self.markets_rolling_analytics is not None:
+            stage_graph.add_stage("markets_rolling_analytics", self.markets_rolling_analytics.update,
+                                  depends_on=["markets_historical_volume"])
+            export_dependencies.append("markets_rolling_analytics")
+        stage_graph.add_stage("export", export, depends_on=export_dependencies)
 
+        try:
+            stage_graph.run()
+            # The outputs are exported, a rerun with the same id starts over
+            if self.checkpoint_store is not None:
+                self.checkpoint_store.clear_run()
+        finally:
+            # Failed runs are the ones worth diagnosing, their metrics are written too
+            if self.http_metrics is not None:
+                self.http_metrics.write(self.app_config.metrics_dir)
+        return stage_graph
+
+    def _find_similar_exchanges(self, bitso_markets, *channels):
+        """
+        Analyze the exchanges with similar trades, publishing each (similar exchange, shared markets) batch
+        to the channels as soon as it is found.
+
+        :return: A tuple (similar_exchanges, shared_markets).
+        """
         self.logger.info("Analyzing exchanges with similar trades")
-        exchanges_with_similar_markets, shared_markets = self.coingecko_data_analyzer.generate_exchanges_with_similar_trades(bitso_markets)
+        published_batches_count = 0
+
+        def publish(similar_exchange, exchange_shared_markets):
+            nonlocal published_batches_count
+            published_batches_count += 1
+            for channel in channels:
+                channel.put(([similar_exchange], exchange_shared_markets))
+
+        exchanges_with_similar_markets, shared_markets = self.coingecko_data_analyzer.generate_exchanges_with_similar_trades(
+            bitso_markets, on_exchange_matched=publish)
+
+        # Analyzers that do not stream their matches hand everything over at once
+        if published_batches_count == 0 and exchanges_with_similar_markets:
+            for channel in channels:
+                channel.put((exchanges_with_similar_markets, shared_markets))
+        return exchanges_with_similar_markets, shared_markets
 
+    def _generate_markets_historical_volume(self, channel: StageChannel):
         self.logger.info("Generating markets historical volume table")
-        markets_historical_volume = self.coingecko_data_analyzer.generate_markets_historical_volume_table(shared_markets)
+        fetched_pairs = {}
+        markets_processed = set()
+        tables = []
+        for _, shared_markets in channel:
+            new_shared_markets = [shared_market for shared_market in shared_markets
+                                  if shared_market["market_id"] not in markets_processed]
+            markets_processed.update(shared_market["market_id"] for shared_market in new_shared_markets)
+            if new_shared_markets:
+                tables.append(self.coingecko_data_analyzer.generate_markets_historical_volume_table(new_shared_markets,
+                                                                                                    fetched_pairs=fetched_pairs))
+        if len(tables) == 1:
+            return tables[0]
+        if not tables:
+            return self.coingecko_data_analyzer.generate_markets_historical_volume_table([], fetched_pairs=fetched_pairs)
+        return pd.concat(tables, ignore_index=True).astype({"market_id": "category", "date": "category"})
 
+    def _generate_exchanges_trade_volume(self, channel: StageChannel):
         self.logger.info("Generating similar exchanges historical trade volume")
-        exchanges_historical_trade_volume = self.coingecko_data_analyzer.generate_exchanges_trade_volume(exchanges_with_similar_markets,
-                                                                                                     self.app_config.historical_data_lookback_days)
-        
-        self.logger.info("Exporting tables")
-        self.coingecko_data_analysis_exporter.export(exchanges_with_similar_markets,
-                                                     shared_markets,
-                                                     markets_historical_volume,
-                                                     exchanges_historical_trade_volume)
+        exchanges_historical_trade_volume = RecordTable(EXCHANGES_TRADE_VOLUME_COLUMNS,
+                                                        float_columns=EXCHANGES_TRADE_VOLUME_FLOAT_COLUMNS)
+        for similar_exchanges, _ in channel:
+            exchanges_historical_trade_volume.extend(self.coingecko_data_analyzer.generate_exchanges_trade_volume(
+                similar_exchanges, self.app_config.historical_data_lookback_days))
+        return exchanges_historical_trade_volume
@@ -40,4 +40,13 @@ def get_vs_currency(symbol):
 
 
 def get_coingecko_id(symbol):
-    return COINGECKO_SYMBOLS.get(symbol.upper(), f"Unknown symbol: {symbol}")
\ No newline at end of file
+    return COINGECKO_SYMBOLS.get(symbol.upper(), f"Unknown symbol: {symbol}")
+
+def find_coingecko_id(symbol):
+    """
+    Resolve a symbol into its CoinGecko coin id.
+
+    :param symbol: The coin symbol, case insensitive.
+    :return: The CoinGecko coin id, or None if the symbol is unknown.
+    """
+    return COINGECKO_SYMBOLS.get(symbol.strip().upper())
@@ -0,0 +1,188 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from src.core.coingecko.reference_market_index import normalize_symbol
+
+class ExchangeMarketIndex:
+    '''
+        Persistent inverted index of the markets listed by each exchange.
+        Maps the normalized (base, target) symbols to the exchanges listing them, with the ticker volume and
+        trust score, and keeps the exchange metadata and the time each exchange was last indexed.
+        The whole index is held in memory for O(1) lookups and written through to a SQLite database,
+        so later runs only rescan the exchanges whose entry is older than the TTL.
+        Exchanges scanned with a server side base coin filter are indexed for those base coins only.
+        Scans stopped early, once every reference market was found, are indexed as partial: their tickers only
+        answer the lookups of markets they list, any other lookup rescans the exchange.
+    '''
+    def __init__(self, db_path, ttl_seconds, clock=time.time):
+        """
+        Initialize the index, loading the exchanges already indexed by previous runs.
+
+        :param db_path: Path of the SQLite database file.
+        :param ttl_seconds: Age after which the tickers of an exchange are stale and must be scanned again.
+        :param clock: Wall clock returning seconds, injectable for tests.
+        """
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.exchanges = {}  # exchange id -> (exchange metadata, indexed at, indexed base coin ids or None for every coin, complete)
+        self.tickers_by_exchange = {}  # exchange id -> list of ticker rows, in ticker order
+        self.listings_by_market = {}  # (base, target) -> {exchange id: ticker row}
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self.connection = sqlite3.connect(db_path, check_same_thread=False)
+        with self.lock:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS exchanges ("
+                "exchange_id TEXT PRIMARY KEY, metadata TEXT NOT NULL, indexed_at REAL NOT NULL, coin_ids TEXT, "
+                "complete INTEGER NOT NULL DEFAULT 1)")
+            # Indexes created before partial scans were indexed only hold complete scans
+            if "complete" not in {column[1] for column in self.connection.execute("PRAGMA table_info(exchanges)")}:
+                self.connection.execute("ALTER TABLE exchanges ADD COLUMN complete INTEGER NOT NULL DEFAULT 1")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS exchange_tickers ("
+                "exchange_id TEXT NOT NULL, position INTEGER NOT NULL, base TEXT, target TEXT, "
+                "coin_id TEXT, target_coin_id TEXT, market_name TEXT, volume REAL, volume_usd REAL, trust_score TEXT, "
+                "PRIMARY KEY (exchange_id, position))")
+            self.connection.commit()
+            self._load()
+
+    def __len__(self):
+        return len(self.exchanges)
+
+    def fresh_tickers(self, exchange_id, coin_ids=None, markets=None):
+        """
+        Get the indexed tickers of an exchange, if they are fresh.
+
+        :param exchange_id: The exchange id.
+        :param coin_ids: Optional base coin ids the tickers are needed for, every base coin if not set.
+        :param markets: Optional (base, target) markets the tickers are looked up for. Partial scans only
+                        serve lookups of markets they all list.
+        :return: The tickers in the CoinGecko tickers endpoint shape, or None if the exchange is unknown, stale,
+                 was indexed for other base coins or was partially scanned without listing every market.
+        """
+        with self.lock:
+            if exchange_id not in self.exchanges:
+                return None
+            _, indexed_at, indexed_coin_ids, complete = self.exchanges[exchange_id]
+            if self.clock() - indexed_at > self.ttl_seconds:
+                return None
+            if indexed_coin_ids is not None and (coin_ids is None or not set(coin_ids) <= set(indexed_coin_ids)):
+                return None
+            if not complete and (markets is None or not self._lists_every_market(exchange_id, markets)):
+                return None
+            return [self._to_ticker(exchange_id, row) for row in self.tickers_by_exchange[exchange_id]]
+
+    def index_exchange(self, exchange, tickers, coin_ids=None, complete=True):
+        """
+        Replace the indexed tickers of an exchange with the result of a scan.
+
+        :param exchange: Exchange entry as returned by the CoinGecko exchanges endpoint.
+        :param tickers: The scanned tickers of the exchange, as returned by the CoinGecko tickers endpoint.
+        :param coin_ids: The base coin ids the tickers were filtered on, None if every ticker was scanned.
+        :param complete: False if the scan stopped before the last ticker page.
+        """
+        exchange_id = exchange["id"]
+        indexed_at = self.clock()
+        rows = [(normalize_symbol(ticker.get("base")),
+                 normalize_symbol(ticker.get("target")),
+                 ticker.get("coin_id"),
+                 ticker.get("target_coin_id"),
+                 (ticker.get("market") or {}).get("name"),
+                 ticker.get("volume"),
+                 (ticker.get("converted_volume") or {}).get("usd"),
+                 ticker.get("trust_score")) for ticker in tickers]
+
+        with self.lock:
+            self._remove_listings(exchange_id)
+            self.exchanges[exchange_id] = (exchange, indexed_at, None if coin_ids is None else sorted(coin_ids), complete)
+            self.tickers_by_exchange[exchange_id] = rows
+            self._add_listings(exchange_id, rows)
+
+            self.connection.execute("DELETE FROM exchange_tickers WHERE exchange_id = ?", (exchange_id,))
+            self.connection.executemany(
+                "INSERT INTO exchange_tickers VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(exchange_id, position, *row) for position, row in enumerate(rows)])
+            self.connection.execute("INSERT OR REPLACE INTO exchanges VALUES (?, ?, ?, ?, ?)",
+                                    (exchange_id, json.dumps(exchange), indexed_at,
+                                     None if coin_ids is None else json.dumps(sorted(coin_ids)), int(complete)))
+            self.connection.commit()
+        self.logger.info(f"Indexed {len(rows)} tickers of {exchange_id}{'' if complete else ' from a partial scan'}")
+
+    def exchanges_listing(self, base, target):
+        """
+        Find the exchanges listing a market, e.g. which exchanges list BTC/USDT.
+
+        :param base: The base symbol, in any case.
+        :param target: The target symbol, in any case.
+        :return: A list of dicts with the exchange metadata and the ticker volume and trust score,
+                 by descending exchange trust score.
+        """
+        with self.lock:
+            listings = self.listings_by_market.get((normalize_symbol(base), normalize_symbol(target)), {})
+            exchange_listings = [{
+                "exchange_id": exchange_id,
+                "exchange_name": self.exchanges[exchange_id][0].get("name"),
+                "exchange_trust_score": self.exchanges[exchange_id][0].get("trust_score"),
+                "exchange_trust_score_rank": self.exchanges[exchange_id][0].get("trust_score_rank"),
+                "volume": row[5],
+                "volume_usd": row[6],
+                "trust_score": row[7],
+                "indexed_at": self.exchanges[exchange_id][1],
+            } for exchange_id, row in listings.items()]
+        return sorted(exchange_listings, key=lambda listing: -(listing["exchange_trust_score"] or 0))
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def _load(self):
+        for exchange_id, metadata, indexed_at, coin_ids, complete in self.connection.execute(
+                "SELECT exchange_id, metadata, indexed_at, coin_ids, complete FROM exchanges"):
+            self.exchanges[exchange_id] = (json.loads(metadata), indexed_at, None if coin_ids is None else json.loads(coin_ids),
+                                           bool(complete))
+            self.tickers_by_exchange[exchange_id] = []
+        for exchange_id, *row in self.connection.execute(
+                "SELECT exchange_id, base, target, coin_id, target_coin_id, market_name, volume, volume_usd, trust_score "
+                "FROM exchange_tickers ORDER BY exchange_id, position"):
+            self.tickers_by_exchange.setdefault(exchange_id, []).append(tuple(row))
+        for exchange_id, rows in self.tickers_by_exchange.items():
+            self._add_listings(exchange_id, rows)
+        self.logger.info(f"Loaded {len(self.exchanges)} indexed exchanges listing {len(self.listings_by_market)} markets")
+
+    def _lists_every_market(self, exchange_id, markets):
+        return all(exchange_id in self.listings_by_market.get((normalize_symbol(base), normalize_symbol(target)), {})
+                   for base, target in markets)
+
+    def _add_listings(self, exchange_id, rows):
+        for row in rows:
+            # An exchange listing a market several times (e.g. spot and perpetual) keeps its first ticker
+            self.listings_by_market.setdefault((row[0], row[1]), {}).setdefault(exchange_id, row)
+
+    def _remove_listings(self, exchange_id):
+        for row in self.tickers_by_exchange.get(exchange_id, []):
+            listings = self.listings_by_market.get((row[0], row[1]))
+            if listings is not None:
+                listings.pop(exchange_id, None)
+                if not listings:
+                    del self.listings_by_market[(row[0], row[1])]
+
+    @staticmethod
+    def _to_ticker(exchange_id, row):
+        base, target, coin_id, target_coin_id, market_name, volume, volume_usd, trust_score = row
+        return {
+            "base": base,
+            "target": target,
+            "coin_id": coin_id,
+            "target_coin_id": target_coin_id,
+            "market": {"name": market_name, "identifier": exchange_id},
+            "volume": volume,
+            "converted_volume": {"usd": volume_usd},
+            "trust_score": trust_score,
+        }
@@ -0,0 +1,73 @@
+import os
+
+EXCHANGE_POSITION_KEY = "exchange_position"  # Position of a similar exchange in the exchanges list, kept by sharded runs
+# State stores of the config, each shard gets its own copy of them
+SHARD_STATE_PATH_ATTRIBUTES = ("http_cache_dir", "checkpoint_db_path",
+                               "exchange_market_index_path", "time_series_db_path")
+
+class ExchangeShard:
+    '''
+        Deterministic partition of the exchanges to lookup: shard i of N owns the exchanges whose position in the
+        CoinGecko exchanges list (sorted by trust score) is i modulo N, so every shard gets a similar mix of
+        large and small exchanges. The union of the shards is exactly the exchanges an unsharded run looks up.
+    '''
+    def __init__(self, index, count):
+        """
+        :param index: Index of the shard, from 0 to count - 1.
+        :param count: Number of shards.
+        """
+        if count < 1:
+            raise ValueError(f"The shards count must be at least 1, got: {count}")
+        if not 0 <= index < count:
+            raise ValueError(f"The shard index must be between 0 and {count - 1}, got: {index}")
+        self.index = index
+        self.count = count
+
+    @staticmethod
+    def parse(shard):
+        """
+        Parse a shard given as "i/N", e.g. "0/4" for the first of 4 shards.
+
+        :param shard: The shard spec.
+        :return: An ExchangeShard.
+        """
+        try:
+            index, count = (int(part) for part in shard.split("/"))
+        except ValueError:
+            raise ValueError(f"Shards are given as i/N, e.g. 0/4, got: {shard}")
+        return ExchangeShard(index, count)
+
+    def owns(self, position):
+        """
+        :param position: Position of an exchange in the exchanges list, starting at 0.
+        :return: True if the exchange is looked up by this shard.
+        """
+        return position % self.count == self.index
+
+    @property
+    def name(self):
+        # Used in file names and run ids, so it has no separator
+        return f"shard-{self.index}-of-{self.count}"
+
+    def __str__(self):
+        return f"{self.index}/{self.count}"
+
+    def __eq__(self, other):
+        return isinstance(other, ExchangeShard) and (self.index, self.count) == (other.index, other.count)
+
+    def __hash__(self):
+        return hash((self.index, self.count))
+
+def shard_state_path(path, shard: ExchangeShard):
+    """
+    Path of the copy of a state store owned by a shard, next to the store of unsharded runs,
+    e.g. ./output/state/checkpoints-shard-0-of-2.sqlite.
+
+    :param path: Path of the store, a file or a directory. Empty when the store is disabled.
+    :param shard: The shard owning the copy.
+    :return: The path of the shard copy, empty if the store is disabled.
+    """
+    if not path:
+        return path
+    root, extension = os.path.splitext(path)
+    return f"{root}-{shard.name}{extension}"
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+MILLISECONDS_PER_DAY = 24 * 60 * 60 * 1000
+
+class MarketsHistoricalVolumeTableBuilder:
+    '''
+        Columnar builder of the markets historical volume table.
+        Each market_chart series is converted into typed NumPy columns in one step, the table is assembled by
+        concatenating those columns, so no Python object is created per point.
+        Dates are bucketed on the integer epoch days and formatted once per distinct day.
+    '''
+    def __init__(self):
+        self.market_codes_by_id = {}
+        self.market_codes = []
+        self.timestamps_ms = []
+        self.volumes = []
+
+    def add(self, market_id, points):
+        """
+        Add the series of a market.
+
+        :param market_id: The market id, e.g. BTC_USDT.
+        :param points: [timestamp_ms, volume] points as returned by CoinGecko.
+        """
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        market_code = self.market_codes_by_id.setdefault(market_id, len(self.market_codes_by_id))
+        self.market_codes.append(np.full(len(points), market_code, dtype=np.int32))
+        self.timestamps_ms.append(points[:, 0].astype(np.int64))
+        self.volumes.append(points[:, 1])
+
+    def build(self):
+        """
+        Assemble the table.
+
+        :return: A DataFrame with a categorical market_id, a categorical YYYY-MM-DD date and a float volume_usd
+                 column, in the order the series were added.
+        """
+        market_codes = np.concatenate(self.market_codes) if self.market_codes else np.empty(0, dtype=np.int32)
+        timestamps_ms = np.concatenate(self.timestamps_ms) if self.timestamps_ms else np.empty(0, dtype=np.int64)
+        volumes = np.concatenate(self.volumes) if self.volumes else np.empty(0, dtype=np.float64)
+
+        days, day_codes = np.unique(timestamps_ms // MILLISECONDS_PER_DAY, return_inverse=True)
+        dates = np.datetime_as_string(days.astype("datetime64[D]"), unit="D")
+
+        return pd.DataFrame({
+            "market_id": pd.Categorical.from_codes(market_codes, categories=list(self.market_codes_by_id)),
+            "date": pd.Categorical.from_codes(day_codes.astype(np.int32), categories=dates),
+            "volume_usd": volumes,
+        })
@@ -0,0 +1,237 @@
+import os
+import threading
+import logging
+import numpy as np
+import pandas as pd
+from typing import TYPE_CHECKING
+from src.constants.constants import HISTORICAL_VOLUME_DATE_FORMAT
+
+if TYPE_CHECKING:  # Optional component, imported by the runs enabling it
+    from src.adapters.volume_time_series_store import VolumeTimeSeriesStore
+
+SHORT_MOVING_AVERAGE_DAYS = 7
+LONG_MOVING_AVERAGE_DAYS = 30
+VOLATILITY_DAYS = 30
+WINDOW_STATE_DAYS = max(SHORT_MOVING_AVERAGE_DAYS, LONG_MOVING_AVERAGE_DAYS, VOLATILITY_DAYS)  # Size of the ring buffers
+NO_DAY = -1
+
+MARKETS_ROLLING_VOLUME_ANALYTICS_COLUMNS = ["market_id", "date", "volume_usd", "volume_usd_ma_7d", "volume_usd_ma_30d",
+                                            "volume_usd_change_1d", "volume_usd_volatility_30d"]
+
+class MarketsRollingVolumeAnalytics:
+    '''
+        Incremental rolling analytics of the daily volume of the markets: 7 and 30 day moving averages, day over day
+        change and 30 day volatility (standard deviation of the day over day changes), with the pandas `rolling`
+        semantics, NaN until a window is full.
+        The window state of every market is kept in NumPy ring buffers with running sums, persisted between runs,
+        so each new day is folded in O(1) per market and the history is never read again. Days are folded for
+        every market at once, vectorized across the markets.
+        A day takes the value of its last point, and the last day of each series is still open: it is folded in
+        once a later day appears. A gap in the days of a market restarts its windows.
+        With a time series store, the days of the markets are read from the store, from the first day not folded
+        yet, instead of from the lookback window of the table.
+    '''
+    def __init__(self, state_path, time_series_store: "VolumeTimeSeriesStore" = None):
+        """
+        Initialize the analytics, loading the window state saved by previous runs.
+
+        :param state_path: Path of the .npz file holding the window state of the markets.
+        :param time_series_store: Optional store holding the history of the markets, the days are read from it.
+        """
+        self.state_path = state_path
+        self.time_series_store = time_series_store
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.market_ids = []
+        self.market_rows = {}  # market id -> row of the state arrays
+        self.last_days = np.empty(0, dtype=np.int64)  # epoch day of the last folded day
+        self.days_counts = np.empty(0, dtype=np.int64)  # consecutive days folded
+        self.values = np.empty((0, WINDOW_STATE_DAYS), dtype=np.float64)  # ring of the daily volumes, slot day % size
+        self.changes = np.empty((0, WINDOW_STATE_DAYS), dtype=np.float64)  # ring of the day over day changes
+        self.short_sums = np.empty(0, dtype=np.float64)
+        self.long_sums = np.empty(0, dtype=np.float64)
+        self.change_sums = np.empty(0, dtype=np.float64)
+        self.change_squared_sums = np.empty(0, dtype=np.float64)
+        self.change_counts = np.empty(0, dtype=np.int64)  # finite changes in the volatility window
+        if os.path.exists(state_path):
+            self._load()
+
+    def update(self, markets_historical_volume):
+        """
+        Fold the days completed since the previous update into the window state, save it and compute the analytics.
+
+        :param markets_historical_volume: A DataFrame with market_id, date (YYYY-MM-DD) and volume_usd columns,
+                                          with the points of each market in ascending timestamp order.
+                                          With a time series store only its markets are read from it.
+        :return: A DataFrame with a row per market of the table having at least a completed day, holding its last
+                 completed day, its volume and its rolling analytics.
+        """
+        table_market_ids = list(dict.fromkeys(np.asarray(markets_historical_volume["market_id"], dtype=object)))
+        with self.lock:
+            if self.time_series_store is not None:
+                markets_historical_volume = self._load_unfolded_days(table_market_ids)
+            market_ids, days, volumes = self._daily_volumes(markets_historical_volume)
+            rows = np.array([self._market_row(market_id) for market_id in market_ids], dtype=np.int64)
+            folded_days_count = self._fold(rows, days, volumes)
+            self._save()
+            self.logger.info(f"Folded {folded_days_count} new days of {len(self.market_ids)} markets")
+            # Markets without a new day still report their last completed day
+            return self._analytics(np.array([self.market_rows[market_id] for market_id in table_market_ids
+                                             if market_id in self.market_rows], dtype=np.int64))
+
+    def _load_unfolded_days(self, market_ids):
+        """
+        :return: The daily volume of the markets read from the store, from the first day one of them has not
+                 folded yet, the whole history if one of them was never folded.
+        """
+        last_days = [self.last_days[self.market_rows[market_id]] if market_id in self.market_rows else NO_DAY
+                     for market_id in market_ids]
+        since_date = None
+        if market_ids and NO_DAY not in last_days:
+            since_date = str(np.datetime64(int(min(last_days)) + 1, "D"))
+        return self.time_series_store.load_markets_historical_volume(market_ids, since_date=since_date)
+
+    def _daily_volumes(self, markets_historical_volume):
+        """
+        :return: The market id, epoch day and volume of every completed day of the table, ordered by market and day.
+        """
+        # Only the distinct dates are parsed
+        dates = pd.Series(markets_historical_volume["date"]).astype("category")
+        category_days = pd.to_datetime(dates.cat.categories, format=HISTORICAL_VOLUME_DATE_FORMAT).values.astype("datetime64[D]")
+        df = pd.DataFrame({
+            "market_id": np.asarray(markets_historical_volume["market_id"], dtype=object),
+            "day": category_days.astype(np.int64)[dates.cat.codes.to_numpy()],
+            "volume_usd": np.asarray(markets_historical_volume["volume_usd"], dtype=np.float64),
+        }).dropna(subset=["volume_usd"])
+        # Points are in ascending order, so the last one of a day is its latest value
+        daily = df.drop_duplicates(subset=["market_id", "day"], keep="last").sort_values(["market_id", "day"], kind="stable")
+        open_days = daily.groupby("market_id", sort=False)["day"].transform("max")
+        daily = daily[daily["day"] < open_days]
+        return daily["market_id"].tolist(), daily["day"].to_numpy(), daily["volume_usd"].to_numpy()
+
+    def _market_row(self, market_id):
+        if market_id not in self.market_rows:
+            self.market_rows[market_id] = len(self.market_ids)
+            self.market_ids.append(market_id)
+            self._grow(1)
+        return self.market_rows[market_id]
+
+    def _fold(self, rows, days, volumes):
+        """
+        Fold the new days into the window state, the k-th new day of every market in the k-th vectorized step.
+
+        :param rows: State row of the market of every day, ordered by market and day.
+        :param days: Epoch day of every day.
+        :param volumes: Volume of every day.
+        :return: Number of days folded.
+        """
+        is_new = days > self.last_days[rows]
+        rows, days, volumes = rows[is_new], days[is_new], volumes[is_new]
+        if len(rows) == 0:
+            return 0
+        # Rank of each day among the new days of its market
+        is_first_of_market = np.r_[True, rows[1:] != rows[:-1]]
+        first_positions = np.maximum.accumulate(np.where(is_first_of_market, np.arange(len(rows)), 0))
+        ranks = np.arange(len(rows)) - first_positions
+        for rank in range(ranks.max() + 1):
+            step = ranks == rank
+            self._fold_day(rows[step], days[step], volumes[step])
+        return len(rows)
+
+    def _fold_day(self, rows, days, volumes):
+        """
+        Fold one new day of each of the given markets, in O(1) per market.
+        """
+        has_gap = (self.days_counts[rows] > 0) & (days != self.last_days[rows] + 1)
+        self._reset(rows[has_gap])
+
+        counts = self.days_counts[rows]
+        slots = counts % WINDOW_STATE_DAYS
+        self.short_sums[rows] += volumes - np.where(counts >= SHORT_MOVING_AVERAGE_DAYS,
+                                                    self.values[rows, (counts - SHORT_MOVING_AVERAGE_DAYS) % WINDOW_STATE_DAYS], 0.0)
+        self.long_sums[rows] += volumes - np.where(counts >= LONG_MOVING_AVERAGE_DAYS,
+                                                   self.values[rows, (counts - LONG_MOVING_AVERAGE_DAYS) % WINDOW_STATE_DAYS], 0.0)
+
+        previous_volumes = np.where(counts > 0, self.values[rows, (counts - 1) % WINDOW_STATE_DAYS], np.nan)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            changes = np.where(previous_volumes > 0, volumes / previous_volumes - 1, np.nan)
+        # The change of the first day is NaN, the volatility window holds the changes of the last days only
+        dropped_changes = np.where(counts >= VOLATILITY_DAYS,
+                                   self.changes[rows, (counts - VOLATILITY_DAYS) % WINDOW_STATE_DAYS], np.nan)
+        is_dropped = np.isfinite(dropped_changes)
+        is_added = np.isfinite(changes)
+        self.change_sums[rows] += np.where(is_added, changes, 0.0) - np.where(is_dropped, dropped_changes, 0.0)
+        self.change_squared_sums[rows] += np.where(is_added, changes ** 2, 0.0) - np.where(is_dropped, dropped_changes ** 2, 0.0)
+        self.change_counts[rows] += is_added.astype(np.int64) - is_dropped.astype(np.int64)
+
+        self.values[rows, slots] = volumes
+        self.changes[rows, slots] = changes
+        self.last_days[rows] = days
+        self.days_counts[rows] = counts + 1
+
+    def _analytics(self, rows):
+        rows = rows[self.days_counts[rows] > 0]
+        counts = self.days_counts[rows]
+        last_slots = (counts - 1) % WINDOW_STATE_DAYS
+        change_counts = self.change_counts[rows]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            # Sample variance from the running sums, clipped at 0 against rounding
+            variances = np.maximum((self.change_squared_sums[rows] - self.change_sums[rows] ** 2 / change_counts)
+                                   / (change_counts - 1), 0.0)
+        return pd.DataFrame({
+            "market_id": [self.market_ids[row] for row in rows],
+            "date": np.datetime_as_string(self.last_days[rows].astype("datetime64[D]"), unit="D"),
+            "volume_usd": self.values[rows, last_slots],
+            "volume_usd_ma_7d": np.where(counts >= SHORT_MOVING_AVERAGE_DAYS, self.short_sums[rows] / SHORT_MOVING_AVERAGE_DAYS, np.nan),
+            "volume_usd_ma_30d": np.where(counts >= LONG_MOVING_AVERAGE_DAYS, self.long_sums[rows] / LONG_MOVING_AVERAGE_DAYS, np.nan),
+            "volume_usd_change_1d": self.changes[rows, last_slots],
+            "volume_usd_volatility_30d": np.where(change_counts >= VOLATILITY_DAYS, np.sqrt(variances), np.nan),
+        }, columns=MARKETS_ROLLING_VOLUME_ANALYTICS_COLUMNS)
+
+    def _reset(self, rows):
+        self.days_counts[rows] = 0
+        self.values[rows] = np.nan
+        self.changes[rows] = np.nan
+        self.short_sums[rows] = 0.0
+        self.long_sums[rows] = 0.0
+        self.change_sums[rows] = 0.0
+        self.change_squared_sums[rows] = 0.0
+        self.change_counts[rows] = 0
+
+    def _grow(self, markets_count):
+        self.last_days = np.r_[self.last_days, np.full(markets_count, NO_DAY, dtype=np.int64)]
+        self.days_counts = np.r_[self.days_counts, np.zeros(markets_count, dtype=np.int64)]
+        self.values = np.vstack([self.values, np.full((markets_count, WINDOW_STATE_DAYS), np.nan)])
+        self.changes = np.vstack([self.changes, np.full((markets_count, WINDOW_STATE_DAYS), np.nan)])
+        self.short_sums = np.r_[self.short_sums, np.zeros(markets_count)]
+        self.long_sums = np.r_[self.long_sums, np.zeros(markets_count)]
+        self.change_sums = np.r_[self.change_sums, np.zeros(markets_count)]
+        self.change_squared_sums = np.r_[self.change_squared_sums, np.zeros(markets_count)]
+        self.change_counts = np.r_[self.change_counts, np.zeros(markets_count, dtype=np.int64)]
+
+    def _state_arrays(self):
+        return {
+            "last_days": self.last_days, "days_counts": self.days_counts, "values": self.values, "changes": self.changes,
+            "short_sums": self.short_sums, "long_sums": self.long_sums, "change_sums": self.change_sums,
+            "change_squared_sums": self.change_squared_sums, "change_counts": self.change_counts,
+        }
+
+    def _load(self):
+        with np.load(self.state_path, allow_pickle=False) as state:
+            if state["values"].shape[1] != WINDOW_STATE_DAYS:
+                self.logger.warning(f"Ignoring the window state at {self.state_path}, it was saved with other windows")
+                return
+            self.market_ids = state["market_ids"].tolist()
+            for name in self._state_arrays():
+                setattr(self, name, state[name])
+        self.market_rows = {market_id: row for row, market_id in enumerate(self.market_ids)}
+        self.logger.info(f"Loaded the window state of {len(self.market_ids)} markets from {self.state_path}")
+
+    def _save(self):
+        if os.path.dirname(self.state_path):
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        # Written atomically, a failed save leaves the previous state
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(f, market_ids=np.array(self.market_ids, dtype=str), **self._state_arrays())
+        os.replace(tmp_path, self.state_path)
@@ -0,0 +1,188 @@
+import json
+import threading
+import time
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Daemon states reported by the control endpoint
+DAEMON_STATE_IDLE = "idle"
+DAEMON_STATE_RUNNING = "running"
+DAEMON_STATE_STOPPED = "stopped"
+
+class PipelineDaemon:
+    '''
+        Long running service rerunning the pipeline on a fixed interval, or on demand through a local HTTP
+        control endpoint, with the dependencies built once by the DI container.
+        The pooled connections, response cache, exchange market index and historical volume store stay warm
+        between cycles, so every cycle only fetches what went stale since the previous one.
+        The control endpoint accepts POST /run to start a cycle now, POST /stop to stop after the current cycle,
+        and GET /status to report the state and the outcome of the last cycle.
+    '''
+    def __init__(self, pipeline, interval_seconds, control_address=None, clock=time.time):
+        """
+        Initialize the daemon.
+
+        :param pipeline: The CoingeckoSimilarExchangesDataPipeline to rerun.
+        :param interval_seconds: Time between the start of two scheduled cycles.
+        :param control_address: Optional (host, port) the control endpoint listens on, no endpoint if not set.
+        :param clock: Wall clock returning seconds, injectable for tests.
+        """
+        if interval_seconds <= 0:
+            raise ValueError(f"interval_seconds must be positive, got: {interval_seconds}")
+        self.pipeline = pipeline
+        self.interval_seconds = interval_seconds
+        self.control_address = control_address
+        self.clock = clock
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.trigger_event = threading.Event()  # Set to start a cycle without waiting for the interval
+        self.stop_event = threading.Event()
+        self.status_lock = threading.Lock()
+        self.control_server = None
+        self.state = DAEMON_STATE_IDLE
+        self.cycles_count = 0
+        self.failed_cycles_count = 0
+        self.last_started_at = None
+        self.last_finished_at = None
+        self.last_error = None
+        self.next_run_at = None
+
+    def run_forever(self):
+        """
+        Run a cycle right away, then one per interval or per /run request, until stopped.
+        A failed cycle is logged and the daemon keeps running, the next cycle retries it.
+        """
+        self.start_control_server()
+        try:
+            while not self.stop_event.is_set():
+                self.run_cycle()
+                self._wait_next_cycle()
+        finally:
+            self.shutdown_control_server()
+            with self.status_lock:
+                self.state = DAEMON_STATE_STOPPED
+            self.logger.info(f"Stopped after {self.cycles_count} cycles")
+
+    def run_cycle(self):
+        """
+        Run the pipeline once.
+
+        :return: True if the cycle succeeded.
+        """
+        started_at = self.clock()
+        with self.status_lock:
+            self.state = DAEMON_STATE_RUNNING
+            self.last_started_at = started_at
+            self.next_run_at = started_at + self.interval_seconds
+            cycle = self.cycles_count + 1
+        self.logger.info(f"Starting cycle {cycle}")
+
+        error = None
+        try:
+            self.pipeline.run()
+        except Exception as e:
+            self.logger.exception(f"Cycle {cycle} failed")
+            error = f"{e.__class__.__name__}: {e}"
+
+        finished_at = self.clock()
+        with self.status_lock:
+            self.state = DAEMON_STATE_IDLE
+            self.cycles_count = cycle
+            self.failed_cycles_count += error is not None
+            self.last_finished_at = finished_at
+            self.last_error = error
+        self.logger.info(f"Cycle {cycle} finished in {finished_at - started_at:.1f}s")
+        return error is None
+
+    def trigger(self):
+        """
+        Start a cycle now, or right after the cycle in progress.
+        """
+        self.trigger_event.set()
+
+    def stop(self):
+        """
+        Stop the daemon once the cycle in progress, if any, is finished.
+        """
+        self.stop_event.set()
+        self.trigger_event.set()
+
+    def status(self):
+        """
+        :return: A JSON serializable dict with the daemon state and the outcome of the last cycle.
+        """
+        with self.status_lock:
+            return {
+                "state": self.state,
+                "interval_seconds": self.interval_seconds,
+                "cycles_count": self.cycles_count,
+                "failed_cycles_count": self.failed_cycles_count,
+                "last_started_at": self.last_started_at,
+                "last_finished_at": self.last_finished_at,
+                "last_duration_seconds": None if self.last_finished_at is None or self.state == DAEMON_STATE_RUNNING \
+                    else self.last_finished_at - self.last_started_at,
+                "last_error": self.last_error,
+                "next_run_at": self.next_run_at,
+            }
+
+    def start_control_server(self):
+        """
+        Start serving the control endpoint on a background thread, if a control address is set.
+        """
+        if self.control_address is None or self.control_server is not None:
+            return
+        self.control_server = ThreadingHTTPServer(self.control_address, self._make_control_handler())
+        threading.Thread(target=self.control_server.serve_forever, name=f"{self.__class__.__name__}Control",
+                         daemon=True).start()
+        host, port = self.control_server.server_address[:2]
+        self.logger.info(f"Control endpoint listening on http://{host}:{port}")
+
+    def shutdown_control_server(self):
+        if self.control_server is not None:
+            self.control_server.shutdown()
+            self.control_server.server_close()
+            self.control_server = None
+
+    def _wait_next_cycle(self):
+        """
+        Block until the next scheduled cycle, a /run request or a stop.
+        """
+        while not self.stop_event.is_set():
+            timeout = self.next_run_at - self.clock()
+            if timeout <= 0:
+                return
+            if self.trigger_event.wait(timeout):
+                self.trigger_event.clear()
+                return
+
+    def _make_control_handler(self):
+        daemon = self
+
+        class PipelineDaemonControlHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == "/status":
+                    self._reply(200, daemon.status())
+                else:
+                    self._reply(404, {"error": f"Unknown path {self.path}"})
+
+            def do_POST(self):
+                if self.path == "/run":
+                    daemon.trigger()
+                    self._reply(202, {"triggered": True})
+                elif self.path == "/stop":
+                    daemon.stop()
+                    self._reply(202, {"stopping": True})
+                else:
+                    self._reply(404, {"error": f"Unknown path {self.path}"})
+
+            def _reply(self, status, payload):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                daemon.logger.debug(format % args)
+
+        return PipelineDaemonControlHandler
@@ -0,0 +1,78 @@
+from src.core.coingecko.coingecko_tickers_utils import find_coingecko_id
+
+def normalize_symbol(symbol):
+    """
+    Normalize a ticker symbol for matching: surrounding whitespace removed, upper case.
+
+    :param symbol: The raw symbol, may be None.
+    :return: The normalized symbol, or None.
+    """
+    return symbol.strip().upper() if symbol else None
+
+class ReferenceMarketIndex:
+    '''
+        Precomputed hash index of the reference markets, used to match CoinGecko tickers.
+        Markets are indexed on their normalized (base, target) symbols and, when both symbols
+        resolve to CoinGecko ids, on (coin_id, target_coin_id).
+        A ticker carrying coin ids that contradict the reference coin ids is not matched on its
+        symbols, so tokens reusing a well known symbol are not mistaken for the reference coin.
+    '''
+    def __init__(self, reference_markets):
+        """
+        Build the index.
+
+        :param reference_markets: Reference markets as (base, target) tuples.
+        """
+        self.markets = list(dict.fromkeys((normalize_symbol(base), normalize_symbol(target))
+                                          for base, target in reference_markets))
+        self.coin_ids = [(find_coingecko_id(base), find_coingecko_id(target)) for base, target in self.markets]
+        self.position_by_symbols = {market: position for position, market in enumerate(self.markets)}
+        self.position_by_coin_ids = {coin_ids: position for position, coin_ids in enumerate(self.coin_ids)
+                                     if None not in coin_ids}
+        # The tickers endpoint can be filtered on base coin ids, only when every reference base coin resolves
+        base_coin_ids = [base_coin_id for base_coin_id, _ in self.coin_ids]
+        self.base_coin_ids = None if None in base_coin_ids else sorted(set(base_coin_ids))
+
+    def __len__(self):
+        return len(self.markets)
+
+    def match_page(self, tickers):
+        """
+        Join a page of tickers against the index in a single pass.
+
+        :param tickers: Ticker entries as returned by the CoinGecko tickers endpoint.
+        :return: A list of (ticker_position, market_position) tuples for the matched tickers, in ticker order.
+        """
+        position_by_symbols = self.position_by_symbols
+        position_by_coin_ids = self.position_by_coin_ids
+        coin_ids = self.coin_ids
+        matches = []
+
+        for ticker_position, ticker in enumerate(tickers):
+            ticker_coin_ids = (ticker.get("coin_id"), ticker.get("target_coin_id"))
+            market_position = position_by_coin_ids.get(ticker_coin_ids)
+
+            if market_position is None:
+                market_position = position_by_symbols.get((normalize_symbol(ticker.get("base")),
+                                                           normalize_symbol(ticker.get("target"))))
+                if market_position is not None and not self._coin_ids_agree(ticker_coin_ids, coin_ids[market_position]):
+                    market_position = None
+
+            if market_position is not None:
+                matches.append((ticker_position, market_position))
+
+        return matches
+
+    @staticmethod
+    def _coin_ids_agree(ticker_coin_ids, reference_coin_ids):
+        """
+        Check that the coin ids known on both sides are the same.
+
+        :param ticker_coin_ids: (coin_id, target_coin_id) of the ticker, any side may be None.
+        :param reference_coin_ids: (coin_id, target_coin_id) of the reference market, any side may be None.
+        :return: False if a coin id is known on both sides and differs.
+        """
+        for ticker_coin_id, reference_coin_id in zip(ticker_coin_ids, reference_coin_ids):
+            if ticker_coin_id is not None and reference_coin_id is not None and ticker_coin_id != reference_coin_id:
+                return False
+        return True
@@ -0,0 +1,223 @@
+import copy
+import json
+import os
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
+import pandas as pd
+from src.config.app_config import AppConfig
+from src.core.coingecko.coingecko_data_fetcher_limits import CoingeckoDataFetcherLimits
+from src.core.coingecko.coingecko_similar_exchanges_analysis_exporter import CoingeckoSimilarExchangesDataAnalysisExporter
+from src.core.coingecko.exchange_shard import ExchangeShard, EXCHANGE_POSITION_KEY
+
+if TYPE_CHECKING:  # Optional component, imported by the runs enabling it
+    from src.core.coingecko.markets_rolling_volume_analytics import MarketsRollingVolumeAnalytics
+
+SHARD_PARTIAL_FILE_NAME_FORMAT = "{shard_name}.json"
+
+def shard_partial_path(shards_dir, shard: ExchangeShard):
+    return os.path.join(shards_dir, SHARD_PARTIAL_FILE_NAME_FORMAT.format(shard_name=shard.name))
+
+class ShardPartialExporter:
+    '''
+        Exporter of the partial results of a sharded run: the four tables of the shard, with the position of its
+        similar exchanges and the limits it ran with, written as one JSON file per shard for the merge step.
+        Drop-in replacement of the CoingeckoSimilarExchangesDataAnalysisExporter in the pipeline.
+    '''
+    def __init__(self, shards_dir, shard: ExchangeShard, limits: CoingeckoDataFetcherLimits):
+        """
+        :param shards_dir: Directory of the partial results, shared by every shard and the merge step.
+        :param shard: The shard of the run.
+        :param limits: The limits of the run, the merge step applies the same ones.
+        """
+        self.shards_dir = shards_dir
+        self.shard = shard
+        self.limits = limits
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def export(self,
+               exchanges_with_similar_markets,
+               shared_markets,
+               markets_historical_volume,
+               exchanges_historical_trade_volume):
+        partial = {
+            "shard": str(self.shard),
+            "exchanges_with_similar_trades_limit": self.limits.exchanges_with_similar_trades_limit,
+            "exchanges_to_lookup_limit": self.limits.exchanges_to_lookup_limit,
+            "exchanges_with_similar_markets": exchanges_with_similar_markets,
+            "shared_markets": [dict(shared_market) for shared_market in shared_markets],
+            # Stored by column, the history table has one row per point
+            "markets_historical_volume": pd.DataFrame(markets_historical_volume).to_dict("list"),
+            "exchanges_historical_trade_volume": [dict(volume) for volume in exchanges_historical_trade_volume],
+        }
+        path = shard_partial_path(self.shards_dir, self.shard)
+        os.makedirs(self.shards_dir, exist_ok=True)
+        # Written atomically, the merge step never reads a partial file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(partial, f)
+        os.replace(tmp_path, path)
+        self.logger.info(f"[{self.shard}] Wrote {len(exchanges_with_similar_markets)} similar exchanges to {path}")
+
+class ShardPartialsMerger:
+    '''
+        Merges the partial results of the N shards of a run into the four final tables, exactly as an unsharded
+        run would have produced them: the similar exchanges of every shard are ordered by their position in the
+        exchanges list and the first `exchanges_with_similar_trades_limit` are kept, with their shared markets,
+        market histories and trade volumes. Each shard stops after its own first similar exchanges, which are the
+        only ones of the shard that can rank in the global first ones, so no similar exchange is missed.
+    '''
+    def __init__(self, exporter: CoingeckoSimilarExchangesDataAnalysisExporter, shards_dir, shards_count,
+                 markets_rolling_analytics: "MarketsRollingVolumeAnalytics" = None):
+        """
+        :param exporter: Exporter of the merged tables.
+        :param shards_dir: Directory of the partial results.
+        :param shards_count: Number of shards of the run.
+        :param markets_rolling_analytics: Optional rolling analytics, run on the merged markets history as the
+                                          shards only hold a part of it.
+        """
+        self.exporter = exporter
+        self.shards_dir = shards_dir
+        self.shards_count = shards_count
+        self.markets_rolling_analytics = markets_rolling_analytics
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def run(self):
+        """
+        Merge the partials and export the merged tables.
+        """
+        tables = self.merge()
+        if self.markets_rolling_analytics is None:
+            self.exporter.export(*tables)
+        else:
+            self.exporter.export(*tables, markets_rolling_analytics=self.markets_rolling_analytics.update(tables[2]))
+
+    def merge(self):
+        """
+        Merge the partials of every shard.
+
+        :return: A tuple (exchanges_with_similar_markets, shared_markets, markets_historical_volume,
+                 exchanges_historical_trade_volume), in the shape the pipeline exports.
+        :raises ValueError: If the partial of a shard is missing or the shards ran with different limits.
+        """
+        partials = self._load_partials()
+        similar_exchanges_limit = partials[0]["exchanges_with_similar_trades_limit"]
+
+        similar_exchanges = sorted((similar_exchange for partial in partials
+                                    for similar_exchange in partial["exchanges_with_similar_markets"]),
+                                   key=lambda similar_exchange: similar_exchange[EXCHANGE_POSITION_KEY])[:similar_exchanges_limit]
+        exchange_ranks = {similar_exchange["exchange_id"]: rank for rank, similar_exchange in enumerate(similar_exchanges)}
+        self.logger.info(f"Merged {len(similar_exchanges)} similar exchanges from {len(partials)} shards")
+
+        # Partials list the rows of each exchange contiguously, the stable sort keeps their order within the exchange
+        shared_markets = sorted((shared_market for partial in partials for shared_market in partial["shared_markets"]
+                                 if shared_market["exchange_id"] in exchange_ranks),
+                                key=lambda shared_market: exchange_ranks[shared_market["exchange_id"]])
+        exchanges_historical_trade_volume = sorted(
+            (volume for partial in partials for volume in partial["exchanges_historical_trade_volume"]
+             if volume["exchange_id"] in exchange_ranks),
+            key=lambda volume: exchange_ranks[volume["exchange_id"]])
+        markets_historical_volume = self._merge_markets_historical_volume(partials, shared_markets, exchange_ranks)
+
+        exchanges_with_similar_markets = [{key: value for key, value in similar_exchange.items() if key != EXCHANGE_POSITION_KEY}
+                                          for similar_exchange in similar_exchanges]
+        return exchanges_with_similar_markets, shared_markets, markets_historical_volume, exchanges_historical_trade_volume
+
+    def _merge_markets_historical_volume(self, partials, shared_markets, exchange_ranks):
+        """
+        Take the history of every merged market, in first seen order, from the shard of the first similar exchange
+        listing it, which fetched it.
+
+        :return: A DataFrame with market_id, date and volume_usd columns.
+        """
+        partial_by_exchange_id = {similar_exchange["exchange_id"]: partial for partial in partials
+                                  for similar_exchange in partial["exchanges_with_similar_markets"]
+                                  if similar_exchange["exchange_id"] in exchange_ranks}
+        market_tables = []
+        markets_processed = set()
+        history_tables = {}
+        for shared_market in shared_markets:
+            market_id = shared_market["market_id"]
+            if market_id in markets_processed:
+                continue
+            markets_processed.add(market_id)
+            partial = partial_by_exchange_id[shared_market["exchange_id"]]
+            if partial["shard"] not in history_tables:
+                history_tables[partial["shard"]] = pd.DataFrame(partial["markets_historical_volume"],
+                                                                columns=["market_id", "date", "volume_usd"])
+            history_table = history_tables[partial["shard"]]
+            market_tables.append(history_table[history_table["market_id"] == market_id])
+
+        if not market_tables:
+            return pd.DataFrame(columns=["market_id", "date", "volume_usd"])
+        return pd.concat(market_tables, ignore_index=True).astype({"market_id": "category", "date": "category"})
+
+    def _load_partials(self):
+        shards = [ExchangeShard(index, self.shards_count) for index in range(self.shards_count)]
+        missing_shards = [str(shard) for shard in shards if not os.path.exists(shard_partial_path(self.shards_dir, shard))]
+        if missing_shards:
+            raise ValueError(f"Missing the partial results of the shards {', '.join(missing_shards)} in {self.shards_dir}")
+
+        partials = []
+        for shard in shards:
+            with open(shard_partial_path(self.shards_dir, shard)) as f:
+                partials.append(json.load(f))
+        limits = {(partial["exchanges_with_similar_trades_limit"], partial["exchanges_to_lookup_limit"]) for partial in partials}
+        if len(limits) > 1:
+            raise ValueError(f"The shards ran with different limits, they cannot be merged: {sorted(limits)}")
+        return partials
+
+def run_shard(app_config: AppConfig):
+    """
+    Run the pipeline of one shard, in a fresh process of the local pool.
+
+    :param app_config: The config of the run, with the shard set.
+    :return: The shard, as "i/N".
+    """
+    # Imported here, the DI container imports this module
+    from src.di.di_container import DIContainer
+    logging.basicConfig(level=getattr(logging, app_config.log_level.upper(), logging.INFO),
+                        format=f"[{app_config.shard}] %(levelname)s:%(name)s:%(message)s")
+    di_container = DIContainer(app_config)
+    di_container.init_deps()
+    di_container.coingecko_similar_exchanges_data_pipeline.run()
+    return app_config.shard
+
+def local_shard_configs(app_config: AppConfig, shards_count):
+    """
+    Build the configs of the shards of a local run, each shard process gets its own copy of the state stores
+    from the DI container.
+
+    :param app_config: The config of the run.
+    :param shards_count: Number of shards.
+    :return: A list with the config of every shard.
+    """
+    shard_configs = []
+    for index in range(shards_count):
+        shard = ExchangeShard(index, shards_count)
+        shard_config = copy.copy(app_config)
+        shard_config.shard = str(shard)
+        shard_config.local_shards = 0
+        shard_config.merge_shards = 0
+        shard_config.daemon_interval_minutes = 0
+        shard_configs.append(shard_config)
+    return shard_configs
+
+def run_local_shards(app_config: AppConfig, shards_count):
+    """
+    Run every shard of a run in a local pool of processes, one per shard, so the ticker matching of each shard
+    runs on its own core. The partials are left in the shards dir for the merge step.
+
+    :param app_config: The config of the run.
+    :param shards_count: Number of shards.
+    :raises Exception: The error of the first failed shard, once every shard finished.
+    """
+    shard_configs = local_shard_configs(app_config, shards_count)
+
+    logger = logging.getLogger("run_local_shards")
+    logger.info(f"Running {shards_count} shards in local processes")
+    # Spawned processes do not inherit the threads and connections of the parent
+    with ProcessPoolExecutor(max_workers=shards_count, mp_context=multiprocessing.get_context("spawn")) as executor:
+        for shard in executor.map(run_shard, shard_configs):
+            logger.info(f"Shard {shard} finished")
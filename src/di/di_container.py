@@ -1,30 +1,105 @@
 import os
-import boto3
+import copy
 import logging
 from src.adapters.coingecko_api import CoingeckoAPI
 from src.core.coingecko.coingecko_similar_exchanges_data_pipeline import CoingeckoSimilarExchangesDataPipeline
 from src.core.coingecko.coingecko_data_analyzer import CoingeckoSimilarExchangesDataAnalyzer
 from src.core.coingecko.coingecko_data_analyzer import CoingeckoDataFetcherLimits
 from src.core.coingecko.coingecko_similar_exchanges_analysis_exporter import CoingeckoSimilarExchangesDataAnalysisExporter
-from src.adapters.s3_handler import S3Handler
-from src.constants.constants import AWS_REQUIRED_CONFIGS
+from src.adapters.http_response_cache import HTTPResponseCache
+from src.adapters.pipeline_checkpoint_store import PipelineCheckpointStore
+from src.core.coingecko.exchange_market_index import ExchangeMarketIndex
+from src.core.coingecko.exchange_shard import ExchangeShard, SHARD_STATE_PATH_ATTRIBUTES, shard_state_path
+from src.utils.http_metrics import HTTPMetricsRegistry
+from src.utils.token_bucket_rate_limiter import TokenBucketRateLimiter
+from src.utils.aimd_concurrency_controller import AIMDConcurrencyController
+from src.utils.startup_profiler import StartupProfiler
+from src.constants.constants import AWS_REQUIRED_CONFIGS, S3_TRANSFER_MAX_CONCURRENCY
 from src.config.app_config import AppConfig
 
+# boto3, the Parquet writer, the concurrent analyzer, the daemon, the shards and the optional stores and analytics
+# are imported by the branches using them, runs that do not need them do not pay for their import. pandas imports
+# pyarrow on its own when it is installed, runs without Parquet only do not require it
 
 class DIContainer:
-    def __init__(self, app_config: AppConfig):
+    def __init__(self, app_config: AppConfig, startup_profiler: StartupProfiler = None):
         self.app_config = app_config
+        self.startup_profiler = startup_profiler  # Optional, times the initialization of every component
         self.logger = logging.getLogger(self.__class__.__name__)
 
     def init_deps(self):
+        if self.app_config.shard:
+            self.shard = ExchangeShard.parse(self.app_config.shard)
+            self.logger.info(f"Running shard {self.shard} of the exchanges")
+            # Shards running at the same time, in the local pool or as Airflow mapped tasks, keep their state apart:
+            # the stores keep their high-water marks, indexes and cache metadata in the memory of each process
+            self.app_config = copy.copy(self.app_config)
+            for attribute in SHARD_STATE_PATH_ATTRIBUTES:
+                setattr(self.app_config, attribute, shard_state_path(getattr(self.app_config, attribute), self.shard))
+            if self.app_config.run_id:
+                self.app_config.run_id = f"{self.app_config.run_id}-{self.shard.name}"
+            if self.app_config.metrics_dir:
+                self.app_config.metrics_dir = os.path.join(self.app_config.metrics_dir, self.shard.name)
+        else:
+            self.shard = None
+
+        if self.app_config.rate_limiter_calls_per_minute > 0:
+            self.logger.info(f"Initializing TokenBucketRateLimiter at {self.app_config.rate_limiter_calls_per_minute} calls/minute...")
+            self.rate_limiter = TokenBucketRateLimiter(self.app_config.rate_limiter_calls_per_minute,
+                                                       burst=self.app_config.rate_limiter_burst)
+        else:
+            self.logger.info("Skipping client side rate limiter")
+            self.rate_limiter = None
+        self._profile_lap("TokenBucketRateLimiter")
+
+        if self.app_config.http_cache_dir:
+            self.logger.info(f"Initializing HTTPResponseCache at {self.app_config.http_cache_dir}...")
+            self.response_cache = HTTPResponseCache(self.app_config.http_cache_dir,
+                                                    max_size_bytes=self.app_config.http_cache_max_size_mb * 1024 * 1024)
+        else:
+            self.logger.info("Skipping HTTP response cache")
+            self.response_cache = None
+        self._profile_lap("HTTPResponseCache")
+
+        if self.app_config.metrics_dir:
+            self.logger.info("Initializing HTTPMetricsRegistry...")
+            self.http_metrics = HTTPMetricsRegistry()
+        else:
+            self.logger.info("Skipping HTTP metrics")
+            self.http_metrics = None
+        self._profile_lap("HTTPMetricsRegistry")
+
+        if self.app_config.adaptive_concurrency:
+            self.logger.info(f"Initializing AIMDConcurrencyController up to {self.app_config.max_concurrent_requests} requests in flight...")
+            self.concurrency_controller = AIMDConcurrencyController(max(self.app_config.max_concurrent_requests, 1))
+        else:
+            self.concurrency_controller = None
+        self._profile_lap("AIMDConcurrencyController")
+
         self.logger.info("Initializing CoingeckoAPI...")
-        self.coingecko_api = CoingeckoAPI(rate_limiter_retries=self.app_config.rate_limiter_max_retries)
+        # The pool must hold at least one connection per concurrent request to avoid reconnecting
+        self.coingecko_api = CoingeckoAPI(rate_limiter_retries=self.app_config.rate_limiter_max_retries,
+                                          pool_size=max(self.app_config.http_pool_size, self.app_config.max_concurrent_requests),
+                                          connect_timeout_seconds=self.app_config.http_connect_timeout_seconds,
+                                          read_timeout_seconds=self.app_config.http_read_timeout_seconds,
+                                          rate_limiter=self.rate_limiter,
+                                          response_cache=self.response_cache,
+                                          prefetch_next_page=self.app_config.prefetch_next_page,
+                                          base_url=self.app_config.coingecko_base_url,
+                                          metrics=self.http_metrics,
+                                          stream_tickers=self.app_config.stream_tickers,
+                                          concurrency_controller=self.concurrency_controller)
         self.logger.info("CoingeckoAPI initialized succesfully.")
+        self._profile_lap("CoingeckoAPI")
 
         self.logger.info("Initializing S3Handler...")
 
         # AWS client initialization
         if self.app_config.write_to_s3:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config as BotoConfig
+            from src.adapters.s3_handler import S3Handler
             aws_bucket = os.environ.get("AWS_BUCKET", "")
 
             self.logger.info("Initializing S3 boto client")
@@ -34,38 +109,165 @@ class DIContainer:
                 aws_access_key_id=os.environ.get("AWS_ACCESS_KEY_ID", ""),
                 aws_secret_access_key=os.environ.get("AWS_SECRET_ACCESS_KEY", ""),
                 region_name=os.environ.get("AWS_REGION", ""),
+                # Every concurrent upload may send several parts of a multipart upload in parallel
+                config=BotoConfig(max_pool_connections=self.app_config.s3_max_concurrent_uploads * \
+                                  S3_TRANSFER_MAX_CONCURRENCY),
             )
             self.logger.info("S3 boto client initialized succesfully.")   
 
             self.logger.info("Initializing S3Handler")
             self.s3_handler = S3Handler(
                 s3_client=self.s3_client,
-                bucket_name=aws_bucket
+                bucket_name=aws_bucket,
+                transfer_config=TransferConfig(
+                    multipart_threshold=self.app_config.s3_multipart_chunksize_mb * 1024 * 1024,
+                    multipart_chunksize=self.app_config.s3_multipart_chunksize_mb * 1024 * 1024,
+                    max_concurrency=S3_TRANSFER_MAX_CONCURRENCY),
+                max_concurrent_uploads=self.app_config.s3_max_concurrent_uploads
             )
             self.logger.info("S3Handler initialized succesfully.")
         else:
             self.logger.info("Skipping S3 client and handler")
             self.s3_client = None
             self.s3_handler = None
+        self._profile_lap("S3Handler")
+
+        if self.app_config.parquet_compression:
+            self.logger.info(f"Initializing ParquetDatasetWriter with {self.app_config.parquet_compression} compression...")
+            from src.utils.parquet_dataset_writer import ParquetDatasetWriter
+            self.parquet_writer = ParquetDatasetWriter(self.app_config.parquet_compression)
+            self.logger.info("ParquetDatasetWriter initialized succesfully.")
+        else:
+            self.parquet_writer = None
+        self._profile_lap("ParquetDatasetWriter")
+
+        if self.app_config.time_series_db_path:
+            self.logger.info(f"Initializing VolumeTimeSeriesStore at {self.app_config.time_series_db_path}...")
+            from src.adapters.volume_time_series_store import VolumeTimeSeriesStore
+            self.time_series_store = VolumeTimeSeriesStore(self.app_config.time_series_db_path)
+            self.logger.info("VolumeTimeSeriesStore initialized succesfully.")
+        else:
+            self.logger.info("Skipping volume time series store")
+            self.time_series_store = None
+        self._profile_lap("VolumeTimeSeriesStore")
+        # The analyzer stores the fetched market histories in the time series store, and only fetches the newer points
+        self.historical_volume_store = self.time_series_store
 
         self.logger.info("Initializing CoingeckoDataAnalysisExporter...")
         self.coingecko_data_analysis_exporter = CoingeckoSimilarExchangesDataAnalysisExporter( \
-            self.app_config, self.s3_handler)
+            self.app_config, self.s3_handler, self.parquet_writer, self.time_series_store)
         self.logger.info("CoingeckoDataAnalysisExporter initialized succesfully.")   
+        self._profile_lap("CoingeckoDataAnalysisExporter")
+
+        # Shards hold a part of the markets history only, the analytics run on the merged one
+        if self.app_config.rolling_analytics_state_path and self.shard is None:
+            # The shards keep the points of their markets in their own stores, merge runs fold the merged table
+            # into their own window state, so the windows of a mode are never fed by the other one
+            rolling_analytics_state_path = self.app_config.rolling_analytics_state_path
+            rolling_analytics_store = self.time_series_store
+            if self.app_config.merge_shards or self.app_config.local_shards:
+                root, extension = os.path.splitext(rolling_analytics_state_path)
+                rolling_analytics_state_path = f"{root}-merged{extension}"
+                rolling_analytics_store = None
+            self.logger.info(f"Initializing MarketsRollingVolumeAnalytics at {rolling_analytics_state_path}...")
+            from src.core.coingecko.markets_rolling_volume_analytics import MarketsRollingVolumeAnalytics
+            self.markets_rolling_analytics = MarketsRollingVolumeAnalytics(rolling_analytics_state_path, \
+                                                                           rolling_analytics_store)
+            self.logger.info("MarketsRollingVolumeAnalytics initialized succesfully.")
+        else:
+            self.logger.info("Skipping markets rolling volume analytics")
+            self.markets_rolling_analytics = None
+        self._profile_lap("MarketsRollingVolumeAnalytics")
+
+        if self.app_config.run_id:
+            self.logger.info(f"Initializing PipelineCheckpointStore for run {self.app_config.run_id} at {self.app_config.checkpoint_db_path}...")
+            self.checkpoint_store = PipelineCheckpointStore(self.app_config.checkpoint_db_path, self.app_config.run_id)
+        else:
+            self.logger.info("Skipping checkpoints, no run id")
+            self.checkpoint_store = None
+        self._profile_lap("PipelineCheckpointStore")
+
+        if self.app_config.exchange_market_index_path:
+            self.logger.info(f"Initializing ExchangeMarketIndex at {self.app_config.exchange_market_index_path}...")
+            self.exchange_market_index = ExchangeMarketIndex(self.app_config.exchange_market_index_path,
+                                                             ttl_seconds=self.app_config.exchange_market_index_ttl_hours * 60 * 60)
+        else:
+            self.logger.info("Skipping exchange market index")
+            self.exchange_market_index = None
+        self._profile_lap("ExchangeMarketIndex")
 
         self.logger.info("Initializing CoingeckoDataAnalyzer...")
-        self.coingecko_data_analyzer = CoingeckoSimilarExchangesDataAnalyzer(self.coingecko_api, \
-                                                CoingeckoDataFetcherLimits( \
+        coingecko_data_fetcher_limits = CoingeckoDataFetcherLimits( \
                                                    self.app_config.exchanges_with_similar_trades_to_analyze, \
                                                     self.app_config.exchanges_to_analyze_limit \
-                                                    ))
+                                                    )
+        if self.app_config.max_concurrent_requests > 1:
+            self.logger.info(f"Using concurrent analyzer with up to {self.app_config.max_concurrent_requests} requests in flight")
+            from src.adapters.async_coingecko_api import AsyncCoingeckoAPI
+            from src.core.coingecko.async_coingecko_data_analyzer import AsyncCoingeckoSimilarExchangesDataAnalyzer
+            self.async_coingecko_api = AsyncCoingeckoAPI(self.coingecko_api, self.app_config.max_concurrent_requests)
+            self.coingecko_data_analyzer = AsyncCoingeckoSimilarExchangesDataAnalyzer(self.coingecko_api, \
+                                                self.async_coingecko_api, \
+                                                coingecko_data_fetcher_limits, \
+                                                self.historical_volume_store, \
+                                                self.checkpoint_store, \
+                                                self.exchange_market_index, \
+                                                self.shard)
+        else:
+            self.async_coingecko_api = None
+            self.coingecko_data_analyzer = CoingeckoSimilarExchangesDataAnalyzer(self.coingecko_api, \
+                                                coingecko_data_fetcher_limits, \
+                                                self.historical_volume_store, \
+                                                self.checkpoint_store, \
+                                                self.exchange_market_index, \
+                                                self.shard)
         self.logger.info("CoingeckoDataAnalyzer initialized succesfully.")        
+        self._profile_lap("CoingeckoDataAnalyzer")
+
+        if self.shard is not None:
+            self.logger.info(f"Initializing ShardPartialExporter at {self.app_config.shards_dir}...")
+            from src.core.coingecko.shard_partials import ShardPartialExporter
+            pipeline_exporter = ShardPartialExporter(self.app_config.shards_dir, self.shard, coingecko_data_fetcher_limits)
+        else:
+            pipeline_exporter = self.coingecko_data_analysis_exporter
 
         self.logger.info("Initializing CoingeckoSimilarExchangesDataPipeline...")
         self.coingecko_similar_exchanges_data_pipeline = CoingeckoSimilarExchangesDataPipeline(self.coingecko_data_analyzer,
-                                                                        self.coingecko_data_analysis_exporter,
-                                                                        self.app_config)
+                                                                        pipeline_exporter,
+                                                                        self.app_config,
+                                                                        self.http_metrics,
+                                                                        self.checkpoint_store,
+                                                                        self.markets_rolling_analytics)
         self.logger.info("CoingeckoSimilarExchangesDataPipeline initialized succesfully.")        
+        self._profile_lap("CoingeckoSimilarExchangesDataPipeline")
+
+        if self.app_config.daemon_interval_minutes > 0:
+            self.logger.info(f"Initializing PipelineDaemon every {self.app_config.daemon_interval_minutes} minutes...")
+            from src.core.coingecko.pipeline_daemon import PipelineDaemon
+            control_address = (self.app_config.daemon_control_host, self.app_config.daemon_control_port) \
+                if self.app_config.daemon_control_port else None
+            self.pipeline_daemon = PipelineDaemon(self.coingecko_similar_exchanges_data_pipeline,
+                                                  interval_seconds=self.app_config.daemon_interval_minutes * 60,
+                                                  control_address=control_address)
+            self.logger.info("PipelineDaemon initialized succesfully.")
+        else:
+            self.pipeline_daemon = None
+        self._profile_lap("PipelineDaemon")
+
+        shards_to_merge = self.app_config.merge_shards or self.app_config.local_shards
+        if shards_to_merge > 0:
+            self.logger.info(f"Initializing ShardPartialsMerger of {shards_to_merge} shards at {self.app_config.shards_dir}...")
+            from src.core.coingecko.shard_partials import ShardPartialsMerger
+            self.shard_partials_merger = ShardPartialsMerger(self.coingecko_data_analysis_exporter,
+                                                             self.app_config.shards_dir, shards_to_merge,
+                                                             self.markets_rolling_analytics)
+        else:
+            self.shard_partials_merger = None
+        self._profile_lap("ShardPartialsMerger")
+
+    def _profile_lap(self, component):
+        if self.startup_profiler is not None:
+            self.startup_profiler.lap(component)
 
     def validate_aws_config(self):
         for aws_config in AWS_REQUIRED_CONFIGS:
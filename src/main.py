@@ -1,13 +1,15 @@
 import argparse
 import logging
+import signal
 import sys
 import json
 import logging
-from src.core.coingecko.coingecko_similar_exchanges_data_pipeline import CoingeckoSimilarExchangesDataPipeline
 from src.constants.constants import *
-from src.di.di_container import DIContainer
 from src.config.app_config import AppConfig
 from src.utils.app_config_utils import AppConfigUtils
+from src.utils.startup_profiler import StartupProfiler
+# The DI container and the dependency graph it imports are only imported once the arguments are parsed,
+# see the __main__ block
 
 def parse_args():
     # Create the parser
@@ -25,10 +27,96 @@ def parse_args():
                          help=f"Number of days to lookback when calculating historical volume data (default: {HISTORICAL_DATA_LOOKBACK_DAYS_DEFAULT})") 
         
 
+    parser.add_argument("--rate_limiter_calls_per_minute", type=float, default=RATE_LIMITER_CALLS_PER_MINUTE_DEFAULT,\
+                         help=f"Maximum sustained CoinGecko calls per minute across all endpoints, 0 disables client side rate limiting (default: {RATE_LIMITER_CALLS_PER_MINUTE_DEFAULT})")
+
+    parser.add_argument("--rate_limiter_burst", type=int, default=RATE_LIMITER_BURST_DEFAULT,\
+                         help=f"Maximum number of CoinGecko calls sent back to back after an idle period (default: {RATE_LIMITER_BURST_DEFAULT})")
+
+    parser.add_argument("--max_concurrent_requests", type=int, default=MAX_CONCURRENT_REQUESTS_DEFAULT,\
+                         help=f"Maximum number of CoinGecko requests in flight at the same time, 1 disables concurrency (default: {MAX_CONCURRENT_REQUESTS_DEFAULT})")
+
+    parser.add_argument("--adaptive_concurrency", action="store_true", help="If the number of CoinGecko requests in flight adapts to 429s and latency, up to max_concurrent_requests")
+
+    parser.add_argument("--coingecko_base_url", type=str, default=COINGECKO_BASE_URL_DEFAULT,\
+                         help=f"Base URL of the CoinGecko API (default: {COINGECKO_BASE_URL_DEFAULT})")
+
+    parser.add_argument("--http_pool_size", type=int, default=HTTP_POOL_SIZE_DEFAULT,\
+                         help=f"Maximum number of keep-alive connections kept open to the CoinGecko API (default: {HTTP_POOL_SIZE_DEFAULT})")
+
+    parser.add_argument("--http_connect_timeout_seconds", type=float, default=HTTP_CONNECT_TIMEOUT_SECONDS_DEFAULT,\
+                         help=f"Timeout to connect to the CoinGecko API, per call (default: {HTTP_CONNECT_TIMEOUT_SECONDS_DEFAULT})")
+
+    parser.add_argument("--http_read_timeout_seconds", type=float, default=HTTP_READ_TIMEOUT_SECONDS_DEFAULT,\
+                         help=f"Timeout waiting for data from the CoinGecko API, per call (default: {HTTP_READ_TIMEOUT_SECONDS_DEFAULT})")
+
+    parser.add_argument("--http_cache_dir", type=str, default=HTTP_CACHE_DIR_DEFAULT,\
+                         help="Directory of the persistent CoinGecko response cache, e.g. ./output/cache/http (default: empty, disabled)")
+
+    parser.add_argument("--http_cache_max_size_mb", type=int, default=HTTP_CACHE_MAX_SIZE_MB_DEFAULT,\
+                         help=f"Maximum size of the response cache, least recently used entries are evicted first (default: {HTTP_CACHE_MAX_SIZE_MB_DEFAULT})")
+
+    parser.add_argument("--prefetch_next_page", action="store_true", help="If paginated CoinGecko endpoints fetch the next page while the current one is processed")
+
+    parser.add_argument("--stream_tickers", action="store_true", help="If ticker pages are decoded incrementally while they are received, keeping only the fields the analysis reads")
+
+    parser.add_argument("--rolling_analytics_state_path", type=str, default=ROLLING_ANALYTICS_STATE_PATH_DEFAULT,\
+                         help="File where the window state of the markets rolling volume analytics is kept between runs, e.g. ./output/state/markets_rolling_analytics.npz, merge runs keep theirs next to it with a -merged suffix (default: empty, disabled)")
+
+    parser.add_argument("--parquet_compression", type=str, default=PARQUET_COMPRESSION_DEFAULT,\
+                         help=f"Compression codec of the Parquet tables exported next to the CSV files, empty disables the Parquet export (default: {PARQUET_COMPRESSION_DEFAULT})")
+
+    parser.add_argument("--time_series_db_path", type=str, default=TIME_SERIES_DB_PATH_DEFAULT,\
+                         help="SQLite database where the volume histories are kept between runs so only new market points are fetched, e.g. ./output/state/volume_time_series.sqlite (default: empty, disabled)")
+
+    parser.add_argument("--s3_max_concurrent_uploads", type=int, default=S3_MAX_CONCURRENT_UPLOADS_DEFAULT,\
+                         help=f"Maximum number of output files uploaded to S3 at the same time (default: {S3_MAX_CONCURRENT_UPLOADS_DEFAULT})")
+
+    parser.add_argument("--s3_multipart_chunksize_mb", type=int, default=S3_MULTIPART_CHUNKSIZE_MB_DEFAULT,\
+                         help=f"Size of the parts of multipart S3 uploads, larger files are uploaded in parallel parts (default: {S3_MULTIPART_CHUNKSIZE_MB_DEFAULT})")
+
+    parser.add_argument("--metrics_dir", type=str, default=METRICS_DIR_DEFAULT,\
+                         help=f"Directory where per endpoint HTTP metrics are written at the end of a run as JSON and Prometheus textfile, empty disables them (default: {METRICS_DIR_DEFAULT})")
+
+    parser.add_argument("--exchange_market_index_path", type=str, default=EXCHANGE_MARKET_INDEX_PATH_DEFAULT,\
+                         help="SQLite database of the index of the markets listed by each exchange, kept between runs so exchanges indexed within the TTL are not scanned again, e.g. ./output/state/exchange_market_index.sqlite (default: empty, disabled)")
+
+    parser.add_argument("--exchange_market_index_ttl_hours", type=float, default=EXCHANGE_MARKET_INDEX_TTL_HOURS_DEFAULT,\
+                         help=f"Age after which the indexed markets of an exchange are scanned again (default: {EXCHANGE_MARKET_INDEX_TTL_HOURS_DEFAULT})")
+
+    parser.add_argument("--run_id", type=str, default=RUN_ID_DEFAULT,\
+                         help="Id of the run, a rerun with the same id resumes from the units of work already completed, empty disables checkpointing")
+
+    parser.add_argument("--checkpoint_db_path", type=str, default=CHECKPOINT_DB_PATH_DEFAULT,\
+                         help=f"SQLite database where the runs checkpoint their completed units of work (default: {CHECKPOINT_DB_PATH_DEFAULT})")
+
+    parser.add_argument("--daemon_interval_minutes", type=float, default=DAEMON_INTERVAL_MINUTES_DEFAULT,\
+                         help=f"Keep running and rerun the pipeline every this many minutes with warm caches and connections, 0 runs it once (default: {DAEMON_INTERVAL_MINUTES_DEFAULT})")
+
+    parser.add_argument("--daemon_control_host", type=str, default=DAEMON_CONTROL_HOST_DEFAULT,\
+                         help=f"Host the daemon control endpoint listens on (default: {DAEMON_CONTROL_HOST_DEFAULT})")
+
+    parser.add_argument("--daemon_control_port", type=int, default=DAEMON_CONTROL_PORT_DEFAULT,\
+                         help=f"Port of the daemon control endpoint (POST /run, POST /stop, GET /status), 0 disables it (default: {DAEMON_CONTROL_PORT_DEFAULT})")
+
+    parser.add_argument("--shard", type=str, default=SHARD_DEFAULT,\
+                         help="Shard of the exchanges to lookup run by this process, as i/N (e.g. 0/4), the partial results are written to the shards dir for the merge step")
+
+    parser.add_argument("--shards_dir", type=str, default=SHARDS_DIR_DEFAULT,\
+                         help=f"Directory of the partial results of the shards, shared by the shards and the merge step (default: {SHARDS_DIR_DEFAULT})")
+
+    parser.add_argument("--merge_shards", type=int, default=MERGE_SHARDS_DEFAULT,\
+                         help="Merge the partial results of this many shards into the final tables and export them, instead of running the pipeline")
+
+    parser.add_argument("--local_shards", type=int, default=LOCAL_SHARDS_DEFAULT,\
+                         help="Run the pipeline as this many shards in a local pool of processes, then merge them, 0 runs a single process")
+
     parser.add_argument("--write_to_s3", action="store_true", help="If the output files should be uploaded to s3") 
 
     parser.add_argument("--log_level", type=str, default=LOGGING_DEFAULT_LEVEL, help="Application log level (info, debug, error, ...)")     
 
+    parser.add_argument("--profile_startup", action="store_true", help="If the import time of every module and the initialization time of every DI component are reported on stderr") 
+
     parser.add_argument("--config", type=str, default="", help="Config file with all configs (overrides previous args)") 
 
     return parser.parse_args()
@@ -38,8 +126,7 @@ def create_config_from_args(args):
     if args.config and args.config != "":
         try:
             with open(args.config, 'r') as f:
-                config_args = json.load(f)
-                return AppConfigUtils.from_json(config_args)
+                return AppConfigUtils.from_json(f.read())
         except Exception as e:
             print(f"Error loading configuration file: {e}", file=sys.stderr)
             sys.exit(1)
@@ -50,7 +137,36 @@ def create_config_from_args(args):
             log_level=args.log_level, \
             exchanges_with_similar_trades_to_analyze=args.exchanges_with_similar_trades_to_analyze, \
             exchanges_to_analyze_limit=args.exchanges_to_analyze_limit, \
-            write_to_s3=args.write_to_s3 \
+            write_to_s3=args.write_to_s3, \
+            max_concurrent_requests=args.max_concurrent_requests, \
+            http_pool_size=args.http_pool_size, \
+            http_connect_timeout_seconds=args.http_connect_timeout_seconds, \
+            http_read_timeout_seconds=args.http_read_timeout_seconds, \
+            rate_limiter_calls_per_minute=args.rate_limiter_calls_per_minute, \
+            rate_limiter_burst=args.rate_limiter_burst, \
+            http_cache_dir=args.http_cache_dir, \
+            http_cache_max_size_mb=args.http_cache_max_size_mb, \
+            prefetch_next_page=args.prefetch_next_page, \
+            parquet_compression=args.parquet_compression, \
+            s3_max_concurrent_uploads=args.s3_max_concurrent_uploads, \
+            s3_multipart_chunksize_mb=args.s3_multipart_chunksize_mb, \
+            coingecko_base_url=args.coingecko_base_url, \
+            metrics_dir=args.metrics_dir, \
+            run_id=args.run_id, \
+            checkpoint_db_path=args.checkpoint_db_path, \
+            exchange_market_index_path=args.exchange_market_index_path, \
+            exchange_market_index_ttl_hours=args.exchange_market_index_ttl_hours, \
+            stream_tickers=args.stream_tickers, \
+            daemon_interval_minutes=args.daemon_interval_minutes, \
+            daemon_control_host=args.daemon_control_host, \
+            daemon_control_port=args.daemon_control_port, \
+            shard=args.shard, \
+            shards_dir=args.shards_dir, \
+            merge_shards=args.merge_shards, \
+            local_shards=args.local_shards, \
+            adaptive_concurrency=args.adaptive_concurrency, \
+            time_series_db_path=args.time_series_db_path, \
+            rolling_analytics_state_path=args.rolling_analytics_state_path \
         )
     
 if __name__ == "__main__":
@@ -61,9 +177,35 @@ if __name__ == "__main__":
     # Set log levels
     logging.basicConfig(level=getattr(logging, app_config.log_level.upper(), LOGGING_DEFAULT_LEVEL)) 
 
+    # Local sharded runs write the partials of every shard first, they are merged below
+    if app_config.local_shards > 0:
+        from src.core.coingecko.shard_partials import run_local_shards
+        run_local_shards(app_config, app_config.local_shards)
+
     # Init dependencies
-    di_container = DIContainer(app_config)
+    startup_profiler = None
+    if args.profile_startup:
+        startup_profiler = StartupProfiler()
+        startup_profiler.start_import_tracking()
+
+    from src.di.di_container import DIContainer
+    if startup_profiler is not None:
+        startup_profiler.lap("import DIContainer")
+
+    di_container = DIContainer(app_config, startup_profiler)
     di_container.init_deps()
 
+    if startup_profiler is not None:
+        startup_profiler.stop_import_tracking()
+        print(startup_profiler.report(), file=sys.stderr)
+
     # Run app 
-    di_container.coingecko_similar_exchanges_data_pipeline.run()
\ No newline at end of file
+    if di_container.shard_partials_merger is not None:
+        di_container.shard_partials_merger.run()
+    elif di_container.pipeline_daemon is not None:
+        # Finish the cycle in progress on termination
+        signal.signal(signal.SIGTERM, lambda signum, frame: di_container.pipeline_daemon.stop())
+        signal.signal(signal.SIGINT, lambda signum, frame: di_container.pipeline_daemon.stop())
+        di_container.pipeline_daemon.run_forever()
+    else:
+        di_container.coingecko_similar_exchanges_data_pipeline.run()
\ No newline at end of file
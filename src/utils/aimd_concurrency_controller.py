@@ -0,0 +1,125 @@
+import threading
+import time
+import logging
+from src.constants.constants import ADAPTIVE_CONCURRENCY_INITIAL_LIMIT, ADAPTIVE_CONCURRENCY_DECREASE_FACTOR, \
+    ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE
+
+LATENCY_SMOOTHING_FACTOR = 0.2  # Weight of the last attempt in the smoothed latency of a namespace
+BASELINE_LATENCY_SMOOTHING_FACTOR = 0.02  # Weight of the last attempt in the baseline latency, which follows lasting shifts only
+
+class AIMDConcurrencyController:
+    '''
+        Adaptive limit of the HTTP attempts in flight, shared by every endpoint namespace, following the
+        additive increase / multiplicative decrease scheme of TCP congestion control.
+        Every fast successful attempt raises the limit by 1/limit, so about one slot per round trip of the whole
+        window. A 429, a connection failure or a smoothed latency above `latency_tolerance` times the baseline
+        latency of its namespace cuts the limit by `decrease_factor`, at most once per window: attempts started
+        before the last cut do not cut it again. A Retry-After header also holds every new attempt until it expires.
+        Latencies are compared per namespace, as the endpoints do not have the same response times.
+    '''
+    def __init__(self, max_limit,
+                 initial_limit=ADAPTIVE_CONCURRENCY_INITIAL_LIMIT,
+                 min_limit=1,
+                 decrease_factor=ADAPTIVE_CONCURRENCY_DECREASE_FACTOR,
+                 latency_tolerance=ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE,
+                 clock=time.monotonic):
+        """
+        Initialize the controller.
+
+        :param max_limit: Ceiling of the limit, e.g. the number of worker threads issuing calls.
+        :param initial_limit: Limit of the first attempts, capped by max_limit.
+        :param min_limit: Floor of the limit.
+        :param decrease_factor: Factor the limit is multiplied by on throttling or rising latency, between 0 and 1.
+        :param latency_tolerance: Ratio of the smoothed latency to the baseline latency above which the limit is cut.
+        :param clock: Monotonic clock returning seconds, injectable for tests.
+        """
+        if not 1 <= min_limit <= max_limit:
+            raise ValueError(f"Expected 1 <= min_limit <= max_limit, got: {min_limit}, {max_limit}")
+        if not 0 < decrease_factor < 1:
+            raise ValueError(f"decrease_factor must be between 0 and 1, got: {decrease_factor}")
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.decrease_factor = decrease_factor
+        self.latency_tolerance = latency_tolerance
+        self.clock = clock
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.last_decrease_at = float("-inf")
+        self.smoothed_latencies = {}  # namespace -> smoothed latency in seconds
+        self.baseline_latencies = {}  # namespace -> long term smoothed latency in seconds
+        self.condition = threading.Condition()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def acquire(self):
+        """
+        Take a slot for an attempt, blocking the calling thread until one is free and no Retry-After is pending.
+
+        :return: The time the attempt started at, to pass back to release.
+        """
+        with self.condition:
+            while True:
+                pause_seconds = self.paused_until - self.clock()
+                if pause_seconds > 0:
+                    self.condition.wait(pause_seconds)
+                elif self.in_flight >= int(self.limit):
+                    self.condition.wait()
+                else:
+                    self.in_flight += 1
+                    return self.clock()
+
+    def release(self, namespace, started_at, status=None, retry_after_seconds=None):
+        """
+        Give back the slot of an attempt and adapt the limit to its outcome.
+
+        :param namespace: The endpoint namespace of the attempt.
+        :param started_at: The time returned by acquire.
+        :param status: The HTTP status code of the response, None if no response was received.
+        :param retry_after_seconds: The Retry-After of a throttled response, if any.
+        """
+        with self.condition:
+            now = self.clock()
+            self.in_flight -= 1
+            if retry_after_seconds:
+                self.paused_until = max(self.paused_until, now + retry_after_seconds)
+
+            if status is None or status == 429 or status >= 500:
+                self._decrease(started_at, now, f"status {status}" if status is not None else "connection failure")
+            elif self._observe_latency(namespace, now - started_at):
+                self._decrease(started_at, now, f"{namespace} latency {self.smoothed_latencies[namespace]:.3f}s "
+                                                f"above {self.latency_tolerance}x its baseline "
+                                                f"{self.baseline_latencies[namespace]:.3f}s")
+            elif status < 400:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def to_dict(self):
+        with self.condition:
+            return {
+                "limit": round(self.limit, 3),
+                "in_flight": self.in_flight,
+                "baseline_latency_seconds": {namespace: round(latency, 6) for namespace, latency in self.baseline_latencies.items()},
+            }
+
+    def _observe_latency(self, namespace, latency_seconds):
+        """
+        Update the smoothed and baseline latencies of a namespace.
+
+        :return: True if the smoothed latency rose above the tolerance.
+        """
+        smoothed = self.smoothed_latencies.get(namespace, latency_seconds)
+        smoothed += (latency_seconds - smoothed) * LATENCY_SMOOTHING_FACTOR
+        self.smoothed_latencies[namespace] = smoothed
+        baseline = self.baseline_latencies.get(namespace, latency_seconds)
+        baseline += (latency_seconds - baseline) * BASELINE_LATENCY_SMOOTHING_FACTOR
+        self.baseline_latencies[namespace] = baseline
+        return smoothed > baseline * self.latency_tolerance
+
+    def _decrease(self, started_at, now, reason):
+        # Attempts sent before the last cut saw the previous window, they do not cut it again
+        if started_at < self.last_decrease_at:
+            return
+        previous_limit = self.limit
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self.last_decrease_at = now
+        self.logger.info(f"Concurrency limit {previous_limit:.2f} -> {self.limit:.2f} on {reason}")
@@ -1,5 +1,14 @@
 import json
 from src.config.app_config import AppConfig
+from src.constants.constants import MAX_CONCURRENT_REQUESTS_DEFAULT, HTTP_POOL_SIZE_DEFAULT, \
+    HTTP_CONNECT_TIMEOUT_SECONDS_DEFAULT, HTTP_READ_TIMEOUT_SECONDS_DEFAULT, RATE_LIMITER_CALLS_PER_MINUTE_DEFAULT, \
+    RATE_LIMITER_BURST_DEFAULT, HTTP_CACHE_DIR_DEFAULT, HTTP_CACHE_MAX_SIZE_MB_DEFAULT, \
+    PARQUET_COMPRESSION_DEFAULT, S3_MAX_CONCURRENT_UPLOADS_DEFAULT, S3_MULTIPART_CHUNKSIZE_MB_DEFAULT, \
+    COINGECKO_BASE_URL_DEFAULT, METRICS_DIR_DEFAULT, RUN_ID_DEFAULT, CHECKPOINT_DB_PATH_DEFAULT, \
+    EXCHANGE_MARKET_INDEX_PATH_DEFAULT, EXCHANGE_MARKET_INDEX_TTL_HOURS_DEFAULT, \
+    DAEMON_INTERVAL_MINUTES_DEFAULT, DAEMON_CONTROL_HOST_DEFAULT, DAEMON_CONTROL_PORT_DEFAULT, \
+    SHARD_DEFAULT, SHARDS_DIR_DEFAULT, MERGE_SHARDS_DEFAULT, LOCAL_SHARDS_DEFAULT, TIME_SERIES_DB_PATH_DEFAULT, \
+    ROLLING_ANALYTICS_STATE_PATH_DEFAULT
 
 class AppConfigUtils:
     @staticmethod
@@ -15,7 +24,36 @@ class AppConfigUtils:
             rate_limiter_max_retries=data.get("rate_limiter_max_retries"), \
             historical_data_lookback_days=data.get("historical_data_lookback_days"), \
             log_level=data.get("log_level"), \
-            exchanges_with_similar_trades_limit=data.get("exchanges_with_similar_trades_limit"), \
-            exchanges_to_analyze_limit=data.get("exchanges_with_similar_trades_to_analyze"), \
-            write_to_s3=data.get("write_to_s3") \
+            exchanges_with_similar_trades_to_analyze=data.get("exchanges_with_similar_trades_to_analyze"), \
+            exchanges_to_analyze_limit=data.get("exchanges_to_analyze_limit"), \
+            write_to_s3=data.get("write_to_s3"), \
+            max_concurrent_requests=data.get("max_concurrent_requests", MAX_CONCURRENT_REQUESTS_DEFAULT), \
+            http_pool_size=data.get("http_pool_size", HTTP_POOL_SIZE_DEFAULT), \
+            http_connect_timeout_seconds=data.get("http_connect_timeout_seconds", HTTP_CONNECT_TIMEOUT_SECONDS_DEFAULT), \
+            http_read_timeout_seconds=data.get("http_read_timeout_seconds", HTTP_READ_TIMEOUT_SECONDS_DEFAULT), \
+            rate_limiter_calls_per_minute=data.get("rate_limiter_calls_per_minute", RATE_LIMITER_CALLS_PER_MINUTE_DEFAULT), \
+            rate_limiter_burst=data.get("rate_limiter_burst", RATE_LIMITER_BURST_DEFAULT), \
+            http_cache_dir=data.get("http_cache_dir", HTTP_CACHE_DIR_DEFAULT), \
+            http_cache_max_size_mb=data.get("http_cache_max_size_mb", HTTP_CACHE_MAX_SIZE_MB_DEFAULT), \
+            prefetch_next_page=data.get("prefetch_next_page", False), \
+            parquet_compression=data.get("parquet_compression", PARQUET_COMPRESSION_DEFAULT), \
+            s3_max_concurrent_uploads=data.get("s3_max_concurrent_uploads", S3_MAX_CONCURRENT_UPLOADS_DEFAULT), \
+            s3_multipart_chunksize_mb=data.get("s3_multipart_chunksize_mb", S3_MULTIPART_CHUNKSIZE_MB_DEFAULT), \
+            coingecko_base_url=data.get("coingecko_base_url", COINGECKO_BASE_URL_DEFAULT), \
+            metrics_dir=data.get("metrics_dir", METRICS_DIR_DEFAULT), \
+            run_id=data.get("run_id", RUN_ID_DEFAULT), \
+            checkpoint_db_path=data.get("checkpoint_db_path", CHECKPOINT_DB_PATH_DEFAULT), \
+            exchange_market_index_path=data.get("exchange_market_index_path", EXCHANGE_MARKET_INDEX_PATH_DEFAULT), \
+            exchange_market_index_ttl_hours=data.get("exchange_market_index_ttl_hours", EXCHANGE_MARKET_INDEX_TTL_HOURS_DEFAULT), \
+            stream_tickers=data.get("stream_tickers", False), \
+            daemon_interval_minutes=data.get("daemon_interval_minutes", DAEMON_INTERVAL_MINUTES_DEFAULT), \
+            daemon_control_host=data.get("daemon_control_host", DAEMON_CONTROL_HOST_DEFAULT), \
+            daemon_control_port=data.get("daemon_control_port", DAEMON_CONTROL_PORT_DEFAULT), \
+            shard=data.get("shard", SHARD_DEFAULT), \
+            shards_dir=data.get("shards_dir", SHARDS_DIR_DEFAULT), \
+            merge_shards=data.get("merge_shards", MERGE_SHARDS_DEFAULT), \
+            local_shards=data.get("local_shards", LOCAL_SHARDS_DEFAULT), \
+            adaptive_concurrency=data.get("adaptive_concurrency", False), \
+            time_series_db_path=data.get("time_series_db_path", TIME_SERIES_DB_PATH_DEFAULT), \
+            rolling_analytics_state_path=data.get("rolling_analytics_state_path", ROLLING_ANALYTICS_STATE_PATH_DEFAULT) \
         )
\ No newline at end of file
@@ -1,5 +1,5 @@
-from ratelimit import limits, sleep_and_retry
 from src.constants.constants import RATE_LIMITER_DEFAULT_WAIT_TIME_SECONDS
+from requests.exceptions import ConnectionError, Timeout
 import time
 import logging
 
@@ -7,8 +7,12 @@ class HTTPCallRetrier:
     '''
         Retries HTTP Calls against errors and throttling
     '''
-    def __init__(self, max_retries=3, exponential_backoff_rate = 2, initial_wait_time_seconds = 1):
+    def __init__(self, max_retries=3, exponential_backoff_rate = 2, initial_wait_time_seconds = 1, rate_limiter=None, metrics=None,
+                 concurrency_controller=None):
         self.max_retries = max_retries
+        self.rate_limiter = rate_limiter  # Optional client side limiter, paces every attempt before it is sent
+        self.concurrency_controller = concurrency_controller  # Optional AIMDConcurrencyController bounding the attempts in flight
+        self.metrics = metrics  # Optional HTTPMetricsRegistry, records every attempt and retry per namespace
         self.initial_wait_time_seconds = initial_wait_time_seconds
         self.exponential_backoff_rate = exponential_backoff_rate
         self.logger = logging.getLogger(self.__class__.__name__)
@@ -27,19 +31,39 @@ class HTTPCallRetrier:
         wait_time = self.initial_wait_time_seconds
         while retries < self.max_retries:
             self.logger.info(f"[{namespace}] Attempt : {retries+1}/{self.max_retries}")
-            response = api_call_lambda()
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire()
+            slot_acquired_at = self.concurrency_controller.acquire() if self.concurrency_controller is not None else None
+            attempt_started_at = time.perf_counter()
+            response = None
+            try:
+                response = api_call_lambda()
+            except (ConnectionError, Timeout) as e:
+                # Connection failures and timed out sockets are transient, retry them like server errors
+                last_response_text = f"Error={e.__class__.__name__}: {e}"
+                self.logger.error(f"[{namespace}]API call failed: {last_response_text}")
+                self._record_attempt(namespace, attempt_started_at, e.__class__.__name__)
+            else:
+                self._record_attempt(namespace, attempt_started_at, response.status_code, response)
+            finally:
+                if self.concurrency_controller is not None:
+                    self.concurrency_controller.release(namespace, slot_acquired_at,
+                                                        response.status_code if response is not None else None,
+                                                        self._retry_after_seconds(response))
 
             # Check if the call was successful
-            if response.status_code == 200:
+            if response is not None and response.status_code == 200:
                 self.logger.info(f"[{namespace}] Http call completed - returning response")
+                if self.metrics is not None:
+                    self.metrics.record_call(namespace, succeeded=True)
                 return response
 
             # Check for throttling
-            if response.status_code == 429:  # Too Many Requests
-                retry_after = int(response.headers.get("Retry-After", RATE_LIMITER_DEFAULT_WAIT_TIME_SECONDS))  # Default to 1 second if header missing                
+            if response is not None and response.status_code == 429:  # Too Many Requests
+                retry_after = self._retry_after_seconds(response)
                 self.logger.info(f"[{namespace}] Throttled. Retrying after header: {retry_after} seconds...")
                 wait_time = retry_after
-            else:
+            elif response is not None:
                 # If not a throttling error, break and raise
                 last_response_text = f"StatusCode={response.status_code}, Response={response.text}]"
                 api_failure_error_message = f"[{namespace}]API call failed: {last_response_text}"
@@ -49,10 +73,40 @@ class HTTPCallRetrier:
 
             if retries < self.max_retries:
                 self.logger.info(f"Waiting {wait_time} seconds until another attempt")
+                if self.metrics is not None:
+                    self.metrics.record_retry(namespace, wait_time,
+                                              throttled=response is not None and response.status_code == 429)
                 time.sleep(wait_time)
                 wait_time *= self.exponential_backoff_rate
 
         # Raise an exception if max retries are reached
         error_message = f"[{namespace}] Maximum retries reached - raising exception (Could not fetch data) - last response: {last_response_text}"
         self.logger.error(error_message)
-        raise Exception(error_message)
\ No newline at end of file
+        if self.metrics is not None:
+            self.metrics.record_call(namespace, succeeded=False)
+        raise Exception(error_message)
+
+    @staticmethod
+    def _retry_after_seconds(response):
+        """
+        :param response: The response of an attempt, None if no response was received.
+        :return: The Retry-After of a throttled response, defaulting to 1 second if the header is missing,
+                 None if the response is not throttled.
+        """
+        if response is None or response.status_code != 429:
+            return None
+        return int(response.headers.get("Retry-After", RATE_LIMITER_DEFAULT_WAIT_TIME_SECONDS))
+
+    def _record_attempt(self, namespace, attempt_started_at, status, response=None):
+        if self.metrics is None:
+            return
+        response_bytes = 0
+        if response is not None:
+            # Content-Length is the size on the wire, the decoded body is only measured when the header is missing
+            # and the body was already read, streamed bodies are left for the caller to consume
+            content_length = response.headers.get("Content-Length")
+            if content_length is not None:
+                response_bytes = int(content_length)
+            elif getattr(response, "_content", None) is not False:
+                response_bytes = len(response.content or b"")
+        self.metrics.record_attempt(namespace, time.perf_counter() - attempt_started_at, status, response_bytes)
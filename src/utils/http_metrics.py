@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+import logging
+from bisect import bisect_left
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS_SECONDS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+HTTP_METRICS_JSON_FILE_NAME = "http_metrics.json"
+HTTP_METRICS_PROMETHEUS_FILE_NAME = "http_metrics.prom"
+PROMETHEUS_METRICS_PREFIX = "coingecko_http"
+
+class NamespaceMetrics:
+    '''
+        Counters of the HTTP calls of one endpoint namespace.
+    '''
+    def __init__(self):
+        self.calls = 0
+        self.failed_calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.throttled = 0
+        self.retry_after_sleep_seconds = 0.0
+        self.backoff_sleep_seconds = 0.0
+        self.response_bytes = 0
+        self.attempts_by_status = {}
+        self.latency_bucket_counts = [0] * (len(LATENCY_BUCKETS_SECONDS) + 1)  # Last bucket is +Inf
+        self.latency_sum_seconds = 0.0
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "failed_calls": self.failed_calls,
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "throttled": self.throttled,
+            "retry_after_sleep_seconds": round(self.retry_after_sleep_seconds, 6),
+            "backoff_sleep_seconds": round(self.backoff_sleep_seconds, 6),
+            "response_bytes": self.response_bytes,
+            "attempts_by_status": dict(self.attempts_by_status),
+            "latency_seconds": {
+                "count": self.attempts,
+                "sum": round(self.latency_sum_seconds, 6),
+                "buckets": {str(upper_bound): count for upper_bound, count
+                            in zip((*LATENCY_BUCKETS_SECONDS, "+Inf"), self.latency_bucket_counts)},
+            },
+        }
+
+class HTTPMetricsRegistry:
+    '''
+        Thread safe registry of the HTTP call metrics of a run, per endpoint namespace:
+        latency histogram, attempts and retries, 429 responses and time slept on Retry-After,
+        and response bytes. Exportable as JSON and as a Prometheus textfile.
+    '''
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.namespaces = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def record_attempt(self, namespace, latency_seconds, status, response_bytes=0):
+        """
+        Record one HTTP attempt.
+
+        :param namespace: The endpoint namespace.
+        :param latency_seconds: Time spent waiting for the response.
+        :param status: The response status code, or the error name when no response was received.
+        :param response_bytes: Size of the response body.
+        """
+        with self.lock:
+            metrics = self._namespace(namespace)
+            metrics.attempts += 1
+            metrics.attempts_by_status[str(status)] = metrics.attempts_by_status.get(str(status), 0) + 1
+            metrics.latency_bucket_counts[bisect_left(LATENCY_BUCKETS_SECONDS, latency_seconds)] += 1
+            metrics.latency_sum_seconds += latency_seconds
+            metrics.response_bytes += response_bytes
+            if status == 429:
+                metrics.throttled += 1
+
+    def record_retry(self, namespace, sleep_seconds, throttled):
+        """
+        Record a retry and the time slept before it.
+
+        :param namespace: The endpoint namespace.
+        :param sleep_seconds: Time slept before the retry.
+        :param throttled: If the sleep was requested by the server through Retry-After, otherwise it is a backoff.
+        """
+        with self.lock:
+            metrics = self._namespace(namespace)
+            metrics.retries += 1
+            if throttled:
+                metrics.retry_after_sleep_seconds += sleep_seconds
+            else:
+                metrics.backoff_sleep_seconds += sleep_seconds
+
+    def record_call(self, namespace, succeeded):
+        """
+        Record the outcome of a call, after all its attempts.
+
+        :param namespace: The endpoint namespace.
+        :param succeeded: If the call returned a successful response.
+        """
+        with self.lock:
+            metrics = self._namespace(namespace)
+            metrics.calls += 1
+            if not succeeded:
+                metrics.failed_calls += 1
+
+    def to_dict(self):
+        """
+        :return: A dict of namespace -> metrics.
+        """
+        with self.lock:
+            return {namespace: metrics.to_dict() for namespace, metrics in sorted(self.namespaces.items())}
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        """
+        Render the metrics in the Prometheus text exposition format.
+
+        :return: The metrics text.
+        """
+        namespaces = self.to_dict()
+        lines = []
+
+        def add_metric(name, metric_type, help_text, samples):
+            lines.append(f"# HELP {PROMETHEUS_METRICS_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROMETHEUS_METRICS_PREFIX}_{name} {metric_type}")
+            for suffix, labels, value in samples:
+                label_text = ",".join(f'{label}="{label_value}"' for label, label_value in labels.items())
+                lines.append(f"{PROMETHEUS_METRICS_PREFIX}_{name}{suffix}{{{label_text}}} {value}")
+
+        for name, key, help_text in [
+            ("calls_total", "calls", "Calls made, including all their attempts."),
+            ("failed_calls_total", "failed_calls", "Calls that failed after exhausting their retries."),
+            ("retries_total", "retries", "Attempts retried after an error or a throttled response."),
+            ("throttled_total", "throttled", "Responses with status 429 Too Many Requests."),
+            ("retry_after_sleep_seconds_total", "retry_after_sleep_seconds", "Time slept honoring Retry-After."),
+            ("backoff_sleep_seconds_total", "backoff_sleep_seconds", "Time slept backing off after errors."),
+            ("response_bytes_total", "response_bytes", "Response body bytes received."),
+        ]:
+            add_metric(name, "counter", help_text,
+                       [("", {"namespace": namespace}, metrics[key]) for namespace, metrics in namespaces.items()])
+
+        add_metric("attempts_total", "counter", "Attempts sent, by response status.",
+                   [("", {"namespace": namespace, "status": status}, count)
+                    for namespace, metrics in namespaces.items()
+                    for status, count in sorted(metrics["attempts_by_status"].items())])
+
+        histogram_samples = []
+        for namespace, metrics in namespaces.items():
+            cumulative_count = 0
+            for upper_bound, count in metrics["latency_seconds"]["buckets"].items():
+                cumulative_count += count
+                histogram_samples.append(("_bucket", {"namespace": namespace, "le": upper_bound}, cumulative_count))
+            histogram_samples.append(("_sum", {"namespace": namespace}, metrics["latency_seconds"]["sum"]))
+            histogram_samples.append(("_count", {"namespace": namespace}, metrics["latency_seconds"]["count"]))
+        add_metric("request_duration_seconds", "histogram", "Latency of the attempts.", histogram_samples)
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir):
+        """
+        Write the metrics as JSON and as a Prometheus textfile. Files are replaced atomically,
+        so a collector never reads a partial file.
+
+        :param output_dir: Directory of the metric files.
+        :return: The paths of the written files.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for file_name, content in [(HTTP_METRICS_JSON_FILE_NAME, self.to_json()),
+                                   (HTTP_METRICS_PROMETHEUS_FILE_NAME, self.to_prometheus())]:
+            path = os.path.join(output_dir, file_name)
+            temp_path = f"{path}.tmp"
+            with open(temp_path, "w") as f:
+                f.write(content)
+            os.replace(temp_path, path)
+            paths.append(path)
+        self.logger.info(f"Wrote HTTP metrics to {', '.join(paths)}")
+        return paths
+
+    def _namespace(self, namespace):
+        if namespace not in self.namespaces:
+            self.namespaces[namespace] = NamespaceMetrics()
+        return self.namespaces[namespace]
@@ -0,0 +1,28 @@
+import requests
+from requests.adapters import HTTPAdapter
+
+# Headers sent on every pooled request: keep connections open and negotiate compressed payloads
+HTTP_SESSION_DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+}
+
+class HTTPSessionFactory:
+    @staticmethod
+    def create_session(pool_size: int):
+        """
+        Create a requests Session backed by a keep-alive connection pool.
+
+        Connections are reused across calls (no new TCP+TLS handshake per request) and
+        responses are requested gzip/deflate compressed, requests decodes them transparently.
+
+        :param pool_size: Maximum number of pooled connections kept per host.
+        :return: A requests.Session instance.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(HTTP_SESSION_DEFAULT_HEADERS)
+        return session
@@ -0,0 +1,119 @@
+import codecs
+import json
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library decoder is used without it
+    orjson = None
+
+JSON_WHITESPACE = " \t\n\r"
+COMPACT_THRESHOLD_CHARS = 1 << 16  # Decoded text is dropped from the buffer once this much was consumed
+
+def loads(data):
+    """
+    Decode a complete JSON document, with orjson when it is installed.
+
+    :param data: The JSON document, as bytes or str.
+    :return: The decoded value.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+class JSONStreamDecoder:
+    '''
+        Incremental decoder of a JSON document arriving in chunks.
+        Values are decoded with the C accelerated standard library scanner as soon as they are complete,
+        only the text not decoded yet is buffered.
+    '''
+    def __init__(self, chunks):
+        """
+        :param chunks: Iterable of bytes chunks of an UTF-8 encoded JSON document.
+        """
+        self.chunks = iter(chunks)
+        self.text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self.value_decoder = json.JSONDecoder()
+        self.text = ""
+        self.position = 0
+        self.is_exhausted = False
+
+    def iter_array_items(self, array_key):
+        """
+        Yield the items of an array member of the top level object, each one as soon as it was received.
+
+        :param array_key: Key of the array in the top level object, e.g. "tickers".
+        :return: A generator of the decoded items, empty if the key is missing.
+        """
+        self._expect("{")
+        while self._peek() != "}":
+            key = self._decode_value()
+            self._expect(":")
+            if key == array_key:
+                break
+            self._decode_value()  # Skip the value of another member
+            self._skip_separator()
+        else:
+            return
+
+        self._expect("[")
+        while self._peek() != "]":
+            yield self._decode_value()
+            self._skip_separator()
+            self._compact()
+
+    def _decode_value(self):
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = self.value_decoder.raw_decode(self.text, self.position)
+                # A number ending with the buffer may continue in the next chunk
+                if end < len(self.text) or self.is_exhausted:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.is_exhausted:
+                    raise
+            self._read_chunk()
+
+    def _peek(self):
+        self._skip_whitespace()
+        if self.position >= len(self.text):
+            raise json.JSONDecodeError("Unexpected end of document", self.text, self.position)
+        return self.text[self.position]
+
+    def _expect(self, character):
+        if self._peek() != character:
+            raise json.JSONDecodeError(f"Expected {character!r}", self.text, self.position)
+        self.position += 1
+
+    def _skip_separator(self):
+        if self._peek() == ",":
+            self.position += 1
+
+    def _skip_whitespace(self):
+        while True:
+            while self.position < len(self.text) and self.text[self.position] in JSON_WHITESPACE:
+                self.position += 1
+            if self.position < len(self.text) or not self._read_chunk():
+                return
+
+    def _read_chunk(self):
+        """
+        Append the next chunk to the buffer.
+
+        :return: False if the document was fully read.
+        """
+        for chunk in self.chunks:
+            text = self.text_decoder.decode(chunk)
+            if text:
+                self.text += text
+                return True
+        if not self.is_exhausted:
+            self.is_exhausted = True
+            self.text += self.text_decoder.decode(b"", final=True)
+        return False
+
+    def _compact(self):
+        if self.position >= COMPACT_THRESHOLD_CHARS:
+            self.text = self.text[self.position:]
+            self.position = 0
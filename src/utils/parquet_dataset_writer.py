@@ -0,0 +1,95 @@
+import os
+import shutil
+import logging
+import pandas as pd
+import pyarrow as pa
+
+PARQUET_PART_FILE_NAME = "part-0.parquet"
+
+class ParquetDatasetWriter:
+    '''
+        Writes DataFrames as typed, compressed Parquet files.
+        Partitioned tables are laid out hive style (`column=value` directories) so readers can
+        prune partitions and only read the columns they need.
+    '''
+    def __init__(self, compression="zstd"):
+        """
+        Initialize the writer.
+
+        :param compression: Parquet compression codec (zstd, snappy, gzip, ...).
+        """
+        self.compression = compression
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def write_table(self, df: pd.DataFrame, schema: pa.Schema, path):
+        """
+        Write a DataFrame as a single Parquet file.
+
+        :param df: The table to write.
+        :param schema: Arrow schema the columns are cast to. Columns missing from the DataFrame are written as nulls.
+        :param path: Destination file path.
+        :return: A list with the (written file path, file content) pair, so the content can be uploaded without
+                 reading the file back.
+        """
+        data = self.serialize(df, schema)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        self.logger.info(f"Wrote {len(df)} rows to {path}")
+        return [(path, data)]
+
+    def write_partitioned(self, df: pd.DataFrame, schema: pa.Schema, root_path, partition_cols):
+        """
+        Write a DataFrame as a hive partitioned Parquet dataset.
+        Partitions present in the DataFrame are replaced, the other partitions already under the root path are kept.
+
+        :param df: The table to write.
+        :param schema: Arrow schema of the table, including the partition columns.
+        :param root_path: Root directory of the dataset.
+        :param partition_cols: Columns to partition by, outermost first.
+        :return: A list of (written file path, file content) pairs.
+        """
+        if df.empty:
+            return []
+
+        data_schema = pa.schema([field for field in schema if field.name not in partition_cols])
+        written_files = []
+        for partition_values, partition_df in df.groupby(list(partition_cols), sort=True, observed=True):
+            partition_dir = os.path.join(root_path, *[f"{column}={value}" for column, value
+                                                      in zip(partition_cols, partition_values)])
+            # Replace the partition, a rerun must not leave stale files behind
+            shutil.rmtree(partition_dir, ignore_errors=True)
+            written_files.extend(self.write_table(partition_df, data_schema,
+                                                  os.path.join(partition_dir, PARQUET_PART_FILE_NAME)))
+        return written_files
+
+    def serialize(self, df: pd.DataFrame, schema: pa.Schema):
+        """
+        Serialize a DataFrame as a Parquet file in memory.
+
+        :param df: The table to serialize.
+        :param schema: Arrow schema the columns are cast to.
+        :return: The Parquet file content.
+        """
+        import pyarrow.parquet as pq  # Imported by the runs exporting Parquet only
+        buffer = pa.BufferOutputStream()
+        pq.write_table(self.to_arrow_table(df, schema), buffer, compression=self.compression)
+        return buffer.getvalue().to_pybytes()
+
+    @staticmethod
+    def to_arrow_table(df: pd.DataFrame, schema: pa.Schema):
+        """
+        Convert a DataFrame into an Arrow table with the given schema.
+
+        :param df: The table to convert.
+        :param schema: Target Arrow schema. Columns missing from the DataFrame are filled with nulls,
+                       extra DataFrame columns are dropped.
+        :return: A pyarrow.Table.
+        """
+        columns = []
+        for field in schema:
+            if field.name in df.columns:
+                columns.append(pa.array(df[field.name], type=field.type, from_pandas=True))
+            else:
+                columns.append(pa.nulls(len(df), type=field.type))
+        return pa.Table.from_arrays(columns, schema=schema)
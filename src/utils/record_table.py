@@ -0,0 +1,164 @@
+from array import array
+from collections.abc import Mapping, Sequence
+import numpy as np
+import pandas as pd
+
+MISSING_VALUE_CODE = -1  # Code of the None values of an interned column, as in pandas Categoricals
+
+class Record(Mapping):
+    '''
+        Read only view of a row of a RecordTable, behaving as the dict of the row: row["market_id"], row.get(...),
+        dict(row) and comparisons with dicts. It only holds the table and the row index.
+    '''
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table, index):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, column):
+        return self._table._value(column, self._index)
+
+    def __iter__(self):
+        return iter(self._table.columns)
+
+    def __len__(self):
+        return len(self._table.columns)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+class RecordTable(Sequence):
+    '''
+        Compact, append only table of records with a fixed set of columns, used in place of a list of dicts
+        for the large tables of the analyzers.
+        Values are stored by column: the float columns in a double array, the other columns interned, as a code
+        array and the list of their distinct values, so the exchange ids, market ids and symbols repeated on
+        every row are stored once. Iterating yields Record views, and the table converts to a DataFrame of
+        categorical columns without going through a dict per row.
+    '''
+    def __init__(self, columns, float_columns=()):
+        """
+        Initialize an empty table.
+
+        :param columns: Names of the columns, in order.
+        :param float_columns: Columns holding floats, stored unboxed. None values are stored as NaN.
+        """
+        unknown_columns = set(float_columns) - set(columns)
+        if unknown_columns:
+            raise ValueError(f"Float columns missing from the columns: {sorted(unknown_columns)}")
+        self.columns = list(columns)
+        self.float_columns = [column for column in self.columns if column in set(float_columns)]
+        self.codes = {column: array("i") for column in self.columns if column not in self.float_columns}
+        self.categories = {column: [] for column in self.codes}  # column -> distinct values, by code
+        self.category_codes = {column: {} for column in self.codes}  # column -> value -> code
+        self.floats = {column: array("d") for column in self.float_columns}
+
+    @classmethod
+    def from_records(cls, columns, records, float_columns=()):
+        """
+        Build a table from records, e.g. the rows of a JSON checkpoint.
+
+        :param columns: Names of the columns, in order.
+        :param records: Iterable of mappings, the columns they lack are None.
+        :param float_columns: Columns holding floats.
+        :return: A RecordTable.
+        """
+        table = cls(columns, float_columns)
+        table.extend(records)
+        return table
+
+    def append(self, record):
+        """
+        :param record: Mapping of column -> value, the columns it lacks are None.
+        """
+        for column, codes in self.codes.items():
+            codes.append(self._intern(column, record.get(column)))
+        for column, floats in self.floats.items():
+            value = record.get(column)
+            floats.append(float("nan") if value is None else value)
+
+    def extend(self, records):
+        """
+        :param records: Iterable of mappings, or a RecordTable whose values are appended column by column.
+        """
+        if not isinstance(records, RecordTable) or records.columns != self.columns \
+                or records.float_columns != self.float_columns:
+            for record in records:
+                self.append(record)
+            return
+        for column, codes in self.codes.items():
+            # Codes of the other table are translated once per distinct value
+            code_translation = [self._intern(column, value) for value in records.categories[column]]
+            codes.extend(MISSING_VALUE_CODE if code == MISSING_VALUE_CODE else code_translation[code]
+                         for code in records.codes[column])
+        for column, floats in self.floats.items():
+            floats.extend(records.floats[column])
+
+    def __len__(self):
+        if self.codes:
+            return len(next(iter(self.codes.values())))
+        return len(next(iter(self.floats.values()))) if self.floats else 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [Record(self, row_index) for row_index in range(*index.indices(len(self)))]
+        length = len(self)
+        if index < 0:
+            index += length
+        if not 0 <= index < length:
+            raise IndexError("RecordTable index out of range")
+        return Record(self, index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield Record(self, index)
+
+    def __eq__(self, other):
+        if not isinstance(other, Sequence) or isinstance(other, (str, bytes)):
+            return NotImplemented
+        return len(self) == len(other) and all(record == other_record for record, other_record in zip(self, other))
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"RecordTable({self.to_records()!r})"
+
+    def to_records(self):
+        """
+        :return: The rows as a list of dicts, e.g. to serialize them as JSON.
+        """
+        return [dict(record) for record in self]
+
+    def to_dataframe(self):
+        """
+        :return: A DataFrame with the columns in order, the interned columns as Categoricals.
+        """
+        data = {}
+        for column in self.columns:
+            if column in self.floats:
+                data[column] = np.array(self.floats[column], dtype=np.float64)
+            else:
+                # Copied, the code arrays cannot grow while a buffer of theirs is exported
+                data[column] = pd.Categorical.from_codes(np.array(self.codes[column], dtype=np.int32),
+                                                         categories=pd.Index(self.categories[column], dtype=object))
+        return pd.DataFrame(data, columns=self.columns)
+
+    def _value(self, column, index):
+        if column in self.floats:
+            return self.floats[column][index]
+        if column not in self.codes:
+            raise KeyError(column)
+        code = self.codes[column][index]
+        return None if code == MISSING_VALUE_CODE else self.categories[column][code]
+
+    def _intern(self, column, value):
+        if value is None:
+            return MISSING_VALUE_CODE
+        category_codes = self.category_codes[column]
+        code = category_codes.get(value)
+        if code is None:
+            code = len(self.categories[column])
+            category_codes[value] = code
+            self.categories[column].append(value)
+        return code
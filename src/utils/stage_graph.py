@@ -0,0 +1,173 @@
+import time
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+class StageChannelClosed(Exception):
+    pass
+
+class StageChannel:
+    '''
+        Streaming handoff between two stages: the producer puts items while it runs, the consumer iterates
+        over them as they arrive until the producer closes the channel.
+        Putting into a closed channel raises StageChannelClosed, so a producer stops once a failed run closed it.
+    '''
+    _CLOSED = object()
+
+    def __init__(self):
+        self.items = queue.Queue()
+        self.closed = False
+
+    def put(self, item):
+        if self.closed:
+            raise StageChannelClosed("The channel is closed, the run failed")
+        self.items.put(item)
+
+    def close(self):
+        self.closed = True
+        self.items.put(self._CLOSED)
+
+    def __iter__(self):
+        while True:
+            item = self.items.get()
+            if item is self._CLOSED:
+                return
+            yield item
+
+class StageTiming:
+    def __init__(self, name, started_at, finished_at):
+        self.name = name
+        self.started_at = started_at
+        self.finished_at = finished_at
+
+    @property
+    def duration_seconds(self):
+        return self.finished_at - self.started_at
+
+class StageGraph:
+    '''
+        Small DAG of pipeline stages run on a thread pool.
+        A stage starts as soon as the stages it depends on finished and receives their results as keyword
+        arguments. Stages fed through a StageChannel declare their producer in `streams_from`: they start
+        right away and consume the items while the producer runs.
+        Every stage is timed, and the critical path (the chain of stages that gated the end of the run)
+        is reported once the graph completed.
+    '''
+    def __init__(self, clock=time.perf_counter):
+        """
+        Initialize an empty graph.
+
+        :param clock: Monotonic clock returning seconds, injectable for tests.
+        """
+        self.stages = {}
+        self.channels = []
+        self.clock = clock
+        self.timings = {}
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def add_stage(self, name, stage_fn, depends_on=(), streams_from=()):
+        """
+        Add a stage to the graph.
+
+        :param name: Unique stage name, also the keyword its result is passed as to the dependent stages.
+        :param stage_fn: Callable running the stage.
+        :param depends_on: Names of the stages whose results the stage needs before starting.
+        :param streams_from: Names of the stages feeding the stage through a channel while they run.
+        """
+        if name in self.stages:
+            raise ValueError(f"Stage already added: {name}")
+        for dependency in (*depends_on, *streams_from):
+            if dependency not in self.stages:
+                raise ValueError(f"Stage {name} depends on unknown stage: {dependency}")
+        self.stages[name] = (stage_fn, tuple(depends_on), tuple(streams_from))
+
+    def add_channel(self):
+        """
+        Create a channel for streaming items between two stages of the graph.
+        The channels are closed when a stage fails, so their consumers never wait on a producer that will not run.
+
+        :return: A StageChannel.
+        """
+        channel = StageChannel()
+        self.channels.append(channel)
+        return channel
+
+    def run(self):
+        """
+        Run every stage, each one as soon as its dependencies are met.
+        When a stage fails the stages not started yet are skipped and the error is raised at once, without
+        waiting for the stages still running: the channels are closed, so their producers stop at their next item.
+
+        :return: A dict of stage name -> stage result.
+        """
+        results = {}
+        self.timings = {}
+        pending = dict(self.stages)
+        running = {}
+
+        executor = ThreadPoolExecutor(max_workers=max(len(self.stages), 1), thread_name_prefix=self.__class__.__name__)
+        while pending or running:
+            for name, (stage_fn, depends_on, _) in list(pending.items()):
+                if all(dependency in results for dependency in depends_on):
+                    del pending[name]
+                    kwargs = {dependency: results[dependency] for dependency in depends_on}
+                    running[executor.submit(self._run_stage, name, stage_fn, kwargs)] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                if future.exception() is not None:
+                    self.logger.error(f"Stage {name} failed, skipping {len(pending)} stages not started yet "
+                                      f"and stopping {len(running)} running stages")
+                    for channel in self.channels:
+                        channel.close()
+                    executor.shutdown(wait=False, cancel_futures=True)
+                    raise future.exception()
+                results[name] = future.result()
+        executor.shutdown()
+
+        self.logger.info(self.critical_path_report())
+        return results
+
+    def critical_path(self):
+        """
+        Compute the critical path of the last run: starting from the stage that finished last, walk back through
+        the dependency that finished last, which is the one the stage was waiting for.
+
+        :return: A list of StageTiming, in execution order.
+        """
+        if not self.timings:
+            return []
+        path = []
+        timing = max(self.timings.values(), key=lambda stage_timing: stage_timing.finished_at)
+        while timing is not None:
+            path.append(timing)
+            _, depends_on, streams_from = self.stages[timing.name]
+            upstream = [self.timings[dependency] for dependency in (*depends_on, *streams_from)]
+            timing = max(upstream, key=lambda stage_timing: stage_timing.finished_at) if upstream else None
+        return list(reversed(path))
+
+    def critical_path_report(self):
+        """
+        Describe the stage timings and the critical path of the last run.
+
+        :return: A human readable report.
+        """
+        if not self.timings:
+            return "No stage ran"
+        run_started_at = min(timing.started_at for timing in self.timings.values())
+        run_finished_at = max(timing.finished_at for timing in self.timings.values())
+        stages = ", ".join(f"{timing.name}: {timing.duration_seconds:.3f}s"
+                           for timing in sorted(self.timings.values(), key=lambda stage_timing: stage_timing.started_at))
+        critical_path = " -> ".join(f"{timing.name} ({timing.duration_seconds:.3f}s)" for timing in self.critical_path())
+        return f"Ran {len(self.timings)} stages in {run_finished_at - run_started_at:.3f}s [{stages}]. " \
+               f"Critical path: {critical_path}"
+
+    def _run_stage(self, name, stage_fn, kwargs):
+        self.logger.info(f"Starting stage {name}")
+        started_at = self.clock()
+        try:
+            return stage_fn(**kwargs)
+        finally:
+            self.timings[name] = StageTiming(name, started_at, self.clock())
+            self.logger.info(f"Finished stage {name} in {self.timings[name].duration_seconds:.3f}s")
@@ -0,0 +1,139 @@
+import sys
+import threading
+import time
+import logging
+from importlib.abc import MetaPathFinder
+
+STARTUP_PROFILE_TOP_MODULES_DEFAULT = 25
+
+class _TimedLoader:
+    '''
+        Proxy of a module loader timing the execution of the module it loads.
+    '''
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        self._profiler._enter_module()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit_module(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+class _ImportTimingFinder(MetaPathFinder):
+    '''
+        Meta path finder delegating to the other finders and wrapping the loaders they return in a _TimedLoader.
+    '''
+    def __init__(self, profiler):
+        self.profiler = profiler
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, self.profiler)
+            return spec
+        return None
+
+class StartupProfiler:
+    '''
+        Profiler of the process startup: the time spent importing every module, cumulative and self
+        (excluding the modules it imported), like `python -X importtime`, and the time spent initializing
+        every DI component. Only the modules imported while tracking is started are reported.
+    '''
+    def __init__(self, clock=time.perf_counter):
+        """
+        :param clock: Monotonic clock returning seconds, injectable for tests.
+        """
+        self.clock = clock
+        self.started_at = clock()
+        self.last_lap_at = self.started_at
+        self.finder = None
+        self.module_timings = {}  # module name -> (cumulative seconds, self seconds)
+        self.component_timings = []  # (component name, seconds), in initialization order
+        self.import_stack = threading.local()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def start_import_tracking(self):
+        """
+        Time every module imported from now on.
+        """
+        if self.finder is None:
+            self.finder = _ImportTimingFinder(self)
+            sys.meta_path.insert(0, self.finder)
+
+    def stop_import_tracking(self):
+        if self.finder is not None:
+            sys.meta_path.remove(self.finder)
+            self.finder = None
+
+    def lap(self, component):
+        """
+        Record the time elapsed since the previous lap as the initialization time of a component,
+        including the modules it imported lazily.
+
+        :param component: Name of the component initialized since the previous lap.
+        """
+        now = self.clock()
+        self.component_timings.append((component, now - self.last_lap_at))
+        self.last_lap_at = now
+
+    def to_dict(self, top_modules=STARTUP_PROFILE_TOP_MODULES_DEFAULT):
+        """
+        :param top_modules: Number of modules reported, by descending cumulative import time.
+        :return: A JSON serializable dict of the startup timings, in seconds.
+        """
+        slowest_modules = sorted(self.module_timings.items(), key=lambda timing: -timing[1][0])[:top_modules]
+        return {
+            "total_seconds": round(self.last_lap_at - self.started_at, 6),
+            "imported_modules_count": len(self.module_timings),
+            "components": [{"component": component, "seconds": round(seconds, 6)}
+                           for component, seconds in self.component_timings],
+            "modules": [{"module": module, "cumulative_seconds": round(cumulative_seconds, 6),
+                         "self_seconds": round(self_seconds, 6)}
+                        for module, (cumulative_seconds, self_seconds) in slowest_modules],
+        }
+
+    def report(self, top_modules=STARTUP_PROFILE_TOP_MODULES_DEFAULT):
+        """
+        :param top_modules: Number of modules reported, by descending cumulative import time.
+        :return: A human readable report of the startup timings.
+        """
+        profile = self.to_dict(top_modules)
+        lines = [f"Startup took {profile['total_seconds'] * 1000:.1f} ms, "
+                 f"{profile['imported_modules_count']} modules imported",
+                 "", f"{'ms':>10}  component"]
+        lines += [f"{entry['seconds'] * 1000:>10.1f}  {entry['component']}" for entry in profile["components"]]
+        lines += ["", f"{'cumul. ms':>10}  {'self ms':>10}  module"]
+        lines += [f"{entry['cumulative_seconds'] * 1000:>10.1f}  {entry['self_seconds'] * 1000:>10.1f}  {entry['module']}"
+                  for entry in profile["modules"]]
+        return "\n".join(lines)
+
+    def _enter_module(self):
+        stack = self._get_import_stack()
+        stack.append([self.clock(), 0.0])  # [started at, seconds spent importing nested modules]
+
+    def _exit_module(self, module_name):
+        stack = self._get_import_stack()
+        started_at, nested_seconds = stack.pop()
+        cumulative_seconds = self.clock() - started_at
+        if stack:
+            stack[-1][1] += cumulative_seconds
+        self.module_timings[module_name] = (cumulative_seconds, cumulative_seconds - nested_seconds)
+
+    def _get_import_stack(self):
+        # Modules can be imported by several threads, each one has its own stack of nested imports
+        if not hasattr(self.import_stack, "modules"):
+            self.import_stack.modules = []
+        return self.import_stack.modules
@@ -0,0 +1,57 @@
+import threading
+import time
+import logging
+
+class TokenBucketRateLimiter:
+    '''
+        Client side rate limiter based on a token bucket.
+        Tokens are refilled continuously at `calls_per_minute` per minute, up to `burst` tokens.
+        Every call takes one token; when the bucket is empty the caller reserves the next token
+        and waits until it is refilled, so concurrent callers are paced in arrival order.
+        A single instance can be shared by threads.
+    '''
+    def __init__(self, calls_per_minute, burst=1, clock=time.monotonic):
+        """
+        Initialize the rate limiter with a full bucket.
+
+        :param calls_per_minute: Maximum sustained number of calls per minute.
+        :param burst: Maximum number of calls that can be made back to back after an idle period.
+        :param clock: Monotonic clock returning seconds, injectable for tests.
+        """
+        if calls_per_minute <= 0:
+            raise ValueError(f"calls_per_minute must be positive, got: {calls_per_minute}")
+        if burst < 1:
+            raise ValueError(f"burst must be at least 1, got: {burst}")
+        self.calls_per_minute = calls_per_minute
+        self.burst = burst
+        self.refill_rate_per_second = calls_per_minute / 60
+        self.clock = clock
+        self.tokens = float(burst)
+        self.last_refill_time = clock()
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(self.__class__.__name__)
+
+    def acquire(self):
+        """
+        Take a token, blocking the calling thread until it is available.
+        """
+        wait_time = self._reserve()
+        if wait_time > 0:
+            self.logger.debug(f"Rate limited - waiting {wait_time:.3f} seconds")
+            time.sleep(wait_time)
+
+    def _reserve(self):
+        """
+        Refill the bucket and take a token. The token count goes negative when callers are queued.
+
+        :return: Number of seconds the caller must wait before using its token.
+        """
+        with self.lock:
+            now = self.clock()
+            elapsed = now - self.last_refill_time
+            self.tokens = min(self.burst, self.tokens + elapsed * self.refill_rate_per_second)
+            self.last_refill_time = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0
+            return -self.tokens / self.refill_rate_per_second
@@ -0,0 +1,71 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from src.adapters.async_coingecko_api import AsyncCoingeckoAPI
+
+class TestAsyncCoingeckoAPI(unittest.TestCase):
+    def test_fetch_markets_delegates_to_coingecko_api(self):
+        mock_coingecko_api = MagicMock()
+        mock_coingecko_api.fetch_markets.return_value = {"tickers": []}
+        api = AsyncCoingeckoAPI(mock_coingecko_api, max_concurrent_requests=2)
+
+        markets = asyncio.run(api.fetch_markets("binance"))
+
+        self.assertEqual(markets, {"tickers": []})
+        mock_coingecko_api.fetch_markets.assert_called_once_with("binance", 1, None)
+        api.close()
+
+    def test_in_flight_requests_are_bounded(self):
+        in_flight = 0
+        max_in_flight = 0
+        lock = threading.Lock()
+
+        def fetch_markets(exchange_id, page, coin_ids=None):
+            nonlocal in_flight, max_in_flight
+            with lock:
+                in_flight += 1
+                max_in_flight = max(max_in_flight, in_flight)
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return {"tickers": [], "exchange_id": exchange_id}
+
+        mock_coingecko_api = MagicMock()
+        mock_coingecko_api.fetch_markets.side_effect = fetch_markets
+        api = AsyncCoingeckoAPI(mock_coingecko_api, max_concurrent_requests=3)
+
+        async def fetch_all():
+            return await asyncio.gather(*[api.fetch_markets(f"exchange_{i}") for i in range(12)])
+
+        results = asyncio.run(fetch_all())
+
+        self.assertEqual([result["exchange_id"] for result in results], [f"exchange_{i}" for i in range(12)])
+        self.assertLessEqual(max_in_flight, 3)
+        self.assertGreater(max_in_flight, 1)
+        api.close()
+
+    def test_iter_ticker_pages(self):
+        mock_coingecko_api = MagicMock()
+        mock_coingecko_api.fetch_markets.side_effect = [
+            {"tickers": [{"base": "BTC", "target": "USDT"}] * 100},
+            {"tickers": [{"base": "ETH", "target": "USDT"}]},
+        ]
+        api = AsyncCoingeckoAPI(mock_coingecko_api, max_concurrent_requests=2)
+
+        async def collect_pages():
+            return [tickers async for tickers in api.iter_ticker_pages("binance")]
+
+        pages = asyncio.run(collect_pages())
+
+        self.assertEqual([len(tickers) for tickers in pages], [100, 1])
+        mock_coingecko_api.fetch_markets.assert_called_with("binance", 2, None)
+        api.close()
+
+    def test_invalid_max_concurrent_requests(self):
+        with self.assertRaises(ValueError):
+            AsyncCoingeckoAPI(MagicMock(), max_concurrent_requests=0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,10 +1,13 @@
+import tempfile
 import unittest
-from unittest.mock import patch, MagicMock
+import requests
+from unittest.mock import patch, MagicMock, PropertyMock
 from src.adapters.coingecko_api import CoingeckoAPI
 from src.utils.http_call_retrier import HTTPCallRetrier
+from src.adapters.http_response_cache import HTTPResponseCache
 
 class TestCoingeckoAPI(unittest.TestCase):
-    @patch("src.adapters.coingecko_api.requests.get")
+    @patch("requests.Session.get")
     @patch("time.sleep", return_value=None)  # Prevent actual sleep during tests
     def test_fetch_exchanges_success(self, mock_sleep, mock_requests_get):
         mock_response = MagicMock()
@@ -16,9 +19,9 @@ class TestCoingeckoAPI(unittest.TestCase):
         exchanges = api.fetch_exchanges()
 
         self.assertEqual(exchanges, [{"id": "binance", "name": "Binance"}])
-        mock_requests_get.assert_called_once_with("https://api.coingecko.com/api/v3/exchanges")
+        mock_requests_get.assert_called_once_with("https://api.coingecko.com/api/v3/exchanges?per_page=250&page=1", headers=None, timeout=(5, 30))
 
-    @patch("src.adapters.coingecko_api.requests.get")
+    @patch("requests.Session.get")
     @patch("time.sleep", return_value=None)
     def test_fetch_exchanges_retry_on_throttling(self, mock_sleep, mock_requests_get):
         throttled_response = MagicMock()
@@ -37,7 +40,7 @@ class TestCoingeckoAPI(unittest.TestCase):
         self.assertEqual(mock_requests_get.call_count, 2)
         mock_sleep.assert_called_with(2)
 
-    @patch("src.adapters.coingecko_api.requests.get")
+    @patch("requests.Session.get")
     @patch("time.sleep", return_value=None)
     def test_fetch_exchanges_failure_after_retries(self, mock_sleep, mock_requests_get):
         failed_response = MagicMock()
@@ -54,7 +57,7 @@ class TestCoingeckoAPI(unittest.TestCase):
         self.assertEqual(mock_requests_get.call_count, 3)
         self.assertEqual(mock_sleep.call_count, 2)  # Called twice before final failure
 
-    @patch("src.adapters.coingecko_api.requests.get")
+    @patch("requests.Session.get")
     @patch("time.sleep", return_value=None)
     def test_fetch_exchange_volume_chart(self, mock_sleep, mock_requests_get):
         mock_response = MagicMock()
@@ -67,8 +70,182 @@ class TestCoingeckoAPI(unittest.TestCase):
 
         self.assertEqual(volume_chart, [[1609459200000, 1000000], [1609545600000, 2000000]])
         mock_requests_get.assert_called_once_with(
-            "https://api.coingecko.com/api/v3/exchanges/binance/volume_chart?days=30"
+            "https://api.coingecko.com/api/v3/exchanges/binance/volume_chart?days=30", headers=None, timeout=(5, 30)
         )
 
+    @patch("requests.Session.get")
+    @patch("time.sleep", return_value=None)
+    def test_fetch_exchanges_retry_on_timeout(self, mock_sleep, mock_requests_get):
+        successful_response = MagicMock()
+        successful_response.status_code = 200
+        successful_response.json.return_value = [{"id": "binance", "name": "Binance"}]
+
+        mock_requests_get.side_effect = [requests.exceptions.ReadTimeout("timed out"), successful_response]
+
+        api = CoingeckoAPI(rate_limiter_retries=3, connect_timeout_seconds=1, read_timeout_seconds=2)
+        exchanges = api.fetch_exchanges()
+
+        self.assertEqual(exchanges, [{"id": "binance", "name": "Binance"}])
+        mock_requests_get.assert_called_with("https://api.coingecko.com/api/v3/exchanges?per_page=250&page=1", headers=None, timeout=(1, 2))
+        self.assertEqual(mock_requests_get.call_count, 2)
+
+    def test_session_is_pooled_and_compressed(self):
+        api = CoingeckoAPI(rate_limiter_retries=3, pool_size=7)
+
+        adapter = api.session.get_adapter("https://api.coingecko.com")
+        self.assertEqual(adapter._pool_maxsize, 7)
+        self.assertIn("gzip", api.session.headers["Accept-Encoding"])
+        self.assertEqual(api.session.headers["Connection"], "keep-alive")
+        api.close()
+
+    @patch("requests.Session.get")
+    @patch("time.sleep", return_value=None)
+    def test_fresh_cached_response_skips_the_api(self, mock_sleep, mock_requests_get):
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.content = b'[{"id": "binance", "name": "Binance"}]'
+        mock_response.headers = {"ETag": '"v1"'}
+        mock_requests_get.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            api = CoingeckoAPI(rate_limiter_retries=3, response_cache=HTTPResponseCache(cache_dir, max_size_bytes=1024 * 1024))
+            api.fetch_exchanges()
+            exchanges = api.fetch_exchanges()
+
+        self.assertEqual(exchanges, [{"id": "binance", "name": "Binance"}])
+        mock_requests_get.assert_called_once()
+
+    @patch("requests.Session.get")
+    @patch("time.sleep", return_value=None)
+    def test_expired_cached_response_is_revalidated(self, mock_sleep, mock_requests_get):
+        first_response = MagicMock()
+        first_response.status_code = 200
+        first_response.content = b'[{"id": "binance", "name": "Binance"}]'
+        first_response.headers = {"ETag": '"v1"'}
+        not_modified_response = MagicMock()
+        not_modified_response.status_code = 304
+        mock_requests_get.side_effect = [first_response, not_modified_response]
+        clock = MagicMock(return_value=0)
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            api = CoingeckoAPI(rate_limiter_retries=3, response_cache=HTTPResponseCache(cache_dir, max_size_bytes=1024 * 1024, clock=clock))
+            api.fetch_exchanges()
+            clock.return_value = 10 ** 6  # Past every TTL
+            exchanges = api.fetch_exchanges()
+
+        self.assertEqual(exchanges, [{"id": "binance", "name": "Binance"}])
+        mock_requests_get.assert_called_with("https://api.coingecko.com/api/v3/exchanges?per_page=250&page=1",
+                                             headers={"If-None-Match": '"v1"'}, timeout=(5, 30))
+
+    @patch("requests.Session.get")
+    @patch("time.sleep", return_value=None)
+    def test_streamed_tickers_are_cached_while_they_are_decoded(self, mock_sleep, mock_requests_get):
+        body = b'{"name": "Binance", "tickers": [{"base": "BTC", "target": "USDT"}, {"base": "ETH", "target": "USDT"}]}'
+        chunks_read = []
+
+        def iter_content(chunk_size):
+            for position in range(0, len(body), 16):
+                chunks_read.append(position)
+                yield body[position:position + 16]
+
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.headers = {"ETag": '"v1"'}
+        mock_response._content_consumed = False
+        mock_response.iter_content.side_effect = iter_content
+        type(mock_response).content = PropertyMock(side_effect=AssertionError("The streamed body was read at once"))
+        mock_requests_get.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as cache_dir:
+            api = CoingeckoAPI(rate_limiter_retries=3, stream_tickers=True,
+                               response_cache=HTTPResponseCache(cache_dir, max_size_bytes=1024 * 1024))
+            markets = api.fetch_markets("binance")
+            cached_markets = api.fetch_markets("binance")
+
+        self.assertEqual([(ticker["base"], ticker["target"]) for ticker in markets["tickers"]], [("BTC", "USDT"), ("ETH", "USDT")])
+        self.assertEqual(cached_markets, markets)
+        self.assertEqual(len(chunks_read), -(-len(body) // 16))
+        mock_requests_get.assert_called_once_with("https://api.coingecko.com/api/v3/exchanges/binance/tickers?page=1",
+                                                  headers=None, timeout=(5, 30), stream=True)
+
+    @patch("requests.Session.get")
+    @patch("time.sleep", return_value=None)
+    def test_fetch_historical_volume_range(self, mock_sleep, mock_requests_get):
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"prices": [[1609459200000, 10000]]}
+        mock_requests_get.return_value = mock_response
+
+        api = CoingeckoAPI(rate_limiter_retries=3)
+        data = api.fetch_historical_volume_range("bitcoin", "usd", 1609459200.5, 1609632000)
+
+        self.assertEqual(data, {"prices": [[1609459200000, 10000]]})
+        mock_requests_get.assert_called_once_with(
+            "https://api.coingecko.com/api/v3/coins/bitcoin/market_chart/range?vs_currency=usd&from=1609459200&to=1609632000",
+            headers=None, timeout=(5, 30)
+        )
+
+    @patch("requests.Session.get")
+    @patch("time.sleep", return_value=None)
+    def test_iter_tickers_fetches_pages_until_a_short_page(self, mock_sleep, mock_requests_get):
+        full_page = MagicMock(status_code=200)
+        full_page.json.return_value = {"tickers": [{"base": "BTC", "target": "USDT"}] * 100}
+        last_page = MagicMock(status_code=200)
+        last_page.json.return_value = {"tickers": [{"base": "ETH", "target": "USDT"}]}
+        mock_requests_get.side_effect = [full_page, last_page]
+
+        api = CoingeckoAPI(rate_limiter_retries=3)
+        tickers = list(api.iter_tickers("binance"))
+
+        self.assertEqual(len(tickers), 101)
+        self.assertEqual([call.args[0] for call in mock_requests_get.call_args_list], [
+            "https://api.coingecko.com/api/v3/exchanges/binance/tickers?page=1",
+            "https://api.coingecko.com/api/v3/exchanges/binance/tickers?page=2",
+        ])
+
+    @patch("requests.Session.get")
+    @patch("time.sleep", return_value=None)
+    def test_fetch_markets_filtered_by_coin_ids(self, mock_sleep, mock_requests_get):
+        mock_response = MagicMock(status_code=200)
+        mock_response.json.return_value = {"tickers": []}
+        mock_requests_get.return_value = mock_response
+
+        api = CoingeckoAPI(rate_limiter_retries=3)
+        api.fetch_markets("binance", page=2, coin_ids=["ethereum", "bitcoin"])
+
+        mock_requests_get.assert_called_once_with(
+            "https://api.coingecko.com/api/v3/exchanges/binance/tickers?coin_ids=bitcoin,ethereum&page=2",
+            headers=None, timeout=(5, 30)
+        )
+
+    @patch("requests.Session.get")
+    @patch("time.sleep", return_value=None)
+    def test_iter_exchanges_fetches_pages_lazily(self, mock_sleep, mock_requests_get):
+        full_page = MagicMock(status_code=200)
+        full_page.json.return_value = [{"id": f"exchange_{i}"} for i in range(250)]
+        mock_requests_get.return_value = full_page
+
+        api = CoingeckoAPI(rate_limiter_retries=3)
+        exchanges = api.iter_exchanges()
+        first_exchange = next(exchanges)
+
+        self.assertEqual(first_exchange, {"id": "exchange_0"})
+        mock_requests_get.assert_called_once()
+
+    @patch("requests.Session.get")
+    @patch("time.sleep", return_value=None)
+    def test_iter_ticker_pages_prefetches_the_next_page(self, mock_sleep, mock_requests_get):
+        full_page = MagicMock(status_code=200)
+        full_page.json.return_value = {"tickers": [{"base": "BTC", "target": "USDT"}] * 100}
+        last_page = MagicMock(status_code=200)
+        last_page.json.return_value = {"tickers": []}
+        mock_requests_get.side_effect = [full_page, last_page]
+
+        api = CoingeckoAPI(rate_limiter_retries=3, prefetch_next_page=True)
+        pages = list(api.iter_ticker_pages("binance"))
+        api.close()
+
+        self.assertEqual(len(pages), 1)
+        self.assertEqual(mock_requests_get.call_count, 2)
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.adapters.http_response_cache import HTTPResponseCache
+from tests.fake_clock import FakeClock
+
+def make_response(body, headers=None):
+    response = MagicMock()
+    response.status_code = 200
+    response.content = body
+    response.headers = headers or {}
+    return response
+
+class TestHTTPResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.clock = FakeClock(1000.0)
+        self.cache = HTTPResponseCache(self.temp_dir.name, max_size_bytes=10_000, clock=self.clock)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_put_and_get_fresh(self):
+        self.cache.put("https://api/exchanges?page=1&per_page=250", make_response(b'[{"id": "binance"}]'))
+
+        entry = self.cache.get_fresh("https://api/exchanges?per_page=250&page=1", ttl_seconds=60)
+
+        self.assertEqual(entry.to_response().json(), [{"id": "binance"}])
+
+    def test_expired_entry_keeps_validators(self):
+        self.cache.put("https://api/exchanges", make_response(b"[]", {"ETag": '"abc"', "Last-Modified": "Mon, 01 Jan 2024 00:00:00 GMT"}))
+        self.clock.now += 61
+
+        self.assertIsNone(self.cache.get_fresh("https://api/exchanges", ttl_seconds=60))
+        entry = self.cache.get("https://api/exchanges")
+        self.assertEqual(entry.conditional_headers(), {"If-None-Match": '"abc"',
+                                                       "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"})
+
+        self.cache.refresh(entry)
+        self.assertIsNotNone(self.cache.get_fresh("https://api/exchanges", ttl_seconds=60))
+
+    def test_persists_across_instances(self):
+        self.cache.put("https://api/exchanges", make_response(b"[]"))
+
+        reopened_cache = HTTPResponseCache(self.temp_dir.name, max_size_bytes=10_000, clock=self.clock)
+
+        self.assertEqual(reopened_cache.get("https://api/exchanges").body, b"[]")
+
+    def test_evicts_least_recently_used_entries(self):
+        cache = HTTPResponseCache(self.temp_dir.name, max_size_bytes=2_500, clock=self.clock)
+        for name in ["a", "b", "c"]:
+            self.clock.now += 1
+            cache.put(f"https://api/{name}", make_response(b"x" * 1_000))
+            if name == "b":
+                self.clock.now += 1
+                cache.get("https://api/a")
+
+        self.assertIsNotNone(cache.get("https://api/a"))
+        self.assertIsNone(cache.get("https://api/b"))
+        self.assertIsNotNone(cache.get("https://api/c"))
+        self.assertEqual(len([f for f in os.listdir(self.temp_dir.name) if f.endswith(".body")]), 2)
+
+if __name__ == "__main__":
+    unittest.main()
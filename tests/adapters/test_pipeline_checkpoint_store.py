@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from src.adapters.pipeline_checkpoint_store import PipelineCheckpointStore
+
+class TestPipelineCheckpointStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "state", "checkpoints.sqlite")
+        self.store = PipelineCheckpointStore(self.db_path, "run-1")
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_missing_unit(self):
+        self.assertIsNone(self.store.load("exchange_shared_markets", "binance"))
+
+    def test_save_and_load(self):
+        self.store.save("exchange_shared_markets", "binance", [{"market_id": "BTC_USDT"}])
+        self.store.save("exchange_shared_markets", "kraken", [])
+
+        self.assertEqual(self.store.load("exchange_shared_markets", "binance"), [{"market_id": "BTC_USDT"}])
+        self.assertEqual(self.store.load("exchange_shared_markets", "kraken"), [])
+        self.assertIsNone(self.store.load("exchange_volume_chart", "binance"))
+        self.assertEqual(self.store.completed_units_count("exchange_shared_markets"), 2)
+
+    def test_persists_across_instances_of_the_same_run_only(self):
+        self.store.save("exchange_volume_chart", "binance", [[1000, "1.5"]])
+
+        same_run_store = PipelineCheckpointStore(self.db_path, "run-1")
+        other_run_store = PipelineCheckpointStore(self.db_path, "run-2")
+
+        self.assertEqual(same_run_store.load("exchange_volume_chart", "binance"), [[1000, "1.5"]])
+        self.assertIsNone(other_run_store.load("exchange_volume_chart", "binance"))
+        same_run_store.close()
+        other_run_store.close()
+
+    def test_clear_run(self):
+        other_run_store = PipelineCheckpointStore(self.db_path, "run-2")
+        self.store.save("exchange_volume_chart", "binance", [])
+        other_run_store.save("exchange_volume_chart", "binance", [])
+
+        self.store.clear_run()
+
+        self.assertEqual(self.store.completed_units_count(), 0)
+        self.assertEqual(other_run_store.completed_units_count(), 1)
+        other_run_store.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import MagicMock, patch
+import threading
 import pandas as pd
+from boto3.s3.transfer import TransferConfig
 from src.adapters.s3_handler import S3Handler
 
 
@@ -23,36 +25,72 @@ class TestS3Handler(unittest.TestCase):
 
         mock_s3_client.download_file.assert_called_once_with("test-bucket", "test_key", "test_file.csv")
 
-    @patch("os.remove")
-    def test_upload_dataframe(self, mock_remove):
+    def test_upload_bytes(self):
+        mock_s3_client = MagicMock()
+        transfer_config = TransferConfig(multipart_threshold=1024, multipart_chunksize=1024)
+        handler = S3Handler(mock_s3_client, "test-bucket", transfer_config=transfer_config)
+
+        handler.upload_bytes(b"payload", "test_key")
+
+        fileobj, bucket, key = mock_s3_client.upload_fileobj.call_args.args
+        self.assertEqual(fileobj.read(), b"payload")
+        self.assertEqual((bucket, key), ("test-bucket", "test_key"))
+        self.assertIs(mock_s3_client.upload_fileobj.call_args.kwargs["Config"], transfer_config)
+
+    def test_upload_many_runs_uploads_concurrently(self):
+        mock_s3_client = MagicMock()
+        handler = S3Handler(mock_s3_client, "test-bucket", max_concurrent_uploads=3)
+        barrier = threading.Barrier(3, timeout=5)
+        # Each upload waits for the other two, so this only completes if the three run at the same time
+        mock_s3_client.upload_fileobj.side_effect = lambda *args, **kwargs: barrier.wait()
+
+        handler.upload_many({"a": b"1", "b": b"2", "c": b"3"})
+
+        uploaded_keys = sorted(call.args[2] for call in mock_s3_client.upload_fileobj.call_args_list)
+        self.assertEqual(uploaded_keys, ["a", "b", "c"])
+
+    def test_upload_many_attempts_every_upload_before_raising(self):
+        mock_s3_client = MagicMock()
+        handler = S3Handler(mock_s3_client, "test-bucket", max_concurrent_uploads=1)
+
+        def upload_fileobj(fileobj, bucket, key, Config=None):
+            if key == "a":
+                raise RuntimeError("upload failed")
+        mock_s3_client.upload_fileobj.side_effect = upload_fileobj
+
+        with self.assertRaises(RuntimeError):
+            handler.upload_many({"a": b"1", "b": b"2"})
+
+        self.assertEqual(mock_s3_client.upload_fileobj.call_count, 2)
+
+    def test_upload_dataframe(self):
         mock_s3_client = MagicMock()
         handler = S3Handler(mock_s3_client, "test-bucket")
 
         df = pd.DataFrame({"col1": [1, 2, 3], "col2": ["a", "b", "c"]})
 
-        with patch("pandas.DataFrame.to_csv") as mock_to_csv:
+        with patch("os.remove") as mock_remove:
             handler.upload_dataframe(df, "test_key")
 
-            mock_to_csv.assert_called_once_with("temp.csv", index=False)
-            mock_s3_client.upload_file.assert_called_once_with("temp.csv", "test-bucket", "test_key")
-            mock_remove.assert_called_once_with("temp.csv")
+            mock_remove.assert_not_called()
+        fileobj, bucket, key = mock_s3_client.upload_fileobj.call_args.args
+        self.assertEqual(fileobj.read(), b"col1,col2\n1,a\n2,b\n3,c\n")
+        self.assertEqual((bucket, key), ("test-bucket", "test_key"))
+        mock_s3_client.upload_file.assert_not_called()
 
-    @patch("os.remove")
-    def test_download_dataframe(self, mock_remove):
+    def test_download_dataframe(self):
         mock_s3_client = MagicMock()
         handler = S3Handler(mock_s3_client, "test-bucket")
+        mock_s3_client.download_fileobj.side_effect = \
+            lambda bucket, key, fileobj: fileobj.write(b"col1,col2\n1,a\n2,b\n3,c\n")
 
-        with patch("pandas.read_csv", return_value=pd.DataFrame({"col1": [1, 2, 3], "col2": ["a", "b", "c"]})) as mock_read_csv:
-            df = handler.download_dataframe("test_key")
-
-            mock_s3_client.download_file.assert_called_once_with("test-bucket", "test_key", "temp.csv")
-            mock_read_csv.assert_called_once_with("temp.csv")
-            mock_remove.assert_called_once_with("temp.csv")
+        df = handler.download_dataframe("test_key")
 
-            self.assertTrue(isinstance(df, pd.DataFrame))
-            self.assertListEqual(df.columns.tolist(), ["col1", "col2"])
-            self.assertListEqual(df["col1"].tolist(), [1, 2, 3])
-            self.assertListEqual(df["col2"].tolist(), ["a", "b", "c"])
+        self.assertEqual(mock_s3_client.download_fileobj.call_args.args[:2], ("test-bucket", "test_key"))
+        self.assertTrue(isinstance(df, pd.DataFrame))
+        self.assertListEqual(df.columns.tolist(), ["col1", "col2"])
+        self.assertListEqual(df["col1"].tolist(), [1, 2, 3])
+        self.assertListEqual(df["col2"].tolist(), ["a", "b", "c"])
 
 
 if __name__ == "__main__":
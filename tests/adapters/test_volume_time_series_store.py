@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.adapters.volume_time_series_store import VolumeTimeSeriesStore
+
+HOUR_MS = 60 * 60 * 1000
+JAN_1_MS = 1704067200000  # 2024-01-01T00:00:00Z
+JAN_2_MS = JAN_1_MS + 24 * HOUR_MS
+JAN_3_MS = JAN_2_MS + 24 * HOUR_MS
+
+class TestVolumeTimeSeriesStore(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "state", "volume_time_series.sqlite")
+        self.store = VolumeTimeSeriesStore(self.db_path)
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_empty_market_has_no_high_water_mark(self):
+        self.assertIsNone(self.store.high_water_mark("BTC_USDT"))
+        self.assertEqual(self.store.load("BTC_USDT"), [])
+
+    def test_append_only_keeps_points_after_high_water_mark(self):
+        self.assertEqual(self.store.append("BTC_USDT", [[2000, 20.0], [1000, 10.0]]), 2)
+        self.assertEqual(self.store.append("BTC_USDT", [[2000, 20.5], [3000, 30.0]]), 1)
+
+        self.assertEqual(self.store.high_water_mark("BTC_USDT"), 3000)
+        self.assertEqual(self.store.load("BTC_USDT"), [[1000, 10.0], [2000, 20.0], [3000, 30.0]])
+        self.assertEqual(self.store.load("BTC_USDT", since_timestamp_ms=2000), [[2000, 20.0], [3000, 30.0]])
+
+    def test_persists_across_instances(self):
+        self.store.append("BTC_USDT", [[1000, 10.0]])
+        self.store.close()
+
+        self.store = VolumeTimeSeriesStore(self.db_path)
+
+        self.assertEqual(self.store.high_water_mark("BTC_USDT"), 1000)
+
+    def test_a_day_takes_the_value_of_its_last_point(self):
+        # Hourly points, as returned by CoinGecko for ranges longer than a day
+        self.store.append("BTC_USDT", [[JAN_1_MS + hour * HOUR_MS, float(hour)] for hour in range(30)])
+        self.store.append("ETH_USDT", [[JAN_1_MS, 4.0]])
+
+        self.assertEqual(self.store.load_markets_historical_volume().to_dict("records"), [
+            {"market_id": "BTC_USDT", "date": "2024-01-01", "volume_usd": 23.0},
+            {"market_id": "BTC_USDT", "date": "2024-01-02", "volume_usd": 29.0},
+            {"market_id": "ETH_USDT", "date": "2024-01-01", "volume_usd": 4.0},
+        ])
+
+    def test_range_queries(self):
+        for market_id, volumes in (("BTC_USDT", [1.0, 2.0, 3.0]), ("ETH_USDT", [4.0, 5.0, 6.0])):
+            self.store.append(market_id, [[JAN_1_MS + HOUR_MS, volumes[0]], [JAN_2_MS + HOUR_MS, volumes[1]],
+                                          [JAN_3_MS + HOUR_MS, volumes[2]]])
+
+        btc_range = self.store.load_markets_historical_volume(["BTC_USDT"], since_date="2024-01-02")
+        every_market_on_a_day = self.store.load_markets_historical_volume(since_date="2024-01-01", until_date="2024-01-01")
+
+        self.assertEqual(btc_range["volume_usd"].tolist(), [2.0, 3.0])
+        self.assertEqual(every_market_on_a_day["market_id"].tolist(), ["BTC_USDT", "ETH_USDT"])
+        self.assertEqual(every_market_on_a_day["volume_usd"].tolist(), [1.0, 4.0])
+        self.assertTrue(self.store.load_markets_historical_volume([]).empty)
+
+    def test_upserts_are_idempotent_and_keep_the_history_across_instances(self):
+        first_run = pd.DataFrame({"exchange_id": ["binance", "kraken"], "date": ["2024-01-01", "2024-01-01"],
+                                  "volume_btc": [10.0, 5.0]})
+        self.store.upsert_exchanges_historical_trade_volume(first_run)
+        self.store.upsert_exchanges_historical_trade_volume(first_run)
+        self.store.close()
+
+        self.store = VolumeTimeSeriesStore(self.db_path)
+        self.store.upsert_exchanges_historical_trade_volume(pd.DataFrame({
+            "exchange_id": ["binance", "binance"], "date": ["2024-01-01", "2024-01-02"], "volume_btc": [11.0, 12.0]}))
+
+        self.assertEqual(self.store.load_exchanges_historical_trade_volume().to_dict("records"), [
+            {"exchange_id": "binance", "date": "2024-01-01", "volume_btc": 11.0},
+            {"exchange_id": "binance", "date": "2024-01-02", "volume_btc": 12.0},
+            {"exchange_id": "kraken", "date": "2024-01-01", "volume_btc": 5.0},
+        ])
+
+    def test_a_day_upserted_several_times_in_a_table_keeps_its_last_row(self):
+        written_rows_count = self.store.upsert_exchanges_historical_trade_volume(pd.DataFrame({
+            "exchange_id": ["binance"] * 3, "date": ["2024-01-01", "2024-01-01", "2024-01-02"],
+            "volume_btc": [10.0, 11.0, 12.0]}))
+
+        self.assertEqual(written_rows_count, 2)
+        self.assertEqual(self.store.load_exchanges_historical_trade_volume()["volume_btc"].tolist(), [11.0, 12.0])
+
+    def test_empty_tables_are_skipped(self):
+        self.assertEqual(self.store.upsert_exchanges_historical_trade_volume(pd.DataFrame([])), 0)
+        self.assertEqual(list(self.store.load_exchanges_historical_trade_volume().columns),
+                         ["exchange_id", "date", "volume_btc"])
+        self.assertEqual(list(self.store.load_markets_historical_volume().columns),
+                         ["market_id", "date", "volume_usd"])
+
+if __name__ == "__main__":
+    unittest.main()
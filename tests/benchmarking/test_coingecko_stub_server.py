@@ -0,0 +1,75 @@
+import unittest
+import tempfile
+from unittest.mock import patch
+from src.adapters.http_response_cache import HTTPResponseCache
+from benchmarks.coingecko_stub_server import CoingeckoStubServer, StubServerConfig
+from src.adapters.coingecko_api import CoingeckoAPI
+
+class TestCoingeckoStubServer(unittest.TestCase):
+    def test_serves_paginated_endpoints_to_the_api_client(self):
+        config = StubServerConfig(exchanges_count=260, tickers_per_exchange=150, latency_median_ms=0)
+        with CoingeckoStubServer(config) as stub_server:
+            api = CoingeckoAPI(rate_limiter_retries=1, base_url=stub_server.base_url)
+
+            exchange_pages = list(api.iter_exchange_pages())
+            ticker_pages = list(api.iter_ticker_pages("exchange-0"))
+            historical_volume = api.fetch_historical_volume("bitcoin", "usd")
+            volume_chart = api.fetch_exchange_volume_chart("exchange-0", days=30)
+            api.close()
+
+            self.assertEqual([len(page) for page in exchange_pages], [250, 10])
+            self.assertEqual([len(page) for page in ticker_pages], [100, 50])
+            self.assertEqual(ticker_pages[0][0]["coin_id"], "cardano")
+            self.assertEqual(len(historical_volume["prices"]), 30 * 24)
+            self.assertEqual(len(volume_chart), 30 * 24)
+            self.assertEqual(stub_server.requests_count, 6)
+
+    def test_filters_tickers_on_coin_ids(self):
+        config = StubServerConfig(exchanges_count=1, tickers_per_exchange=150, latency_median_ms=0)
+        with CoingeckoStubServer(config) as stub_server:
+            api = CoingeckoAPI(rate_limiter_retries=1, base_url=stub_server.base_url)
+
+            tickers = list(api.iter_tickers("exchange-0"))
+            filtered_tickers = list(api.iter_tickers("exchange-0", coin_ids=["cardano"]))
+            api.close()
+
+            self.assertEqual(filtered_tickers, [ticker for ticker in tickers if ticker["coin_id"] == "cardano"])
+            self.assertGreater(len(filtered_tickers), 0)
+
+    def test_streamed_tickers_keep_the_analyzed_fields(self):
+        config = StubServerConfig(exchanges_count=1, tickers_per_exchange=150, latency_median_ms=0)
+        with CoingeckoStubServer(config) as stub_server:
+            api = CoingeckoAPI(rate_limiter_retries=1, base_url=stub_server.base_url)
+            streaming_api = CoingeckoAPI(rate_limiter_retries=1, base_url=stub_server.base_url, stream_tickers=True)
+
+            tickers = list(api.iter_tickers("exchange-0"))
+            streamed_tickers = list(streaming_api.iter_tickers("exchange-0"))
+            api.close()
+            streaming_api.close()
+
+            self.assertEqual(len(streamed_tickers), 150)
+            with tempfile.TemporaryDirectory() as cache_dir:
+                caching_api = CoingeckoAPI(rate_limiter_retries=1, base_url=stub_server.base_url, stream_tickers=True,
+                                           response_cache=HTTPResponseCache(cache_dir, max_size_bytes=1 << 20))
+                self.assertEqual(list(caching_api.iter_tickers("exchange-0")), streamed_tickers)
+                # Served from the cache, already in memory
+                self.assertEqual(list(caching_api.iter_tickers("exchange-0")), streamed_tickers)
+                caching_api.close()
+            self.assertEqual([(ticker["base"], ticker["target"], ticker["coin_id"], ticker["market"]["name"]) for ticker in streamed_tickers],
+                             [(ticker["base"], ticker["target"], ticker["coin_id"], ticker["market"]["name"]) for ticker in tickers])
+
+    @patch("time.sleep", return_value=None)
+    def test_throttles_with_retry_after(self, mock_sleep):
+        config = StubServerConfig(exchanges_count=1, latency_median_ms=0, throttle_rate=1.0, retry_after_seconds=3)
+        with CoingeckoStubServer(config) as stub_server:
+            api = CoingeckoAPI(rate_limiter_retries=2, base_url=stub_server.base_url)
+
+            with self.assertRaises(Exception):
+                api.fetch_exchanges()
+            api.close()
+
+            mock_sleep.assert_called_once_with(3)
+            self.assertEqual(stub_server.requests_by_status[429], 2)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import unittest
+from unittest.mock import MagicMock
+from src.adapters.async_coingecko_api import AsyncCoingeckoAPI
+from src.core.coingecko.async_coingecko_data_analyzer import AsyncCoingeckoSimilarExchangesDataAnalyzer
+from src.core.coingecko.coingecko_data_analyzer import CoingeckoSimilarExchangesDataAnalyzer
+from src.core.coingecko.coingecko_data_fetcher_limits import CoingeckoDataFetcherLimits
+from src.core.coingecko.exchange_shard import ExchangeShard
+
+EXCHANGES = [{"id": f"exchange_{i}", "name": f"Exchange {i}"} for i in range(6)]
+TICKERS_BY_EXCHANGE = {
+    "exchange_0": [{"base": "BTC", "target": "EUR", "market": {"name": "Exchange 0"}}],
+    "exchange_1": [{"base": "BTC", "target": "USDT", "market": {"name": "Exchange 1"}}],
+    "exchange_2": [{"base": "ETH", "target": "BTC", "market": {"name": "Exchange 2"}}],
+    "exchange_3": [{"base": "BTC", "target": "ETH", "market": {"name": "Exchange 3"}},
+                   {"base": "BTC", "target": "USDT", "market": {"name": "Exchange 3"}}],
+    "exchange_4": [{"base": "BTC", "target": "USDT", "market": {"name": "Exchange 4"}}],
+    "exchange_5": [{"base": "BTC", "target": "USDT", "market": {"name": "Exchange 5"}}],
+}
+
+class TestAsyncCoingeckoSimilarExchangesDataAnalyzer(unittest.TestCase):
+    def setUp(self):
+        self.mock_coingecko_api = MagicMock()
+        self.mock_coingecko_api.fetch_exchanges.side_effect = lambda page: EXCHANGES if page == 1 else []
+        self.mock_coingecko_api.iter_exchanges.side_effect = lambda: iter(EXCHANGES)
+        self.mock_coingecko_api.fetch_markets.side_effect = \
+            lambda exchange_id, page, coin_ids=None: {"tickers": TICKERS_BY_EXCHANGE[exchange_id] if page == 1 else []}
+        self.mock_coingecko_api.iter_ticker_pages.side_effect = \
+            lambda exchange_id, coin_ids=None: iter([TICKERS_BY_EXCHANGE[exchange_id]])
+        self.async_coingecko_api = AsyncCoingeckoAPI(self.mock_coingecko_api, max_concurrent_requests=3)
+
+    def tearDown(self):
+        self.async_coingecko_api.close()
+
+    def test_same_output_as_serial_analyzer(self):
+        limits = CoingeckoDataFetcherLimits(exchanges_with_similar_trades_limit=2, exchanges_to_lookup_limit=5)
+        bitso_markets = [("BTC", "ETH"), ("BTC", "USDT")]
+
+        serial_result = CoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, limits) \
+            .generate_exchanges_with_similar_trades(bitso_markets)
+        async_result = AsyncCoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, self.async_coingecko_api, limits) \
+            .generate_exchanges_with_similar_trades(bitso_markets)
+
+        self.assertEqual(async_result, serial_result)
+        self.assertEqual([exchange["exchange_id"] for exchange in async_result[0]], ["exchange_1", "exchange_3"])
+        self.assertEqual([market["market_id"] for market in async_result[1]], ["BTC_USDT", "BTC_ETH", "BTC_USDT"])
+
+    def test_sharded_same_output_as_serial_analyzer(self):
+        limits = CoingeckoDataFetcherLimits(exchanges_with_similar_trades_limit=2, exchanges_to_lookup_limit=6)
+        shard = ExchangeShard.parse("1/2")
+
+        serial_result = CoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, limits, shard=shard) \
+            .generate_exchanges_with_similar_trades([("BTC", "USDT")])
+        async_result = AsyncCoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, self.async_coingecko_api, limits,
+                                                                  shard=shard) \
+            .generate_exchanges_with_similar_trades([("BTC", "USDT")])
+
+        self.assertEqual(async_result, serial_result)
+        self.assertEqual([(exchange["exchange_id"], exchange["exchange_position"]) for exchange in async_result[0]],
+                         [("exchange_1", 1), ("exchange_3", 3)])
+
+    def test_respects_exchanges_to_lookup_limit(self):
+        limits = CoingeckoDataFetcherLimits(exchanges_with_similar_trades_limit=10, exchanges_to_lookup_limit=2)
+        analyzer = AsyncCoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, self.async_coingecko_api, limits)
+
+        similar_exchanges, shared_markets = analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT")])
+
+        self.assertEqual([exchange["exchange_id"] for exchange in similar_exchanges], ["exchange_1"])
+        self.assertEqual(self.mock_coingecko_api.fetch_markets.call_count, 2)
+
+    def test_cancels_outstanding_requests_after_limit(self):
+        limits = CoingeckoDataFetcherLimits(exchanges_with_similar_trades_limit=1, exchanges_to_lookup_limit=6)
+        async_coingecko_api = AsyncCoingeckoAPI(self.mock_coingecko_api, max_concurrent_requests=1)
+        analyzer = AsyncCoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, async_coingecko_api, limits)
+
+        similar_exchanges, _ = analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT")])
+        async_coingecko_api.close()
+
+        self.assertEqual([exchange["exchange_id"] for exchange in similar_exchanges], ["exchange_1"])
+        self.assertLess(self.mock_coingecko_api.fetch_markets.call_count, len(EXCHANGES))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,13 @@
+import tempfile
+import time
 import unittest
 from unittest.mock import MagicMock
+from src.adapters.volume_time_series_store import VolumeTimeSeriesStore
+from src.adapters.pipeline_checkpoint_store import PipelineCheckpointStore
+from src.core.coingecko.exchange_market_index import ExchangeMarketIndex
 from src.core.coingecko.coingecko_data_analyzer import CoingeckoSimilarExchangesDataAnalyzer
 from src.core.coingecko.coingecko_data_fetcher_limits import CoingeckoDataFetcherLimits
+from src.core.coingecko.exchange_shard import ExchangeShard
 
 class TestCoingeckoSimilarExchangesDataAnalyzer(unittest.TestCase):
     def setUp(self):
@@ -13,24 +19,86 @@ class TestCoingeckoSimilarExchangesDataAnalyzer(unittest.TestCase):
         self.analyzer = CoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, self.limits)
 
     def test_generate_exchanges_with_similar_trades(self):
-        self.mock_coingecko_api.fetch_exchanges.return_value = [
+        self.mock_coingecko_api.iter_exchanges.return_value = iter([
             {"id": "binance", "name": "Binance", "year_established": 2017, "country": "Cayman Islands",
              "trust_score": 10, "trust_score_rank": 1},
             {"id": "coinbase", "name": "Coinbase", "year_established": 2012, "country": "USA",
              "trust_score": 9, "trust_score_rank": 2}
-        ]
-        self.mock_coingecko_api.fetch_markets.side_effect = [
-            {"tickers": [{"base": "BTC", "target": "USDT", "market": {"name": "Binance"}}]},
-            {"tickers": [{"base": "BTC", "target": "ETH", "market": {"name": "Coinbase"}}]}
+        ])
+        self.mock_coingecko_api.iter_ticker_pages.side_effect = [
+            iter([[{"base": "BTC", "target": "USDT", "market": {"name": "Binance"}}]]),
+            iter([[{"base": "BTC", "target": "ETH", "market": {"name": "Coinbase"}}]])
         ]
 
         bitso_markets = [("BTC", "USDT")]
-        similar_exchanges, shared_markets = self.analyzer.generate_exchanges_with_similar_trades(bitso_markets)
+        on_exchange_matched = MagicMock()
+        similar_exchanges, shared_markets = self.analyzer.generate_exchanges_with_similar_trades(bitso_markets,
+                                                                                                 on_exchange_matched)
 
         self.assertEqual(len(similar_exchanges), 1)
         self.assertEqual(similar_exchanges[0]["exchange_id"], "binance")
         self.assertEqual(len(shared_markets), 1)
         self.assertEqual(shared_markets[0]["market_id"], "BTC_USDT")
+        on_exchange_matched.assert_called_once_with(similar_exchanges[0], shared_markets)
+
+    def test_generate_exchanges_with_similar_trades_looks_up_the_exchanges_of_its_shard_only(self):
+        self.mock_coingecko_api.iter_exchanges.return_value = iter([{"id": f"exchange-{position}"} for position in range(5)])
+        self.mock_coingecko_api.iter_ticker_pages.side_effect = \
+            lambda exchange_id, coin_ids=None: iter([[{"base": "BTC", "target": "USDT", "market": {"name": exchange_id}}]])
+        analyzer = CoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api,
+                                                         CoingeckoDataFetcherLimits(exchanges_with_similar_trades_limit=5,
+                                                                                    exchanges_to_lookup_limit=4),
+                                                         shard=ExchangeShard.parse("1/2"))
+
+        similar_exchanges, _ = analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT")])
+
+        self.assertEqual([(exchange["exchange_id"], exchange["exchange_position"]) for exchange in similar_exchanges],
+                         [("exchange-1", 1), ("exchange-3", 3)])
+
+    def test_generate_exchanges_with_similar_trades_stops_paging_when_every_market_is_found(self):
+        self.mock_coingecko_api.iter_exchanges.return_value = iter([{"id": "binance", "name": "Binance"}])
+        pages_fetched = []
+
+        def iter_ticker_pages(exchange_id, coin_ids=None):
+            for page in range(1, 4):
+                pages_fetched.append(page)
+                yield [{"base": "BTC", "target": "USDT", "market": {"name": "Binance"}}] if page == 2 else \
+                    [{"base": "ETH", "target": "EUR", "market": {"name": "Binance"}}]
+
+        self.mock_coingecko_api.iter_ticker_pages.side_effect = iter_ticker_pages
+
+        similar_exchanges, shared_markets = self.analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT")])
+
+        self.assertEqual(pages_fetched, [1, 2])
+        self.assertEqual([market["market_id"] for market in shared_markets], ["BTC_USDT"])
+
+    def test_generate_exchanges_with_similar_trades_filters_tickers_on_reference_base_coins(self):
+        self.mock_coingecko_api.iter_exchanges.return_value = iter([{"id": "binance", "name": "Binance"}])
+        self.mock_coingecko_api.iter_ticker_pages.return_value = iter([])
+
+        self.analyzer.generate_exchanges_with_similar_trades([("ETH", "USDT"), ("BTC", "MXN"), ("BTC", "USDT")])
+
+        self.mock_coingecko_api.iter_ticker_pages.assert_called_once_with("binance", coin_ids=["bitcoin", "ethereum"])
+
+    def test_generate_exchanges_with_similar_trades_scans_every_ticker_when_a_base_coin_is_unknown(self):
+        self.mock_coingecko_api.iter_exchanges.return_value = iter([{"id": "binance", "name": "Binance"}])
+        self.mock_coingecko_api.iter_ticker_pages.return_value = iter([])
+
+        self.analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT"), ("UNLISTED", "USDT")])
+
+        self.mock_coingecko_api.iter_ticker_pages.assert_called_once_with("binance", coin_ids=None)
+
+    def test_generate_exchanges_with_similar_trades_normalizes_symbols(self):
+        self.mock_coingecko_api.iter_exchanges.return_value = iter([{"id": "binance", "name": "Binance"}])
+        self.mock_coingecko_api.iter_ticker_pages.return_value = iter([[
+            {"base": "btc", "target": "usdt", "market": {"name": "Binance"}},
+            {"base": "XBT", "target": "USDT", "coin_id": "bitcoin", "target_coin_id": "tether", "market": {"name": "Binance"}},
+        ]])
+
+        _, shared_markets = self.analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT")])
+
+        self.assertEqual([(market["market_id"], market["base"], market["target"]) for market in shared_markets],
+                         [("BTC_USDT", "BTC", "USDT"), ("BTC_USDT", "BTC", "USDT")])
 
     def test_generate_markets_historical_volume_table(self):
         self.mock_coingecko_api.fetch_historical_volume.return_value = {
@@ -41,8 +109,78 @@ class TestCoingeckoSimilarExchangesDataAnalyzer(unittest.TestCase):
         historical_volume = self.analyzer.generate_markets_historical_volume_table(shared_markets)
 
         self.assertEqual(len(historical_volume), 2)
-        self.assertEqual(historical_volume[0]["market_id"], "BTC_USDT")
-        self.assertEqual(historical_volume[0]["volume_usd"], 10000)
+        self.assertEqual(historical_volume.iloc[0]["market_id"], "BTC_USDT")
+        self.assertEqual(historical_volume.iloc[0]["date"], "2021-01-01")
+        self.assertEqual(historical_volume.iloc[1]["date"], "2021-01-02")
+        self.assertEqual(historical_volume.iloc[0]["volume_usd"], 10000)
+
+    def test_generate_markets_historical_volume_table_dedupes_resolved_pairs(self):
+        self.mock_coingecko_api.fetch_historical_volume.side_effect = lambda coin_id, vs_currency: {
+            "prices": [[1609459200000, 10000 if coin_id == "bitcoin" else 500]]
+        }
+
+        shared_markets = [{"market_id": "BTC_USDT"}, {"market_id": "ETH_USDT"}, {"market_id": "BTC_USDC"},
+                          {"market_id": "BTC_USD"}, {"market_id": "BTC_USDT"}]
+        historical_volume = self.analyzer.generate_markets_historical_volume_table(shared_markets)
+
+        self.assertEqual(self.mock_coingecko_api.fetch_historical_volume.call_count, 2)
+        self.mock_coingecko_api.fetch_historical_volume.assert_any_call("bitcoin", "usd")
+        self.mock_coingecko_api.fetch_historical_volume.assert_any_call("ethereum", "usd")
+        self.assertEqual([(row["market_id"], row["volume_usd"]) for row in historical_volume.to_dict("records")], [
+            ("BTC_USDT", 10000), ("ETH_USDT", 500), ("BTC_USDC", 10000), ("BTC_USD", 10000)
+        ])
+
+    def test_generate_markets_historical_volume_table_with_store_dedupes_resolved_pairs(self):
+        hour_ms = 60 * 60 * 1000
+        now_ms = int(time.time() * 1000)
+        self.mock_coingecko_api.fetch_historical_volume.return_value = {
+            "prices": [[now_ms - 2 * hour_ms, 10000]]
+        }
+        self.mock_coingecko_api.fetch_historical_volume_range.return_value = {
+            "prices": [[now_ms - hour_ms, 20000]]
+        }
+
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = VolumeTimeSeriesStore(f"{store_dir}/volume_time_series.sqlite")
+            analyzer = CoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, self.limits, store)
+            analyzer.generate_markets_historical_volume_table([{"market_id": "BTC_USDT"}])
+            # BTC_USDC has no history yet, so the pair is fetched in full once for both markets
+            second_run = analyzer.generate_markets_historical_volume_table(
+                [{"market_id": "BTC_USDT"}, {"market_id": "BTC_USDC"}])
+            third_run = analyzer.generate_markets_historical_volume_table(
+                [{"market_id": "BTC_USDT"}, {"market_id": "BTC_USDC"}])
+            store.close()
+
+        self.assertEqual(self.mock_coingecko_api.fetch_historical_volume.call_count, 2)
+        self.mock_coingecko_api.fetch_historical_volume_range.assert_called_once()
+        self.assertEqual([row["market_id"] for row in second_run.to_dict("records")], ["BTC_USDT", "BTC_USDC"])
+        self.assertEqual([(row["market_id"], row["volume_usd"]) for row in third_run.to_dict("records")], [
+            ("BTC_USDT", 10000), ("BTC_USDT", 20000), ("BTC_USDC", 10000), ("BTC_USDC", 20000)
+        ])
+
+    def test_generate_markets_historical_volume_table_fetches_only_new_points(self):
+        hour_ms = 60 * 60 * 1000
+        now_ms = int(time.time() * 1000)
+        self.mock_coingecko_api.fetch_historical_volume.return_value = {
+            "prices": [[now_ms - 3 * hour_ms, 10000], [now_ms - 2 * hour_ms, 20000]]
+        }
+        self.mock_coingecko_api.fetch_historical_volume_range.return_value = {
+            "prices": [[now_ms - 2 * hour_ms, 20000], [now_ms - hour_ms, 30000]]
+        }
+
+        with tempfile.TemporaryDirectory() as store_dir:
+            store = VolumeTimeSeriesStore(f"{store_dir}/volume_time_series.sqlite")
+            analyzer = CoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, self.limits, store)
+            first_run = analyzer.generate_markets_historical_volume_table([{"market_id": "BTC_USDT"}])
+            second_run = analyzer.generate_markets_historical_volume_table([{"market_id": "BTC_USDT"}])
+            store.close()
+
+        self.mock_coingecko_api.fetch_historical_volume.assert_called_once_with("bitcoin", "usd")
+        self.mock_coingecko_api.fetch_historical_volume_range.assert_called_once()
+        from_timestamp = self.mock_coingecko_api.fetch_historical_volume_range.call_args.args[2]
+        self.assertLess(from_timestamp, (now_ms - 2 * hour_ms) / 1000)
+        self.assertEqual(first_run["volume_usd"].tolist(), [10000, 20000])
+        self.assertEqual(second_run["volume_usd"].tolist(), [10000, 20000, 30000])
 
     def test_generate_exchanges_trade_volume(self):
         self.mock_coingecko_api.fetch_exchange_volume_chart.return_value = [
@@ -64,5 +202,87 @@ class TestCoingeckoSimilarExchangesDataAnalyzer(unittest.TestCase):
 
         self.assertEqual(len(trade_volume), 0)
 
+    def test_generate_exchanges_with_similar_trades_matches_fresh_exchanges_against_the_index(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            exchange_market_index = ExchangeMarketIndex(f"{temp_dir}/index.sqlite", ttl_seconds=60)
+            analyzer = CoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, self.limits,
+                                                             exchange_market_index=exchange_market_index)
+            self.mock_coingecko_api.iter_exchanges.side_effect = lambda: iter([{"id": "binance", "name": "Binance"}])
+            self.mock_coingecko_api.iter_ticker_pages.return_value = iter([
+                [{"base": "BTC", "target": "USDT", "market": {"name": "Binance"}}],
+                [{"base": "ETH", "target": "USDT", "market": {"name": "Binance"}}]
+            ])
+
+            # A base coin without CoinGecko id disables the server side filter, so the exchange is fully indexed
+            _, shared_markets = analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT"), ("UNLISTED", "USDT")])
+            # A different reference market list is answered from the index, without fetching tickers
+            _, new_shared_markets = analyzer.generate_exchanges_with_similar_trades([("ETH", "USDT")])
+
+            # UNLISTED/USDT is never found, so every page is scanned and the exchange is fully indexed
+            self.assertEqual(self.mock_coingecko_api.iter_ticker_pages.call_count, 1)
+            self.assertEqual([market["market_id"] for market in shared_markets], ["BTC_USDT"])
+            self.assertEqual(new_shared_markets, [{"exchange_id": "binance", "market_id": "ETH_USDT", "base": "ETH",
+                                                   "target": "USDT", "name": "Binance"}])
+            self.assertEqual([listing["exchange_id"] for listing in exchange_market_index.exchanges_listing("ETH", "USDT")],
+                             ["binance"])
+            exchange_market_index.close()
+
+    def test_generate_exchanges_with_similar_trades_stops_paging_on_indexed_exchanges(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            exchange_market_index = ExchangeMarketIndex(f"{temp_dir}/index.sqlite", ttl_seconds=60)
+            analyzer = CoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, self.limits,
+                                                             exchange_market_index=exchange_market_index)
+            self.mock_coingecko_api.iter_exchanges.side_effect = lambda: iter([{"id": "binance", "name": "Binance"}])
+            pages_fetched = []
+
+            def iter_ticker_pages(exchange_id, coin_ids=None):
+                for page in range(1, 4):
+                    pages_fetched.append(page)
+                    yield [{"base": "BTC", "target": "USDT", "market": {"name": "Binance"}}] if page == 1 else \
+                        [{"base": "ETH", "target": "USDT", "market": {"name": "Binance"}}]
+
+            self.mock_coingecko_api.iter_ticker_pages.side_effect = iter_ticker_pages
+
+            _, shared_markets = analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT")])
+            # The partial scan answers the markets it lists, other markets rescan the exchange
+            _, rerun_shared_markets = analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT")])
+            _, new_shared_markets = analyzer.generate_exchanges_with_similar_trades([("ETH", "USDT")])
+
+            self.assertEqual(pages_fetched, [1, 1, 2])
+            self.assertEqual(self.mock_coingecko_api.iter_ticker_pages.call_count, 2)
+            self.assertEqual([market["market_id"] for market in shared_markets], ["BTC_USDT"])
+            self.assertEqual(rerun_shared_markets, shared_markets)
+            self.assertEqual([market["market_id"] for market in new_shared_markets], ["ETH_USDT"])
+            exchange_market_index.close()
+
+    def test_rerun_with_checkpoints_skips_completed_units(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            checkpoint_store = PipelineCheckpointStore(f"{temp_dir}/checkpoints.sqlite", "run-1")
+            analyzer = CoingeckoSimilarExchangesDataAnalyzer(self.mock_coingecko_api, self.limits,
+                                                             checkpoint_store=checkpoint_store)
+            self.mock_coingecko_api.iter_exchanges.side_effect = lambda: iter([{"id": "binance", "name": "Binance"}])
+            self.mock_coingecko_api.iter_ticker_pages.side_effect = \
+                lambda exchange_id, coin_ids=None: iter([[{"base": "BTC", "target": "USDT", "market": {"name": "Binance"}}]])
+            self.mock_coingecko_api.fetch_historical_volume.return_value = {"prices": [[1609459200000, 10000]]}
+            # Kraken fails on every attempt, binance is only fetched by the first one
+            def fetch_exchange_volume_chart(exchange_id, days):
+                if exchange_id == "kraken":
+                    raise Exception("API error")
+                return [[1609459200000, "100"]]
+            self.mock_coingecko_api.fetch_exchange_volume_chart.side_effect = fetch_exchange_volume_chart
+
+            for _ in range(2):
+                similar_exchanges, shared_markets = analyzer.generate_exchanges_with_similar_trades([("BTC", "USDT")])
+                historical_volume = analyzer.generate_markets_historical_volume_table(shared_markets)
+                trade_volume = analyzer.generate_exchanges_trade_volume(similar_exchanges + [{"exchange_id": "kraken"}], 30)
+
+            self.assertEqual(self.mock_coingecko_api.iter_ticker_pages.call_count, 1)
+            self.assertEqual(self.mock_coingecko_api.fetch_historical_volume.call_count, 1)
+            self.assertEqual(self.mock_coingecko_api.fetch_exchange_volume_chart.call_count, 3)
+            self.assertEqual([market["market_id"] for market in shared_markets], ["BTC_USDT"])
+            self.assertEqual(historical_volume.iloc[0]["volume_usd"], 10000)
+            self.assertEqual([row["exchange_id"] for row in trade_volume], ["binance"])
+            checkpoint_store.close()
+
 if __name__ == "__main__":
     unittest.main()
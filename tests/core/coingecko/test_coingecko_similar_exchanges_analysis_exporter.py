@@ -3,8 +3,10 @@ from unittest.mock import MagicMock, patch
 from src.core.coingecko.coingecko_similar_exchanges_analysis_exporter import CoingeckoSimilarExchangesDataAnalysisExporter
 from src.config.app_config import AppConfig
 from src.adapters.s3_handler import S3Handler
-import pandas as pd
+from src.utils.parquet_dataset_writer import ParquetDatasetWriter
+from src.adapters.volume_time_series_store import VolumeTimeSeriesStore
 import os
+import pandas as pd
 
 class TestCoingeckoSimilarExchangesDataAnalysisExporter(unittest.TestCase):
     def setUp(self):
@@ -19,9 +21,9 @@ class TestCoingeckoSimilarExchangesDataAnalysisExporter(unittest.TestCase):
         self.mock_s3_handler = MagicMock(spec=S3Handler)
         self.exporter = CoingeckoSimilarExchangesDataAnalysisExporter(self.mock_app_config, self.mock_s3_handler)
 
+    @patch.object(CoingeckoSimilarExchangesDataAnalysisExporter, "write_local_file")
     @patch("os.makedirs")
-    @patch("pandas.DataFrame.to_csv")
-    def test_export_with_s3(self, mock_to_csv, mock_makedirs):
+    def test_export_with_s3(self, mock_makedirs, mock_write_local_file):
         exchanges_with_similar_markets = [{"exchange_id": "binance", "trust_score": 10}]
         shared_markets = [{"market_id": "BTC_USDT"}]
         markets_historical_volume = [{"market_id": "BTC_USDT", "volume_usd": 10000}]
@@ -34,28 +36,23 @@ class TestCoingeckoSimilarExchangesDataAnalysisExporter(unittest.TestCase):
             exchanges_historical_trade_volume,
         )
 
-        self.mock_s3_handler.upload_file.assert_any_call(
+        mock_write_local_file.assert_any_call(
             os.path.join("./", "output", "data", "analyzed", "exchange_table.csv"),
-            "coingecko/analyzed/exchange_table.csv"
-        )
-        self.mock_s3_handler.upload_file.assert_any_call(
-            os.path.join("./", "output", "data", "analyzed", "shared_markets_table.csv"),
-            "coingecko/analyzed/shared_markets_table.csv"
-        )
-        self.mock_s3_handler.upload_file.assert_any_call(
-            os.path.join("./", "output", "data", "analyzed", "markets_historical_volume_df.csv"),
-            "coingecko/analyzed/markets_historical_volume_df.csv"
-        )
-        self.mock_s3_handler.upload_file.assert_any_call(
-            os.path.join("./", "output", "data", "analyzed", "exchanges_historical_trade_volume.csv"),
-            "coingecko/analyzed/exchanges_historical_trade_volume.csv"
+            b"exchange_id,trust_score\nbinance,10\n"
         )
+        self.mock_s3_handler.upload_many.assert_called_once_with({
+            "coingecko/analyzed/exchange_table.csv": b"exchange_id,trust_score\nbinance,10\n",
+            "coingecko/analyzed/shared_markets_table.csv": b"market_id\nBTC_USDT\n",
+            "coingecko/analyzed/markets_historical_volume_df.csv": b"market_id,volume_usd\nBTC_USDT,10000\n",
+            "coingecko/analyzed/exchanges_historical_trade_volume.csv": b"exchange_id,volume_btc\nbinance,300\n",
+        })
+        self.mock_s3_handler.upload_file.assert_not_called()
         mock_makedirs.assert_called_once_with(os.path.join("./", "output", "data", "analyzed"), exist_ok=True)
-        self.assertEqual(mock_to_csv.call_count, 4)
+        self.assertEqual(mock_write_local_file.call_count, 4)
 
+    @patch.object(CoingeckoSimilarExchangesDataAnalysisExporter, "write_local_file")
     @patch("os.makedirs")
-    @patch("pandas.DataFrame.to_csv")
-    def test_export_without_s3(self, mock_to_csv, mock_makedirs):
+    def test_export_without_s3(self, mock_makedirs, mock_write_local_file):
         self.mock_app_config.write_to_s3 = False
 
         exchanges_with_similar_markets = [{"exchange_id": "binance", "trust_score": 10}]
@@ -70,9 +67,71 @@ class TestCoingeckoSimilarExchangesDataAnalysisExporter(unittest.TestCase):
             exchanges_historical_trade_volume,
         )
 
-        self.mock_s3_handler.upload_file.assert_not_called()
+        self.mock_s3_handler.upload_many.assert_not_called()
         mock_makedirs.assert_called_once_with(os.path.join("./", "output", "data", "analyzed"), exist_ok=True)
-        self.assertEqual(mock_to_csv.call_count, 4)
+        self.assertEqual(mock_write_local_file.call_count, 4)
+
+    @patch.object(CoingeckoSimilarExchangesDataAnalysisExporter, "write_local_file")
+    @patch("os.makedirs")
+    def test_export_parquet_with_s3(self, mock_makedirs, mock_write_local_file):
+        parquet_writer = MagicMock(spec=ParquetDatasetWriter)
+        parquet_writer.write_table.side_effect = lambda df, schema, path: [(path, b"table")]
+        parquet_writer.write_partitioned.side_effect = lambda df, schema, root_path, partition_cols: \
+            [(os.path.join(root_path, *[f"{column}=x" for column in partition_cols], "part-0.parquet"), b"part")]
+        exporter = CoingeckoSimilarExchangesDataAnalysisExporter(self.mock_app_config, self.mock_s3_handler,
+                                                                 parquet_writer)
+
+        exporter.export(
+            [{"exchange_id": "binance", "trust_score": 10}],
+            [{"market_id": "BTC_USDT"}],
+            [{"market_id": "BTC_USDT", "date": "2024-01-01", "volume_usd": 10000}],
+            [{"exchange_id": "binance", "date": "2024-01-01", "volume_btc": 300}],
+        )
+
+        self.assertEqual(parquet_writer.write_table.call_count, 2)
+        markets_call, exchanges_call = parquet_writer.write_partitioned.call_args_list
+        self.assertEqual(markets_call.args[3], ["date", "market_id"])
+        self.assertEqual(exchanges_call.args[3], ["date"])
+        self.mock_s3_handler.upload_many.assert_called_once()
+        s3_objects = self.mock_s3_handler.upload_many.call_args.args[0]
+        self.assertEqual(len(s3_objects), 8)
+        self.assertEqual(s3_objects["coingecko/analyzed/parquet/exchange_table.parquet"], b"table")
+        self.assertEqual(
+            s3_objects["coingecko/analyzed/parquet/markets_historical_volume/date=x/market_id=x/part-0.parquet"],
+            b"part")
+
+    @patch.object(CoingeckoSimilarExchangesDataAnalysisExporter, "write_local_file")
+    @patch("os.makedirs")
+    def test_export_upserts_the_exchanges_trade_volume_into_the_time_series_store(self, mock_makedirs, mock_write_local_file):
+        time_series_store = MagicMock(spec=VolumeTimeSeriesStore)
+        exporter = CoingeckoSimilarExchangesDataAnalysisExporter(self.mock_app_config, self.mock_s3_handler,
+                                                                 time_series_store=time_series_store)
+
+        exporter.export(
+            [{"exchange_id": "binance", "trust_score": 10}],
+            [{"market_id": "BTC_USDT"}],
+            [{"market_id": "BTC_USDT", "date": "2024-01-01", "volume_usd": 10000}],
+            [{"exchange_id": "binance", "date": "2024-01-01", "volume_btc": 300}],
+        )
+
+        exchanges_df = time_series_store.upsert_exchanges_historical_trade_volume.call_args.args[0]
+        self.assertEqual(exchanges_df.to_dict("records"), [{"exchange_id": "binance", "date": "2024-01-01", "volume_btc": 300}])
+
+    @patch.object(CoingeckoSimilarExchangesDataAnalysisExporter, "write_local_file")
+    @patch("os.makedirs")
+    def test_export_with_rolling_analytics(self, mock_makedirs, mock_write_local_file):
+        self.exporter.export(
+            [{"exchange_id": "binance", "trust_score": 10}],
+            [{"market_id": "BTC_USDT"}],
+            [{"market_id": "BTC_USDT", "date": "2024-01-01", "volume_usd": 10000}],
+            [{"exchange_id": "binance", "date": "2024-01-01", "volume_btc": 300}],
+            markets_rolling_analytics=pd.DataFrame({"market_id": ["BTC_USDT"], "volume_usd_ma_7d": [1.5]}),
+        )
+
+        self.assertEqual(mock_write_local_file.call_count, 5)
+        s3_objects = self.mock_s3_handler.upload_many.call_args.args[0]
+        self.assertEqual(s3_objects["coingecko/analyzed/markets_rolling_volume_analytics.csv"],
+                         b"market_id,volume_usd_ma_7d\nBTC_USDT,1.5\n")
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,10 +1,13 @@
 import unittest
-from unittest.mock import MagicMock, patch
+import threading
+import pandas as pd
+from unittest.mock import ANY, MagicMock, patch
 from src.core.coingecko.coingecko_similar_exchanges_data_pipeline import CoingeckoSimilarExchangesDataPipeline
 from src.config.app_config import AppConfig
 from src.adapters.bitso_api import BitsoAPI
 from src.core.coingecko.coingecko_data_analyzer import CoingeckoSimilarExchangesDataAnalyzer
 from src.core.coingecko.coingecko_similar_exchanges_analysis_exporter import CoingeckoSimilarExchangesDataAnalysisExporter
+from src.core.coingecko.markets_rolling_volume_analytics import MarketsRollingVolumeAnalytics
 
 class TestCoingeckoSimilarExchangesDataPipeline(unittest.TestCase):
     def setUp(self):
@@ -43,9 +46,10 @@ class TestCoingeckoSimilarExchangesDataPipeline(unittest.TestCase):
         self.pipeline.run()
 
         mock_bitso_api.fetch_markets.assert_called_once()
-        self.mock_data_analyzer.generate_exchanges_with_similar_trades.assert_called_once_with([("BTC", "USDT"), ("ETH", "USDT")])
+        self.mock_data_analyzer.generate_exchanges_with_similar_trades.assert_called_once_with([("BTC", "USDT"), ("ETH", "USDT")],
+                                                                                                on_exchange_matched=ANY)
         self.mock_data_analyzer.generate_markets_historical_volume_table.assert_called_once_with(
-            [{"market_id": "BTC_USDT", "base": "BTC", "target": "USDT"}]
+            [{"market_id": "BTC_USDT", "base": "BTC", "target": "USDT"}], fetched_pairs={}
         )
         self.mock_data_analyzer.generate_exchanges_trade_volume.assert_called_once_with(
             [{"exchange_id": "binance", "trust_score": 10}],
@@ -58,5 +62,95 @@ class TestCoingeckoSimilarExchangesDataPipeline(unittest.TestCase):
             [{"exchange_id": "binance", "date": "2023-01-01", "volume_btc": 300}]
         )
 
+    @patch("src.core.coingecko.coingecko_similar_exchanges_data_pipeline.BitsoAPI")
+    def test_pipeline_run_exports_the_rolling_analytics_of_the_markets_history(self, MockBitsoAPI):
+        MockBitsoAPI.return_value.fetch_markets.return_value = [("BTC", "USDT")]
+        markets_rolling_analytics = MagicMock(spec=MarketsRollingVolumeAnalytics)
+        markets_rolling_analytics.update.return_value = pd.DataFrame({"market_id": ["BTC_USDT"], "volume_usd_ma_7d": [1.0]})
+        pipeline = CoingeckoSimilarExchangesDataPipeline(self.mock_data_analyzer, self.mock_data_exporter,
+                                                         self.mock_app_config,
+                                                         markets_rolling_analytics=markets_rolling_analytics)
+        markets_historical_volume = pd.DataFrame({"market_id": ["BTC_USDT"], "date": ["2023-01-01"], "volume_usd": [1.0]})
+        self.mock_data_analyzer.generate_exchanges_with_similar_trades.return_value = (
+            [{"exchange_id": "binance"}], [{"exchange_id": "binance", "market_id": "BTC_USDT"}])
+        self.mock_data_analyzer.generate_markets_historical_volume_table.return_value = markets_historical_volume
+        self.mock_data_analyzer.generate_exchanges_trade_volume.return_value = []
+
+        stage_graph = pipeline.run()
+
+        markets_rolling_analytics.update.assert_called_once_with(markets_historical_volume=markets_historical_volume)
+        self.assertIs(self.mock_data_exporter.export.call_args.kwargs["markets_rolling_analytics"],
+                      markets_rolling_analytics.update.return_value)
+        self.assertIn("markets_rolling_analytics", stage_graph.timings)
+
+    @patch("src.core.coingecko.coingecko_similar_exchanges_data_pipeline.BitsoAPI")
+    def test_pipeline_run_streams_similar_exchanges_to_history_stages(self, MockBitsoAPI):
+        MockBitsoAPI.return_value.fetch_markets.return_value = [("BTC", "USDT")]
+        first_exchange_processed = threading.Event()
+        binance = {"exchange_id": "binance"}
+        kraken = {"exchange_id": "kraken"}
+        binance_markets = [{"exchange_id": "binance", "market_id": "BTC_USDT"}]
+        kraken_markets = [{"exchange_id": "kraken", "market_id": "BTC_USDT"},
+                          {"exchange_id": "kraken", "market_id": "ETH_USDT"}]
+
+        def generate_exchanges_with_similar_trades(bitso_markets, on_exchange_matched):
+            on_exchange_matched(binance, binance_markets)
+            # Only completes if the history stages picked the first exchange while the scan is still running
+            self.assertTrue(first_exchange_processed.wait(timeout=5))
+            on_exchange_matched(kraken, kraken_markets)
+            return [binance, kraken], binance_markets + kraken_markets
+
+        def generate_markets_historical_volume_table(shared_markets, fetched_pairs):
+            first_exchange_processed.set()
+            return pd.DataFrame({"market_id": [shared_market["market_id"] for shared_market in shared_markets],
+                                 "date": "2023-01-01", "volume_usd": 1.0})
+
+        self.mock_data_analyzer.generate_exchanges_with_similar_trades.side_effect = generate_exchanges_with_similar_trades
+        self.mock_data_analyzer.generate_markets_historical_volume_table.side_effect = generate_markets_historical_volume_table
+        self.mock_data_analyzer.generate_exchanges_trade_volume.side_effect = \
+            lambda exchanges, days: [{"exchange_id": exchange["exchange_id"], "date": "2023-01-01", "volume_btc": 1.0}
+                                     for exchange in exchanges]
+
+        stage_graph = self.pipeline.run()
+
+        # Markets already processed for a previous exchange are not requested again
+        market_batches = [call.args[0] for call in self.mock_data_analyzer.generate_markets_historical_volume_table.call_args_list]
+        self.assertEqual(market_batches, [binance_markets, [{"exchange_id": "kraken", "market_id": "ETH_USDT"}]])
+        exchanges, shared_markets, markets_historical_volume, exchanges_historical_trade_volume = \
+            self.mock_data_exporter.export.call_args.args
+        self.assertEqual(exchanges, [binance, kraken])
+        self.assertEqual(markets_historical_volume["market_id"].tolist(), ["BTC_USDT", "ETH_USDT"])
+        self.assertEqual(exchanges_historical_trade_volume, [{"exchange_id": "binance", "date": "2023-01-01", "volume_btc": 1.0},
+                                                             {"exchange_id": "kraken", "date": "2023-01-01", "volume_btc": 1.0}])
+        self.assertEqual(stage_graph.critical_path()[-1].name, "export")
+
+    @patch("src.core.coingecko.coingecko_similar_exchanges_data_pipeline.BitsoAPI")
+    def test_pipeline_run_writes_http_metrics_even_if_it_fails(self, MockBitsoAPI):
+        MockBitsoAPI.return_value.fetch_markets.side_effect = Exception("Bitso unavailable")
+        mock_http_metrics = MagicMock()
+        pipeline = CoingeckoSimilarExchangesDataPipeline(self.mock_data_analyzer, self.mock_data_exporter,
+                                                         self.mock_app_config, mock_http_metrics)
+
+        with self.assertRaises(Exception):
+            pipeline.run()
+
+        mock_http_metrics.write.assert_called_once_with(self.mock_app_config.metrics_dir)
+
+    @patch("src.core.coingecko.coingecko_similar_exchanges_data_pipeline.BitsoAPI")
+    def test_pipeline_run_keeps_checkpoints_until_exported(self, MockBitsoAPI):
+        MockBitsoAPI.return_value.fetch_markets.return_value = [("BTC", "USDT")]
+        self.mock_data_analyzer.generate_exchanges_with_similar_trades.return_value = ([], [])
+        self.mock_data_exporter.export.side_effect = [Exception("S3 unavailable"), None]
+        mock_checkpoint_store = MagicMock()
+        pipeline = CoingeckoSimilarExchangesDataPipeline(self.mock_data_analyzer, self.mock_data_exporter,
+                                                         self.mock_app_config, checkpoint_store=mock_checkpoint_store)
+
+        with self.assertRaises(Exception):
+            pipeline.run()
+        mock_checkpoint_store.clear_run.assert_not_called()
+
+        pipeline.run()
+        mock_checkpoint_store.clear_run.assert_called_once()
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,82 @@
+import os
+import tempfile
+import unittest
+from src.core.coingecko.exchange_market_index import ExchangeMarketIndex
+
+BINANCE = {"id": "binance", "name": "Binance", "trust_score": 10, "trust_score_rank": 1}
+KRAKEN = {"id": "kraken", "name": "Kraken", "trust_score": 9, "trust_score_rank": 2}
+
+def ticker(base, target, volume, market_name):
+    return {"base": base, "target": target, "coin_id": None, "target_coin_id": None, "volume": volume,
+            "converted_volume": {"usd": volume * 2}, "trust_score": "green", "market": {"name": market_name}}
+
+class TestExchangeMarketIndex(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, "state", "index.sqlite")
+        self.now = 1000.0
+        self.index = ExchangeMarketIndex(self.db_path, ttl_seconds=60, clock=lambda: self.now)
+
+    def tearDown(self):
+        self.index.close()
+        self.temp_dir.cleanup()
+
+    def test_exchanges_listing(self):
+        self.index.index_exchange(KRAKEN, [ticker("btc", "usdt", 5.0, "Kraken")])
+        self.index.index_exchange(BINANCE, [ticker("BTC", "USDT", 1.0, "Binance"), ticker("ETH", "USDT", 2.0, "Binance")])
+
+        listings = self.index.exchanges_listing("BTC", "usdt")
+
+        self.assertEqual([listing["exchange_id"] for listing in listings], ["binance", "kraken"])
+        self.assertEqual(listings[1]["volume"], 5.0)
+        self.assertEqual(listings[1]["volume_usd"], 10.0)
+        self.assertEqual(listings[1]["trust_score"], "green")
+        self.assertEqual(self.index.exchanges_listing("XRP", "USDT"), [])
+
+    def test_reindexing_replaces_the_exchange_listings(self):
+        self.index.index_exchange(BINANCE, [ticker("BTC", "USDT", 1.0, "Binance")])
+        self.index.index_exchange(BINANCE, [ticker("ETH", "USDT", 2.0, "Binance")])
+
+        self.assertEqual(self.index.exchanges_listing("BTC", "USDT"), [])
+        self.assertEqual(len(self.index.exchanges_listing("ETH", "USDT")), 1)
+
+    def test_fresh_tickers_expire_after_ttl(self):
+        self.assertIsNone(self.index.fresh_tickers("binance"))
+        self.index.index_exchange(BINANCE, [ticker("BTC", "USDT", 1.0, "Binance")])
+
+        tickers = self.index.fresh_tickers("binance")
+        self.assertEqual([(t["base"], t["target"], t["market"]["name"]) for t in tickers], [("BTC", "USDT", "Binance")])
+
+        self.now += 61
+        self.assertIsNone(self.index.fresh_tickers("binance"))
+
+    def test_filtered_scans_only_serve_their_base_coins(self):
+        self.index.index_exchange(BINANCE, [ticker("BTC", "USDT", 1.0, "Binance")], coin_ids=["bitcoin"])
+
+        self.assertIsNotNone(self.index.fresh_tickers("binance", coin_ids=["bitcoin"]))
+        self.assertIsNone(self.index.fresh_tickers("binance", coin_ids=["bitcoin", "ethereum"]))
+        self.assertIsNone(self.index.fresh_tickers("binance"))
+
+    def test_partial_scans_only_serve_the_markets_they_list(self):
+        self.index.index_exchange(BINANCE, [ticker("BTC", "USDT", 1.0, "Binance")], complete=False)
+
+        self.assertIsNotNone(self.index.fresh_tickers("binance", markets=[("btc", "usdt")]))
+        self.assertIsNone(self.index.fresh_tickers("binance", markets=[("BTC", "USDT"), ("ETH", "USDT")]))
+        self.assertIsNone(self.index.fresh_tickers("binance"))
+
+        reopened_index = ExchangeMarketIndex(self.db_path, ttl_seconds=60, clock=lambda: self.now)
+        self.assertIsNone(reopened_index.fresh_tickers("binance", markets=[("ETH", "USDT")]))
+        reopened_index.close()
+
+    def test_persists_across_instances(self):
+        self.index.index_exchange(BINANCE, [ticker("BTC", "USDT", 1.0, "Binance"), ticker("ETH", "USDT", 2.0, "Binance")])
+
+        reopened_index = ExchangeMarketIndex(self.db_path, ttl_seconds=60, clock=lambda: self.now)
+
+        self.assertEqual(len(reopened_index), 1)
+        self.assertEqual([t["base"] for t in reopened_index.fresh_tickers("binance")], ["BTC", "ETH"])
+        self.assertEqual(reopened_index.exchanges_listing("ETH", "USDT")[0]["exchange_name"], "Binance")
+        reopened_index.close()
+
+if __name__ == "__main__":
+    unittest.main()
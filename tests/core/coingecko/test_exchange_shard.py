@@ -0,0 +1,25 @@
+import unittest
+from src.core.coingecko.exchange_shard import ExchangeShard
+
+class TestExchangeShard(unittest.TestCase):
+    def test_parse(self):
+        shard = ExchangeShard.parse("1/4")
+
+        self.assertEqual(shard, ExchangeShard(1, 4))
+        self.assertEqual(str(shard), "1/4")
+        self.assertEqual(shard.name, "shard-1-of-4")
+
+    def test_parse_invalid_shards(self):
+        for shard in ["1", "a/4", "4/4", "-1/4", "0/0"]:
+            with self.assertRaises(ValueError):
+                ExchangeShard.parse(shard)
+
+    def test_shards_partition_the_exchanges(self):
+        shards = [ExchangeShard(index, 3) for index in range(3)]
+
+        for position in range(10):
+            self.assertEqual(sum(shard.owns(position) for shard in shards), 1)
+        self.assertEqual([position for position in range(10) if shards[1].owns(position)], [1, 4, 7])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+import pandas as pd
+from src.core.coingecko.markets_historical_volume_table_builder import MarketsHistoricalVolumeTableBuilder
+
+class TestMarketsHistoricalVolumeTableBuilder(unittest.TestCase):
+    def test_build(self):
+        builder = MarketsHistoricalVolumeTableBuilder()
+        builder.add("BTC_USDT", [[1609459200000, 10000], [1609545599999, 15000], [1609545600000, 20000]])
+        builder.add("ETH_USDT", [[1609459200000, 500]])
+
+        table = builder.build()
+
+        self.assertEqual(table.to_dict("records"), [
+            {"market_id": "BTC_USDT", "date": "2021-01-01", "volume_usd": 10000.0},
+            {"market_id": "BTC_USDT", "date": "2021-01-01", "volume_usd": 15000.0},
+            {"market_id": "BTC_USDT", "date": "2021-01-02", "volume_usd": 20000.0},
+            {"market_id": "ETH_USDT", "date": "2021-01-01", "volume_usd": 500.0},
+        ])
+        self.assertIsInstance(table["market_id"].dtype, pd.CategoricalDtype)
+        self.assertIsInstance(table["date"].dtype, pd.CategoricalDtype)
+        self.assertEqual(table["volume_usd"].dtype, "float64")
+
+    def test_build_keeps_markets_without_points_out_of_the_rows(self):
+        builder = MarketsHistoricalVolumeTableBuilder()
+        builder.add("BTC_USDT", [])
+        builder.add("ETH_USDT", [[1609459200000, 500]])
+
+        table = builder.build()
+
+        self.assertEqual(table["market_id"].tolist(), ["ETH_USDT"])
+
+    def test_build_empty(self):
+        table = MarketsHistoricalVolumeTableBuilder().build()
+
+        self.assertEqual(len(table), 0)
+        self.assertEqual(table.columns.tolist(), ["market_id", "date", "volume_usd"])
+        self.assertEqual(table.to_csv(index=False), "market_id,date,volume_usd\n")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.adapters.volume_time_series_store import VolumeTimeSeriesStore, MILLISECONDS_PER_DAY
+from src.core.coingecko.markets_rolling_volume_analytics import MarketsRollingVolumeAnalytics
+
+DATES = pd.date_range("2024-01-01", periods=80).strftime("%Y-%m-%d").tolist()
+
+def markets_historical_volume(volumes_by_market, first_day, last_day):
+    """
+    Build a markets history table with two points per day, the second one being the volume of the day.
+    """
+    rows = [(market_id, DATES[day], volume)
+            for market_id, volumes in volumes_by_market.items()
+            for day in range(first_day, last_day + 1)
+            for volume in (volumes[day] / 2, volumes[day])]
+    return pd.DataFrame(rows, columns=["market_id", "date", "volume_usd"]).astype({"market_id": "category", "date": "category"})
+
+class TestMarketsRollingVolumeAnalytics(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.state_path = os.path.join(self.temp_dir.name, "state", "markets_rolling_analytics.npz")
+        random = np.random.default_rng(0)
+        self.volumes_by_market = {"BTC_USDT": random.lognormal(10, 0.5, len(DATES)),
+                                  "ETH_USDT": random.lognormal(8, 0.5, len(DATES))}
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_incremental_updates_match_a_full_history_rescan(self):
+        # Overlapping windows, the state is reloaded from disk between the runs
+        MarketsRollingVolumeAnalytics(self.state_path).update(markets_historical_volume(self.volumes_by_market, 0, 34))
+        MarketsRollingVolumeAnalytics(self.state_path).update(markets_historical_volume(self.volumes_by_market, 20, 49))
+        analytics = MarketsRollingVolumeAnalytics(self.state_path).update(
+            markets_historical_volume(self.volumes_by_market, 49, 79))
+
+        # The last day of the table is still open
+        self.assertEqual(analytics["date"].tolist(), [DATES[78], DATES[78]])
+        for market_id, row in zip(analytics["market_id"], analytics.to_dict("records")):
+            volumes = pd.Series(self.volumes_by_market[market_id][:79])
+            self.assertAlmostEqual(row["volume_usd"], volumes.iloc[-1])
+            self.assertAlmostEqual(row["volume_usd_ma_7d"], volumes.rolling(7).mean().iloc[-1])
+            self.assertAlmostEqual(row["volume_usd_ma_30d"], volumes.rolling(30).mean().iloc[-1])
+            self.assertAlmostEqual(row["volume_usd_change_1d"], volumes.pct_change().iloc[-1])
+            self.assertAlmostEqual(row["volume_usd_volatility_30d"], volumes.pct_change().rolling(30).std().iloc[-1])
+
+    def test_windows_are_nan_until_full(self):
+        analytics = MarketsRollingVolumeAnalytics(self.state_path).update(
+            markets_historical_volume(self.volumes_by_market, 0, 10))
+
+        row = analytics.to_dict("records")[0]
+        self.assertAlmostEqual(row["volume_usd_ma_7d"], self.volumes_by_market["BTC_USDT"][3:10].mean())
+        self.assertTrue(np.isnan(row["volume_usd_ma_30d"]))
+        self.assertTrue(np.isnan(row["volume_usd_volatility_30d"]))
+
+    def test_rerunning_the_same_days_does_not_fold_them_twice(self):
+        analytics = MarketsRollingVolumeAnalytics(self.state_path)
+        table = markets_historical_volume(self.volumes_by_market, 0, 10)
+
+        first_run = analytics.update(table)
+        second_run = analytics.update(table)
+
+        pd.testing.assert_frame_equal(first_run, second_run)
+
+    def test_a_gap_restarts_the_windows_of_the_market(self):
+        analytics = MarketsRollingVolumeAnalytics(self.state_path)
+        analytics.update(markets_historical_volume(self.volumes_by_market, 0, 10))
+
+        result = analytics.update(markets_historical_volume(self.volumes_by_market, 20, 25))
+
+        row = result.to_dict("records")[0]
+        self.assertEqual(row["date"], DATES[24])
+        self.assertTrue(np.isnan(row["volume_usd_ma_7d"]))
+        self.assertAlmostEqual(row["volume_usd_change_1d"],
+                               self.volumes_by_market["BTC_USDT"][24] / self.volumes_by_market["BTC_USDT"][23] - 1)
+
+    def test_days_are_read_from_the_time_series_store(self):
+        store = VolumeTimeSeriesStore(os.path.join(self.temp_dir.name, "state", "volume_time_series.sqlite"))
+        jan_1_ms = 1704067200000
+        for market_id, volumes in self.volumes_by_market.items():
+            store.append(market_id, [[jan_1_ms + day * MILLISECONDS_PER_DAY + offset_ms, volume]
+                                     for day in range(50)
+                                     for offset_ms, volume in ((1, volumes[day] / 2), (2, volumes[day]))])
+        analytics = MarketsRollingVolumeAnalytics(self.state_path, store)
+
+        # The tables of the runs only hold the lookback window, the days before it are read from the store
+        analytics.update(markets_historical_volume(self.volumes_by_market, 25, 34))
+        result = analytics.update(markets_historical_volume(self.volumes_by_market, 45, 49))
+        store.close()
+
+        expected = MarketsRollingVolumeAnalytics(os.path.join(self.temp_dir.name, "expected.npz")) \
+            .update(markets_historical_volume(self.volumes_by_market, 0, 49))
+        pd.testing.assert_frame_equal(result, expected)
+
+    def test_markets_with_an_open_day_only_are_not_reported(self):
+        analytics = MarketsRollingVolumeAnalytics(self.state_path)
+
+        result = analytics.update(markets_historical_volume(self.volumes_by_market, 0, 0))
+
+        self.assertTrue(result.empty)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import json
+import threading
+import unittest
+import urllib.request
+from unittest.mock import MagicMock
+from src.core.coingecko.pipeline_daemon import PipelineDaemon, DAEMON_STATE_IDLE, DAEMON_STATE_STOPPED
+
+class TestPipelineDaemon(unittest.TestCase):
+    def setUp(self):
+        self.pipeline = MagicMock()
+
+    def test_run_cycle_records_failures_and_keeps_going(self):
+        self.pipeline.run.side_effect = [Exception("CoinGecko unavailable"), None]
+        daemon = PipelineDaemon(self.pipeline, interval_seconds=60)
+
+        self.assertFalse(daemon.run_cycle())
+        self.assertEqual(daemon.status()["last_error"], "Exception: CoinGecko unavailable")
+
+        self.assertTrue(daemon.run_cycle())
+        status = daemon.status()
+        self.assertEqual(status["state"], DAEMON_STATE_IDLE)
+        self.assertEqual(status["cycles_count"], 2)
+        self.assertEqual(status["failed_cycles_count"], 1)
+        self.assertIsNone(status["last_error"])
+
+    def test_run_forever_reruns_on_trigger_until_stopped(self):
+        daemon = PipelineDaemon(self.pipeline, interval_seconds=3600)
+
+        def run():
+            # Each cycle asks for another one, the third stops the daemon
+            if self.pipeline.run.call_count < 3:
+                daemon.trigger()
+            else:
+                daemon.stop()
+        self.pipeline.run.side_effect = run
+
+        daemon.run_forever()
+
+        self.assertEqual(self.pipeline.run.call_count, 3)
+        self.assertEqual(daemon.status()["state"], DAEMON_STATE_STOPPED)
+
+    def test_run_forever_reruns_on_interval(self):
+        now = [0]
+        daemon = PipelineDaemon(self.pipeline, interval_seconds=60, clock=lambda: now[0])
+
+        def run():
+            # The clock moves past the next scheduled cycle while the pipeline runs
+            now[0] += 61
+            if self.pipeline.run.call_count == 2:
+                daemon.stop()
+        self.pipeline.run.side_effect = run
+
+        daemon.run_forever()
+
+        self.assertEqual(self.pipeline.run.call_count, 2)
+
+    def test_control_endpoint(self):
+        cycle_started = threading.Event()
+        release_cycle = threading.Event()
+
+        def run():
+            cycle_started.set()
+            release_cycle.wait(5)
+        self.pipeline.run.side_effect = run
+        daemon = PipelineDaemon(self.pipeline, interval_seconds=3600, control_address=("127.0.0.1", 0))
+        daemon.start_control_server()
+        host, port = daemon.control_server.server_address[:2]
+        base_url = f"http://{host}:{port}"
+        daemon_thread = threading.Thread(target=daemon.run_forever)
+        daemon_thread.start()
+        try:
+            self.assertTrue(cycle_started.wait(5))
+            with urllib.request.urlopen(f"{base_url}/status") as response:
+                self.assertEqual(json.loads(response.read())["state"], "running")
+
+            request = urllib.request.Request(f"{base_url}/stop", method="POST")
+            with urllib.request.urlopen(request) as response:
+                self.assertEqual(response.status, 202)
+        finally:
+            release_cycle.set()
+            daemon_thread.join(5)
+
+        self.assertFalse(daemon_thread.is_alive())
+        self.assertEqual(self.pipeline.run.call_count, 1)
+        self.assertIsNone(daemon.control_server)
+
+if __name__ == "__main__":
+    unittest.main()
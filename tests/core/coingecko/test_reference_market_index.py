@@ -0,0 +1,37 @@
+import unittest
+from src.core.coingecko.reference_market_index import ReferenceMarketIndex
+
+class TestReferenceMarketIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = ReferenceMarketIndex([("BTC", "USDT"), ("btc", "usdt"), ("BTC", "MXN")])
+
+    def test_deduplicates_normalized_markets(self):
+        self.assertEqual(self.index.markets, [("BTC", "USDT"), ("BTC", "MXN")])
+        self.assertEqual(len(self.index), 2)
+
+    def test_base_coin_ids(self):
+        self.assertEqual(ReferenceMarketIndex([("ETH", "USDT"), ("BTC", "MXN"), ("btc", "USD")]).base_coin_ids,
+                         ["bitcoin", "ethereum"])
+        self.assertIsNone(ReferenceMarketIndex([("BTC", "USDT"), ("UNLISTED", "USDT")]).base_coin_ids)
+
+    def test_matches_symbols_case_insensitively(self):
+        tickers = [
+            {"base": "ETH", "target": "USDT"},
+            {"base": "btc", "target": "usdt"},
+            {"base": " BTC ", "target": "MXN"},
+        ]
+
+        self.assertEqual(self.index.match_page(tickers), [(1, 0), (2, 1)])
+
+    def test_matches_coin_ids_when_symbols_differ(self):
+        tickers = [{"base": "XBT", "target": "USDT", "coin_id": "bitcoin", "target_coin_id": "tether"}]
+
+        self.assertEqual(self.index.match_page(tickers), [(0, 0)])
+
+    def test_rejects_symbol_match_with_conflicting_coin_ids(self):
+        tickers = [{"base": "BTC", "target": "USDT", "coin_id": "bitcoin-token", "target_coin_id": "tether"}]
+
+        self.assertEqual(self.index.match_page(tickers), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import pandas as pd
+from src.config.app_config import AppConfig
+from src.core.coingecko.coingecko_data_analyzer import CoingeckoSimilarExchangesDataAnalyzer
+from src.core.coingecko.coingecko_data_fetcher_limits import CoingeckoDataFetcherLimits
+from src.core.coingecko.exchange_shard import ExchangeShard
+from src.core.coingecko.shard_partials import ShardPartialExporter, ShardPartialsMerger, local_shard_configs
+from src.di.di_container import DIContainer
+
+class TestShardPartials(unittest.TestCase):
+    def setUp(self):
+        self.shards_dir = tempfile.TemporaryDirectory()
+        self.limits = CoingeckoDataFetcherLimits(exchanges_with_similar_trades_limit=2, exchanges_to_lookup_limit=6)
+
+    def tearDown(self):
+        self.shards_dir.cleanup()
+
+    def export_shard(self, shard, positions, limits=None):
+        exporter = ShardPartialExporter(self.shards_dir.name, ExchangeShard.parse(shard), limits or self.limits)
+        exchange_ids = [f"exchange-{position}" for position in positions]
+        exporter.export(
+            [{"exchange_id": exchange_id, "exchange_name": exchange_id, "exchange_position": position}
+             for exchange_id, position in zip(exchange_ids, positions)],
+            [{"exchange_id": exchange_id, "market_id": market_id}
+             for exchange_id in exchange_ids for market_id in ["BTC_USDT", f"{exchange_id}_USDT"]],
+            pd.DataFrame({"market_id": [market_id for exchange_id in exchange_ids for market_id in ["BTC_USDT", f"{exchange_id}_USDT"]],
+                          "date": ["2024-01-01"] * 2 * len(exchange_ids),
+                          "volume_usd": [float(position) for position in positions for _ in range(2)]}).drop_duplicates("market_id"),
+            [{"exchange_id": exchange_id, "date": "2024-01-01", "volume_btc": 1.0} for exchange_id in exchange_ids])
+
+    def test_merge_keeps_the_first_similar_exchanges_of_every_shard(self):
+        # Shard 0/2 owns the even positions, shard 1/2 the odd ones
+        self.export_shard("0/2", [2, 4])
+        self.export_shard("1/2", [1, 5])
+        exporter = MagicMock()
+
+        ShardPartialsMerger(exporter, self.shards_dir.name, 2).run()
+
+        exchanges, shared_markets, markets_historical_volume, trade_volume = exporter.export.call_args.args
+        self.assertEqual(exchanges, [{"exchange_id": "exchange-1", "exchange_name": "exchange-1"},
+                                     {"exchange_id": "exchange-2", "exchange_name": "exchange-2"}])
+        self.assertEqual([(market["exchange_id"], market["market_id"]) for market in shared_markets],
+                         [("exchange-1", "BTC_USDT"), ("exchange-1", "exchange-1_USDT"),
+                          ("exchange-2", "BTC_USDT"), ("exchange-2", "exchange-2_USDT")])
+        # BTC_USDT is taken once, from the shard of exchange-1
+        self.assertEqual(list(markets_historical_volume["market_id"]), ["BTC_USDT", "exchange-1_USDT", "exchange-2_USDT"])
+        self.assertEqual(list(markets_historical_volume["volume_usd"]), [1.0, 1.0, 2.0])
+        self.assertEqual([volume["exchange_id"] for volume in trade_volume], ["exchange-1", "exchange-2"])
+
+    def test_merge_fails_on_missing_shards(self):
+        self.export_shard("0/3", [0])
+
+        with self.assertRaisesRegex(ValueError, "1/3, 2/3"):
+            ShardPartialsMerger(MagicMock(), self.shards_dir.name, 3).merge()
+
+    def test_merge_fails_on_shards_run_with_different_limits(self):
+        self.export_shard("0/2", [0])
+        self.export_shard("1/2", [1], CoingeckoDataFetcherLimits(exchanges_with_similar_trades_limit=3, exchanges_to_lookup_limit=6))
+
+        with self.assertRaisesRegex(ValueError, "different limits"):
+            ShardPartialsMerger(MagicMock(), self.shards_dir.name, 2).merge()
+
+    def test_export_writes_one_partial_per_shard(self):
+        self.export_shard("1/2", [1])
+
+        self.assertEqual(os.listdir(self.shards_dir.name), ["shard-1-of-2.json"])
+
+    def test_local_shards_sharing_a_market_do_not_duplicate_its_history(self):
+        state_dir = os.path.join(self.shards_dir.name, "state")
+        app_config = AppConfig(rate_limiter_max_retries=1, historical_data_lookback_days=30, log_level="INFO",
+                               exchanges_with_similar_trades_to_analyze=2, exchanges_to_analyze_limit=6, write_to_s3=False,
+                               http_cache_dir=os.path.join(state_dir, "http"),
+                               time_series_db_path=os.path.join(state_dir, "volume_time_series.sqlite"),
+                               checkpoint_db_path=os.path.join(state_dir, "checkpoints.sqlite"),
+                               exchange_market_index_path=os.path.join(state_dir, "exchange_market_index.sqlite"),
+                               shards_dir=self.shards_dir.name, metrics_dir="", rolling_analytics_state_path="")
+        coingecko_api = MagicMock()
+        coingecko_api.fetch_historical_volume.return_value = {"prices": [[1704067200000, 1.0], [1704070800000, 2.0]]}
+
+        di_containers = [DIContainer(shard_config) for shard_config in local_shard_configs(app_config, 2)]
+        for di_container in di_containers:
+            di_container.init_deps()
+        stores = [di_container.time_series_store for di_container in di_containers]
+        # Both shards plan their requests before either one stored the market, as in parallel processes
+        for store in stores:
+            store.high_water_mark("BTC_USDT")
+        for store in stores:
+            CoingeckoSimilarExchangesDataAnalyzer(coingecko_api, self.limits, store) \
+                .generate_markets_historical_volume_table([{"market_id": "BTC_USDT"}])
+
+        for store in stores:
+            self.assertEqual([timestamp for timestamp, _ in store.load("BTC_USDT")], [1704067200000, 1704070800000])
+            store.close()
+        for attribute in ("http_cache_dir", "checkpoint_db_path", "exchange_market_index_path", "time_series_db_path"):
+            self.assertEqual(len({getattr(di_container.app_config, attribute) for di_container in di_containers}), 2)
+
+if __name__ == "__main__":
+    unittest.main()
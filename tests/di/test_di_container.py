@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+from src.config.app_config import AppConfig
+from src.di.di_container import DIContainer
+
+class TestDIContainer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.state_dir = os.path.join(self.temp_dir.name, "state")
+        # Stores left at their default paths are created under the temp dir
+        self.cwd = os.getcwd()
+        os.chdir(self.temp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.temp_dir.cleanup()
+
+    def test_default_runs_read_live_data(self):
+        app_config = AppConfig(rate_limiter_max_retries=1, historical_data_lookback_days=30, log_level="INFO",
+                               exchanges_with_similar_trades_to_analyze=2, exchanges_to_analyze_limit=6, write_to_s3=False)
+        di_container = DIContainer(app_config)
+
+        di_container.init_deps()
+
+        self.assertIsNone(di_container.exchange_market_index)
+        self.assertIsNone(di_container.response_cache)
+        self.assertIsNone(di_container.historical_volume_store)
+        self.assertIsNone(di_container.markets_rolling_analytics)
+        self.assertIsNone(di_container.async_coingecko_api)
+
+    def test_merge_runs_keep_their_own_rolling_analytics_state(self):
+        app_config = AppConfig(rate_limiter_max_retries=1, historical_data_lookback_days=30, log_level="INFO",
+                               exchanges_with_similar_trades_to_analyze=2, exchanges_to_analyze_limit=6, write_to_s3=False,
+                               rolling_analytics_state_path=os.path.join(self.state_dir, "markets_rolling_analytics.npz"),
+                               time_series_db_path=os.path.join(self.state_dir, "volume_time_series.sqlite"),
+                               merge_shards=2)
+        di_container = DIContainer(app_config)
+
+        di_container.init_deps()
+
+        self.assertEqual(di_container.markets_rolling_analytics.state_path,
+                         os.path.join(self.state_dir, "markets_rolling_analytics-merged.npz"))
+        self.assertIsNone(di_container.markets_rolling_analytics.time_series_store)
+        di_container.time_series_store.close()
+
+    def test_shards_get_their_own_state_stores(self):
+        # As run by an Airflow mapped task, which only sets the shard and the run id
+        app_config = AppConfig(rate_limiter_max_retries=1, historical_data_lookback_days=30, log_level="INFO",
+                               exchanges_with_similar_trades_to_analyze=2, exchanges_to_analyze_limit=6, write_to_s3=False,
+                               http_cache_dir=os.path.join(self.temp_dir.name, "cache", "http"),
+                               checkpoint_db_path=os.path.join(self.state_dir, "checkpoints.sqlite"),
+                               exchange_market_index_path=os.path.join(self.state_dir, "exchange_market_index.sqlite"),
+                               time_series_db_path=os.path.join(self.state_dir, "volume_time_series.sqlite"),
+                               shards_dir=os.path.join(self.temp_dir.name, "shards"), metrics_dir="",
+                               run_id="scheduled", shard="0/2")
+        di_container = DIContainer(app_config)
+
+        di_container.init_deps()
+
+        self.assertEqual(di_container.response_cache.cache_dir, os.path.join(self.temp_dir.name, "cache", "http-shard-0-of-2"))
+        self.assertEqual(di_container.checkpoint_store.db_path, os.path.join(self.state_dir, "checkpoints-shard-0-of-2.sqlite"))
+        self.assertEqual(di_container.exchange_market_index.db_path,
+                         os.path.join(self.state_dir, "exchange_market_index-shard-0-of-2.sqlite"))
+        self.assertEqual(di_container.time_series_store.db_path,
+                         os.path.join(self.state_dir, "volume_time_series-shard-0-of-2.sqlite"))
+        self.assertEqual(di_container.app_config.run_id, "scheduled-shard-0-of-2")
+        # The config of the task is left untouched
+        self.assertEqual(app_config.checkpoint_db_path, os.path.join(self.state_dir, "checkpoints.sqlite"))
+        di_container.time_series_store.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,9 @@
+class FakeClock:
+    '''
+        Clock returning a time set by the test, injected in place of time.monotonic or time.time.
+    '''
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
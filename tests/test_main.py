@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+class TestMain(unittest.TestCase):
+    def test_importing_main_does_not_import_the_dependency_graph(self):
+        # --help and argument errors must not pay for importing pandas, boto3 or requests
+        result = subprocess.run([sys.executable, "-c",
+                                 "import sys, src.main; "
+                                 "print(sorted(m for m in ('pandas', 'boto3', 'requests', 'pyarrow') if m in sys.modules))"],
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_importing_the_di_container_does_not_import_the_optional_components(self):
+        # pyarrow is hidden, runs without Parquet must not need it whatever pandas does with it
+        optional_modules = ("pyarrow.parquet", "src.utils.parquet_dataset_writer", "src.adapters.volume_time_series_store",
+                            "src.core.coingecko.markets_rolling_volume_analytics", "src.core.coingecko.shard_partials")
+        result = subprocess.run([sys.executable, "-c",
+                                 "import sys; sys.modules['pyarrow'] = None; import src.di.di_container; "
+                                 f"print(sorted(m for m in {optional_modules!r} if m in sys.modules))"],
+                                capture_output=True, text=True, check=True)
+        self.assertEqual(result.stdout.strip(), "[]")
+
+    def test_runs_without_parquet_initialize_without_pyarrow(self):
+        # pandas imports pyarrow on its own when it is installed, hiding it checks that nothing else needs it
+        with tempfile.TemporaryDirectory() as output_dir:
+            result = subprocess.run([sys.executable, "-c",
+                                     "import sys; sys.modules['pyarrow'] = None\n"
+                                     "from src.config.app_config import AppConfig\n"
+                                     "from src.di.di_container import DIContainer\n"
+                                     "app_config = AppConfig(rate_limiter_max_retries=1, historical_data_lookback_days=30, "
+                                     "log_level='INFO', exchanges_with_similar_trades_to_analyze=2, "
+                                     "exchanges_to_analyze_limit=6, write_to_s3=False, parquet_compression='')\n"
+                                     "DIContainer(app_config).init_deps()\n"
+                                     "print(sorted(m for m in sys.modules if m.startswith('pyarrow.')))"],
+                                    capture_output=True, text=True, check=True, cwd=output_dir,
+                                    env={**os.environ, "PYTHONPATH": os.path.dirname(os.path.dirname(os.path.abspath(__file__)))})
+        self.assertEqual(result.stdout.strip(), "[]")
+
+if __name__ == "__main__":
+    unittest.main()
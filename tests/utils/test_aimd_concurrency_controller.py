@@ -0,0 +1,96 @@
+import threading
+import unittest
+from src.utils.aimd_concurrency_controller import AIMDConcurrencyController
+from tests.fake_clock import FakeClock
+
+class TestAIMDConcurrencyController(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.controller = AIMDConcurrencyController(max_limit=8, initial_limit=2, clock=self.clock)
+
+    def complete(self, status=200, latency_seconds=0.1, namespace="tickers", retry_after_seconds=None):
+        started_at = self.controller.acquire()
+        self.clock.now += latency_seconds
+        self.controller.release(namespace, started_at, status, retry_after_seconds)
+
+    def test_limit_grows_additively_on_fast_successes(self):
+        # +1/limit per success, about one slot per window of successes
+        for _ in range(2):
+            self.complete()
+        self.assertAlmostEqual(self.controller.limit, 2 + 1 / 2 + 1 / 2.5)
+
+        for _ in range(30):
+            self.complete()
+        self.assertEqual(self.controller.limit, 8)
+
+    def test_limit_is_cut_multiplicatively_on_throttling(self):
+        for _ in range(30):
+            self.complete()
+
+        self.complete(status=429)
+
+        self.assertEqual(self.controller.limit, 4)
+
+    def test_limit_is_cut_once_per_window(self):
+        for _ in range(30):
+            self.complete()
+        started_at = [self.controller.acquire() for _ in range(3)]
+        self.clock.now += 0.1
+
+        for attempt_started_at in started_at:
+            self.controller.release("tickers", attempt_started_at, 429)
+
+        # The three attempts were in flight together, they share the same cut
+        self.assertEqual(self.controller.limit, 4)
+
+    def test_limit_is_cut_on_rising_latency_of_a_namespace(self):
+        for _ in range(10):
+            self.complete(latency_seconds=0.1)
+        limit = self.controller.limit
+
+        for _ in range(10):
+            self.complete(latency_seconds=1.0)
+
+        self.assertLess(self.controller.limit, limit)
+
+    def test_latencies_are_compared_per_namespace(self):
+        for _ in range(10):
+            self.complete(latency_seconds=0.1, namespace="tickers")
+        limit = self.controller.limit
+
+        # A slower endpoint is not a sign of overload
+        for _ in range(10):
+            self.complete(latency_seconds=1.0, namespace="market_chart")
+
+        self.assertGreater(self.controller.limit, limit)
+
+    def test_limit_never_drops_below_min(self):
+        for _ in range(5):
+            self.complete(status=None)
+        self.assertEqual(self.controller.limit, 1)
+
+    def test_acquire_blocks_at_the_limit(self):
+        controller = AIMDConcurrencyController(max_limit=1, initial_limit=1)
+        started_at = controller.acquire()
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (controller.acquire(), acquired.set()))
+        thread.start()
+
+        self.assertFalse(acquired.wait(0.05))
+        controller.release("tickers", started_at, 200)
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+
+    def test_retry_after_holds_new_attempts(self):
+        controller = AIMDConcurrencyController(max_limit=4)
+        controller.release("tickers", controller.acquire(), 429, retry_after_seconds=0.2)
+        acquired = threading.Event()
+        thread = threading.Thread(target=lambda: (controller.acquire(), acquired.set()))
+        thread.start()
+
+        self.assertFalse(acquired.wait(0.05))
+        self.assertTrue(acquired.wait(5))
+        thread.join()
+
+if __name__ == "__main__":
+    unittest.main()
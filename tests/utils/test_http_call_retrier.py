@@ -1,6 +1,8 @@
 import unittest
 from unittest.mock import MagicMock, patch
+from requests.exceptions import ConnectionError
 from src.utils.http_call_retrier import HTTPCallRetrier
+from src.utils.http_metrics import HTTPMetricsRegistry
 
 class TestHTTPCallRetrier(unittest.TestCase):
     def setUp(self):
@@ -49,5 +51,67 @@ class TestHTTPCallRetrier(unittest.TestCase):
         mock_sleep.assert_any_call(1)
         mock_sleep.assert_any_call(2)
 
+    @patch("time.sleep", return_value=None)
+    def test_rate_limiter_paces_every_attempt(self, mock_sleep):
+        mock_rate_limiter = MagicMock()
+        retrier = HTTPCallRetrier(max_retries=3, rate_limiter=mock_rate_limiter)
+        mock_api_call = MagicMock()
+        mock_api_call.side_effect = [
+            MagicMock(status_code=500, headers={}),
+            MagicMock(status_code=200)
+        ]
+        retrier.call_api(mock_api_call, "test_namespace")
+        self.assertEqual(mock_rate_limiter.acquire.call_count, 2)
+
+    @patch("time.sleep", return_value=None)
+    def test_metrics_record_attempts_retries_and_throttling(self, mock_sleep):
+        metrics = HTTPMetricsRegistry()
+        retrier = HTTPCallRetrier(max_retries=4, exponential_backoff_rate=2, initial_wait_time_seconds=1, metrics=metrics)
+        mock_api_call = MagicMock()
+        mock_api_call.side_effect = [
+            ConnectionError("reset"),
+            MagicMock(status_code=429, headers={"Retry-After": "3"}, content=b""),
+            MagicMock(status_code=200, headers={}, content=b"0123456789")
+        ]
+        retrier.call_api(mock_api_call, "test_namespace")
+
+        namespace_metrics = metrics.to_dict()["test_namespace"]
+        self.assertEqual(namespace_metrics["calls"], 1)
+        self.assertEqual(namespace_metrics["attempts"], 3)
+        self.assertEqual(namespace_metrics["retries"], 2)
+        self.assertEqual(namespace_metrics["throttled"], 1)
+        self.assertEqual(namespace_metrics["backoff_sleep_seconds"], 1)
+        self.assertEqual(namespace_metrics["retry_after_sleep_seconds"], 3)
+        self.assertEqual(namespace_metrics["response_bytes"], 10)
+        self.assertEqual(namespace_metrics["attempts_by_status"], {"ConnectionError": 1, "429": 1, "200": 1})
+
+    @patch("time.sleep", return_value=None)
+    def test_metrics_record_failed_calls(self, mock_sleep):
+        metrics = HTTPMetricsRegistry()
+        retrier = HTTPCallRetrier(max_retries=2, metrics=metrics)
+        mock_api_call = MagicMock(return_value=MagicMock(status_code=500, headers={"Content-Length": "21"}, text="Internal Server Error"))
+        with self.assertRaises(Exception):
+            retrier.call_api(mock_api_call, "test_namespace")
+        namespace_metrics = metrics.to_dict()["test_namespace"]
+        self.assertEqual(namespace_metrics["failed_calls"], 1)
+        self.assertEqual(namespace_metrics["response_bytes"], 42)
+
+    @patch("time.sleep", return_value=None)
+    def test_concurrency_controller_gets_the_outcome_of_every_attempt(self, mock_sleep):
+        mock_controller = MagicMock()
+        mock_controller.acquire.return_value = 10.0
+        retrier = HTTPCallRetrier(max_retries=3, concurrency_controller=mock_controller)
+        mock_api_call = MagicMock(side_effect=[ConnectionError("reset"),
+                                               MagicMock(status_code=429, headers={"Retry-After": "3"}),
+                                               MagicMock(status_code=200)])
+
+        retrier.call_api(mock_api_call, "test_namespace")
+
+        self.assertEqual(mock_controller.acquire.call_count, 3)
+        self.assertEqual([release.args for release in mock_controller.release.call_args_list],
+                         [("test_namespace", 10.0, None, None),
+                          ("test_namespace", 10.0, 429, 3),
+                          ("test_namespace", 10.0, 200, None)])
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,54 @@
+import os
+import json
+import tempfile
+import unittest
+from src.utils.http_metrics import HTTPMetricsRegistry, HTTP_METRICS_JSON_FILE_NAME, HTTP_METRICS_PROMETHEUS_FILE_NAME
+
+class TestHTTPMetricsRegistry(unittest.TestCase):
+    def setUp(self):
+        self.metrics = HTTPMetricsRegistry()
+
+    def test_records_metrics_per_namespace(self):
+        self.metrics.record_attempt("tickers", 0.03, 200, 100)
+        self.metrics.record_attempt("tickers", 0.3, 429)
+        self.metrics.record_retry("tickers", 2, throttled=True)
+        self.metrics.record_call("tickers", succeeded=True)
+        self.metrics.record_attempt("exchanges", 12, 200, 5)
+
+        metrics = self.metrics.to_dict()
+        self.assertEqual(list(metrics), ["exchanges", "tickers"])
+        self.assertEqual(metrics["tickers"]["attempts"], 2)
+        self.assertEqual(metrics["tickers"]["throttled"], 1)
+        self.assertEqual(metrics["tickers"]["retry_after_sleep_seconds"], 2)
+        self.assertEqual(metrics["tickers"]["response_bytes"], 100)
+        self.assertEqual(metrics["tickers"]["latency_seconds"]["buckets"]["0.05"], 1)
+        self.assertEqual(metrics["tickers"]["latency_seconds"]["buckets"]["0.5"], 1)
+        self.assertEqual(metrics["exchanges"]["latency_seconds"]["buckets"]["30"], 1)
+        self.assertEqual(metrics["exchanges"]["calls"], 0)
+
+    def test_prometheus_histogram_buckets_are_cumulative(self):
+        self.metrics.record_attempt("tickers", 0.03, 200)
+        self.metrics.record_attempt("tickers", 0.3, 200)
+        self.metrics.record_attempt("tickers", 60, 200)
+
+        lines = self.metrics.to_prometheus().splitlines()
+        self.assertIn("# TYPE coingecko_http_request_duration_seconds histogram", lines)
+        self.assertIn('coingecko_http_request_duration_seconds_bucket{namespace="tickers",le="0.05"} 1', lines)
+        self.assertIn('coingecko_http_request_duration_seconds_bucket{namespace="tickers",le="0.5"} 2', lines)
+        self.assertIn('coingecko_http_request_duration_seconds_bucket{namespace="tickers",le="+Inf"} 3', lines)
+        self.assertIn('coingecko_http_request_duration_seconds_count{namespace="tickers"} 3', lines)
+        self.assertIn('coingecko_http_attempts_total{namespace="tickers",status="200"} 3', lines)
+
+    def test_write(self):
+        self.metrics.record_attempt("tickers", 0.1, 200, 10)
+        with tempfile.TemporaryDirectory() as output_dir:
+            paths = self.metrics.write(os.path.join(output_dir, "metrics"))
+            self.assertEqual([os.path.basename(path) for path in paths],
+                             [HTTP_METRICS_JSON_FILE_NAME, HTTP_METRICS_PROMETHEUS_FILE_NAME])
+            with open(paths[0]) as f:
+                self.assertEqual(json.load(f)["tickers"]["response_bytes"], 10)
+            self.assertEqual(sorted(os.listdir(os.path.join(output_dir, "metrics"))),
+                             sorted([HTTP_METRICS_JSON_FILE_NAME, HTTP_METRICS_PROMETHEUS_FILE_NAME]))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import json
+import unittest
+from src.utils.json_stream_decoder import JSONStreamDecoder, loads
+
+def chunked(document, chunk_size):
+    data = json.dumps(document, ensure_ascii=False).encode("utf-8")
+    return [data[start:start + chunk_size] for start in range(0, len(data), chunk_size)]
+
+class TestJSONStreamDecoder(unittest.TestCase):
+    def setUp(self):
+        self.document = {
+            "name": "Exchange \"tickers\" ñ",
+            "count": 12345,
+            "nested": {"tickers": [1, 2]},
+            "tickers": [{"base": "BTC", "target": "USDT", "volume": 1.5e3, "market": {"name": "Bitsö"}},
+                        {"base": "ETH", "target": "MXN", "volume": 12, "market": {"name": "Bitsö"}}],
+            "after": True,
+        }
+
+    def test_decodes_array_items_whatever_the_chunk_boundaries(self):
+        for chunk_size in [1, 2, 3, 7, 64, 4096]:
+            items = list(JSONStreamDecoder(chunked(self.document, chunk_size)).iter_array_items("tickers"))
+            self.assertEqual(items, self.document["tickers"], f"chunk_size={chunk_size}")
+
+    def test_yields_items_before_the_document_is_received(self):
+        chunks_read = []
+        chunks = chunked(self.document, 8)
+
+        def iter_chunks():
+            for chunk in chunks:
+                chunks_read.append(chunk)
+                yield chunk
+
+        items = JSONStreamDecoder(iter_chunks()).iter_array_items("tickers")
+        self.assertEqual(next(items)["base"], "BTC")
+        self.assertLess(len(chunks_read), len(chunks))
+
+    def test_missing_array(self):
+        self.assertEqual(list(JSONStreamDecoder(chunked({"name": "Binance"}, 4)).iter_array_items("tickers")), [])
+        self.assertEqual(list(JSONStreamDecoder(chunked({"tickers": []}, 4)).iter_array_items("tickers")), [])
+
+    def test_truncated_document(self):
+        data = json.dumps(self.document).encode("utf-8")[:-40]
+        with self.assertRaises(json.JSONDecodeError):
+            list(JSONStreamDecoder([data]).iter_array_items("tickers"))
+
+    def test_loads(self):
+        self.assertEqual(loads(json.dumps(self.document).encode("utf-8")), self.document)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+from src.utils.parquet_dataset_writer import ParquetDatasetWriter
+
+SCHEMA = pa.schema([
+    ("date", pa.string()),
+    ("market_id", pa.string()),
+    ("volume_usd", pa.float64()),
+])
+
+class TestParquetDatasetWriter(unittest.TestCase):
+    def setUp(self):
+        self.base_dir = tempfile.mkdtemp()
+        self.writer = ParquetDatasetWriter("zstd")
+
+    def tearDown(self):
+        shutil.rmtree(self.base_dir, ignore_errors=True)
+
+    def test_write_table_casts_to_schema(self):
+        path = os.path.join(self.base_dir, "table.parquet")
+        df = pd.DataFrame([{"market_id": "BTC_USDT", "volume_usd": 10, "extra": "dropped"}])
+
+        written_files = self.writer.write_table(df, SCHEMA, path)
+
+        with open(path, "rb") as f:
+            self.assertEqual(written_files, [(path, f.read())])
+
+        table = pq.read_table(path)
+        self.assertEqual(table.schema, SCHEMA)
+        self.assertEqual(table.to_pylist(), [{"date": None, "market_id": "BTC_USDT", "volume_usd": 10.0}])
+        self.assertEqual(pq.ParquetFile(path).metadata.row_group(0).column(0).compression, "ZSTD")
+
+    def test_write_partitioned_layout(self):
+        df = pd.DataFrame([
+            {"date": "2024-01-01", "market_id": "BTC_USDT", "volume_usd": 1.0},
+            {"date": "2024-01-01", "market_id": "ETH_USDT", "volume_usd": 2.0},
+            {"date": "2024-01-02", "market_id": "BTC_USDT", "volume_usd": 3.0},
+        ])
+
+        paths = [path for path, _ in self.writer.write_partitioned(df, SCHEMA, self.base_dir, ["date", "market_id"])]
+
+        self.assertEqual(paths, [
+            os.path.join(self.base_dir, "date=2024-01-01", "market_id=BTC_USDT", "part-0.parquet"),
+            os.path.join(self.base_dir, "date=2024-01-01", "market_id=ETH_USDT", "part-0.parquet"),
+            os.path.join(self.base_dir, "date=2024-01-02", "market_id=BTC_USDT", "part-0.parquet"),
+        ])
+        self.assertEqual(pq.ParquetFile(paths[0]).schema_arrow.names, ["volume_usd"])
+
+        dataset = ds.dataset(self.base_dir, format="parquet", partitioning="hive")
+        pruned = dataset.to_table(columns=["volume_usd"], filter=ds.field("market_id") == "BTC_USDT")
+        self.assertEqual(sorted(pruned.column("volume_usd").to_pylist()), [1.0, 3.0])
+
+    def test_write_partitioned_replaces_only_written_partitions(self):
+        first_run = pd.DataFrame([
+            {"date": "2024-01-01", "market_id": "BTC_USDT", "volume_usd": 1.0},
+            {"date": "2024-01-02", "market_id": "BTC_USDT", "volume_usd": 2.0},
+        ])
+        second_run = pd.DataFrame([{"date": "2024-01-02", "market_id": "BTC_USDT", "volume_usd": 5.0}])
+
+        self.writer.write_partitioned(first_run, SCHEMA, self.base_dir, ["date", "market_id"])
+        self.writer.write_partitioned(second_run, SCHEMA, self.base_dir, ["date", "market_id"])
+
+        dataset = ds.dataset(self.base_dir, format="parquet", partitioning="hive")
+        rows = sorted(dataset.to_table().to_pylist(), key=lambda row: str(row["date"]))
+        self.assertEqual([row["volume_usd"] for row in rows], [1.0, 5.0])
+
+    def test_write_partitioned_empty_table(self):
+        self.assertEqual(self.writer.write_partitioned(pd.DataFrame(), SCHEMA, self.base_dir, ["date"]), [])
+
+if __name__ == "__main__":
+    unittest.main()
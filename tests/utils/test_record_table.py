@@ -0,0 +1,68 @@
+import json
+import math
+import unittest
+import pandas as pd
+from src.utils.record_table import RecordTable
+
+class TestRecordTable(unittest.TestCase):
+    def setUp(self):
+        self.table = RecordTable(["exchange_id", "market_id", "volume"], float_columns=["volume"])
+        self.table.append({"exchange_id": "binance", "market_id": "BTC_USDT", "volume": 1.5})
+        self.table.append({"exchange_id": "binance", "market_id": "ETH_USDT", "volume": 2.0})
+        self.table.append({"exchange_id": "kraken", "market_id": "BTC_USDT"})
+
+    def test_rows_behave_as_dicts(self):
+        row = self.table[0]
+
+        self.assertEqual(row["market_id"], "BTC_USDT")
+        self.assertEqual(row.get("missing", "default"), "default")
+        self.assertEqual(dict(row), {"exchange_id": "binance", "market_id": "BTC_USDT", "volume": 1.5})
+        self.assertEqual(self.table[-1]["exchange_id"], "kraken")
+        self.assertTrue(math.isnan(self.table[-1]["volume"]))
+        with self.assertRaises(KeyError):
+            row["missing"]
+        with self.assertRaises(IndexError):
+            self.table[3]
+
+    def test_repeated_values_are_stored_once(self):
+        self.assertEqual(self.table.categories["exchange_id"], ["binance", "kraken"])
+        self.assertEqual(self.table.categories["market_id"], ["BTC_USDT", "ETH_USDT"])
+        self.assertEqual(list(self.table.codes["market_id"]), [0, 1, 0])
+
+    def test_compares_with_lists_of_dicts(self):
+        table = RecordTable.from_records(["exchange_id", "name"], [{"exchange_id": "binance", "name": None}])
+
+        self.assertEqual(table, [{"exchange_id": "binance", "name": None}])
+        self.assertNotEqual(table, [{"exchange_id": "kraken", "name": None}])
+        self.assertNotEqual(table, [])
+
+    def test_extend_with_a_table_translates_its_codes(self):
+        other = RecordTable(["exchange_id", "market_id", "volume"], float_columns=["volume"])
+        other.append({"exchange_id": "kraken", "market_id": "SOL_USDT", "volume": 3.0})
+        other.append({"exchange_id": None, "market_id": "ETH_USDT", "volume": 4.0})
+
+        self.table.extend(other)
+
+        self.assertEqual(len(self.table), 5)
+        self.assertEqual(self.table[3:], [{"exchange_id": "kraken", "market_id": "SOL_USDT", "volume": 3.0},
+                                          {"exchange_id": None, "market_id": "ETH_USDT", "volume": 4.0}])
+        self.assertEqual(self.table.categories["market_id"], ["BTC_USDT", "ETH_USDT", "SOL_USDT"])
+
+    def test_to_dataframe(self):
+        df = self.table.to_dataframe()
+        # The table can still grow once converted
+        self.table.append({"exchange_id": "okx", "market_id": "BTC_USDT", "volume": 1.0})
+
+        self.assertEqual(list(df.columns), ["exchange_id", "market_id", "volume"])
+        self.assertIsInstance(df["market_id"].dtype, pd.CategoricalDtype)
+        self.assertEqual(df["market_id"].tolist(), ["BTC_USDT", "ETH_USDT", "BTC_USDT"])
+        self.assertEqual(df["volume"].tolist()[:2], [1.5, 2.0])
+        self.assertEqual(df.to_csv(index=False), pd.DataFrame(self.table.to_records()[:3]).to_csv(index=False))
+
+    def test_to_records_is_json_serializable(self):
+        table = RecordTable.from_records(["exchange_id"], [{"exchange_id": "binance"}])
+
+        self.assertEqual(json.loads(json.dumps(table.to_records())), [{"exchange_id": "binance"}])
+
+if __name__ == "__main__":
+    unittest.main()
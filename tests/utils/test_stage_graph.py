@@ -0,0 +1,113 @@
+import threading
+import time
+import unittest
+from unittest.mock import MagicMock
+from src.utils.stage_graph import StageGraph, StageTiming, StageChannelClosed
+
+class TestStageGraph(unittest.TestCase):
+    def test_run_passes_dependency_results(self):
+        stage_graph = StageGraph()
+        stage_graph.add_stage("a", lambda: 1)
+        stage_graph.add_stage("b", lambda a: a + 1, depends_on=["a"])
+        stage_graph.add_stage("c", lambda a, b: a + b, depends_on=["a", "b"])
+
+        self.assertEqual(stage_graph.run(), {"a": 1, "b": 2, "c": 3})
+
+    def test_run_independent_stages_concurrently(self):
+        barrier = threading.Barrier(2, timeout=5)
+        stage_graph = StageGraph()
+        # Each stage waits for the other one, so this only completes if both run at the same time
+        stage_graph.add_stage("a", lambda: barrier.wait() is not None)
+        stage_graph.add_stage("b", lambda: barrier.wait() is not None)
+
+        self.assertEqual(stage_graph.run(), {"a": True, "b": True})
+
+    def test_run_streams_items_between_stages(self):
+        stage_graph = StageGraph()
+        channel = stage_graph.add_channel()
+
+        def produce():
+            for item in range(3):
+                channel.put(item)
+            channel.close()
+
+        stage_graph.add_stage("producer", produce)
+        stage_graph.add_stage("consumer", lambda: list(channel), streams_from=["producer"])
+
+        self.assertEqual(stage_graph.run()["consumer"], [0, 1, 2])
+
+    def test_run_failure_releases_consumers_and_raises(self):
+        stage_graph = StageGraph()
+        channel = stage_graph.add_channel()
+        skipped_stage = MagicMock()
+
+        def fail():
+            raise RuntimeError("stage failed")
+
+        stage_graph.add_stage("failing", fail)
+        stage_graph.add_stage("producer", lambda: channel.close(), depends_on=["failing"])
+        stage_graph.add_stage("consumer", lambda: list(channel), streams_from=["producer"])
+        stage_graph.add_stage("skipped", skipped_stage, depends_on=["producer"])
+
+        with self.assertRaises(RuntimeError):
+            stage_graph.run()
+        skipped_stage.assert_not_called()
+
+    def test_run_failure_does_not_wait_for_running_producers(self):
+        stage_graph = StageGraph()
+        channel = stage_graph.add_channel()
+        producer_errors = []
+        producer_stopped = threading.Event()
+
+        def produce():
+            # Stands in for a long exchange scan, publishing a match every 10ms for up to 10s
+            try:
+                for item in range(1000):
+                    channel.put(item)
+                    time.sleep(0.01)
+            except StageChannelClosed as error:
+                producer_errors.append(error)
+            finally:
+                producer_stopped.set()
+
+        def consume():
+            next(iter(channel))
+            raise RuntimeError("consumer failed")
+
+        stage_graph.add_stage("producer", produce)
+        stage_graph.add_stage("consumer", consume, streams_from=["producer"])
+
+        started_at = time.monotonic()
+        with self.assertRaises(RuntimeError):
+            stage_graph.run()
+
+        self.assertLess(time.monotonic() - started_at, 5)
+        self.assertTrue(producer_stopped.wait(5))
+        self.assertEqual(len(producer_errors), 1)
+
+    def test_critical_path(self):
+        stage_graph = StageGraph()
+        stage_graph.add_stage("short", lambda: None)
+        stage_graph.add_stage("long", lambda: None)
+        stage_graph.add_stage("streamed", lambda: None, streams_from=["long"])
+        stage_graph.add_stage("export", lambda short, streamed: None, depends_on=["short", "streamed"])
+        stage_graph.timings = {
+            "short": StageTiming("short", 0, 1),
+            "long": StageTiming("long", 0, 5),
+            "streamed": StageTiming("streamed", 0, 5.5),
+            "export": StageTiming("export", 5.5, 6),
+        }
+
+        self.assertEqual([timing.name for timing in stage_graph.critical_path()], ["long", "streamed", "export"])
+        self.assertIn("Ran 4 stages in 6.000s", stage_graph.critical_path_report())
+        self.assertIn("Critical path: long (5.000s) -> streamed (5.500s) -> export (0.500s)",
+                      stage_graph.critical_path_report())
+
+    def test_add_stage_rejects_unknown_dependency(self):
+        stage_graph = StageGraph()
+
+        with self.assertRaises(ValueError):
+            stage_graph.add_stage("b", lambda a: a, depends_on=["a"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import os
+import sys
+import tempfile
+import unittest
+from src.utils.startup_profiler import StartupProfiler
+
+class TestStartupProfiler(unittest.TestCase):
+    def setUp(self):
+        self.modules_dir = tempfile.TemporaryDirectory()
+        sys.path.insert(0, self.modules_dir.name)
+        self.profiler = StartupProfiler()
+
+    def tearDown(self):
+        self.profiler.stop_import_tracking()
+        sys.path.remove(self.modules_dir.name)
+        for module_name in ("startup_profiler_parent", "startup_profiler_child"):
+            sys.modules.pop(module_name, None)
+        self.modules_dir.cleanup()
+
+    def write_module(self, module_name, source):
+        with open(os.path.join(self.modules_dir.name, f"{module_name}.py"), "w") as f:
+            f.write(source)
+
+    def test_tracks_cumulative_and_self_import_time(self):
+        self.write_module("startup_profiler_child", "import time\ntime.sleep(0.05)\nVALUE = 1\n")
+        self.write_module("startup_profiler_parent", "import startup_profiler_child\nVALUE = startup_profiler_child.VALUE\n")
+
+        self.profiler.start_import_tracking()
+        import startup_profiler_parent
+        self.profiler.stop_import_tracking()
+
+        self.assertEqual(startup_profiler_parent.VALUE, 1)
+        parent_cumulative, parent_self = self.profiler.module_timings["startup_profiler_parent"]
+        child_cumulative, _ = self.profiler.module_timings["startup_profiler_child"]
+        self.assertGreaterEqual(child_cumulative, 0.05)
+        self.assertGreaterEqual(parent_cumulative, child_cumulative)
+        self.assertLess(parent_self, 0.05)
+
+    def test_modules_imported_after_tracking_stopped_are_not_reported(self):
+        self.write_module("startup_profiler_child", "VALUE = 1\n")
+
+        self.profiler.start_import_tracking()
+        self.profiler.stop_import_tracking()
+        import startup_profiler_child
+
+        self.assertNotIn("startup_profiler_child", self.profiler.module_timings)
+
+    def test_laps_time_components_in_order(self):
+        now = [10.0]
+        profiler = StartupProfiler(clock=lambda: now[0])
+        now[0] = 10.5
+        profiler.lap("import DIContainer")
+        now[0] = 10.75
+        profiler.lap("CoingeckoAPI")
+
+        profile = profiler.to_dict()
+        self.assertEqual(profile["total_seconds"], 0.75)
+        self.assertEqual(profile["components"], [{"component": "import DIContainer", "seconds": 0.5},
+                                                 {"component": "CoingeckoAPI", "seconds": 0.25}])
+        self.assertIn("CoingeckoAPI", profiler.report())
+
+if __name__ == "__main__":
+    unittest.main()
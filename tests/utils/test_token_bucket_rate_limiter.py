@@ -0,0 +1,60 @@
+import threading
+import unittest
+from unittest.mock import patch
+from src.utils.token_bucket_rate_limiter import TokenBucketRateLimiter
+from tests.fake_clock import FakeClock
+
+class TestTokenBucketRateLimiter(unittest.TestCase):
+    @patch("time.sleep", return_value=None)
+    def test_burst_is_not_delayed(self, mock_sleep):
+        limiter = TokenBucketRateLimiter(calls_per_minute=60, burst=3, clock=FakeClock())
+
+        for _ in range(3):
+            limiter.acquire()
+
+        mock_sleep.assert_not_called()
+
+    @patch("time.sleep", return_value=None)
+    def test_empty_bucket_paces_callers_in_order(self, mock_sleep):
+        limiter = TokenBucketRateLimiter(calls_per_minute=30, burst=1, clock=FakeClock())
+
+        limiter.acquire()
+        limiter.acquire()
+        limiter.acquire()
+
+        # 30 calls/minute refills a token every 2 seconds, the queued callers wait 2 and 4 seconds
+        self.assertEqual([call.args[0] for call in mock_sleep.call_args_list], [2, 4])
+
+    @patch("time.sleep", return_value=None)
+    def test_tokens_refill_over_time(self, mock_sleep):
+        clock = FakeClock()
+        limiter = TokenBucketRateLimiter(calls_per_minute=60, burst=2, clock=clock)
+
+        limiter.acquire()
+        limiter.acquire()
+        clock.now += 10  # Refill is capped at the burst size
+        limiter.acquire()
+        limiter.acquire()
+
+        mock_sleep.assert_not_called()
+        self.assertAlmostEqual(limiter.tokens, 0)
+
+    @patch("time.sleep", return_value=None)
+    def test_shared_across_threads(self, mock_sleep):
+        limiter = TokenBucketRateLimiter(calls_per_minute=60, burst=1, clock=FakeClock())
+        threads = [threading.Thread(target=limiter.acquire) for _ in range(8)]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Every waiting thread got its own slot: 1, 2, ... 7 seconds
+        self.assertEqual(sorted(call.args[0] for call in mock_sleep.call_args_list), [1, 2, 3, 4, 5, 6, 7])
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucketRateLimiter(calls_per_minute=0)
+
+if __name__ == "__main__":
+    unittest.main()